@@ -0,0 +1,132 @@
+"""
+Extensions of allure AllureImpl used by hooks.
+"""
+import os
+import shutil
+import uuid
+
+from allure.common import AllureImpl
+from allure.structure import Attach
+from allure.utils import now
+from lxml import etree
+
+
+class AllureReport(AllureImpl):
+    """
+    AllureImpl which can attach files to given test case or step, not only to the currently active one.
+    Needed for attachments saved in background, when hooks already went to the next step.
+    Existing files are copied or moved into report folder without reading them into memory. Copy is not a hard link,
+    so pruned artifact store objects really free disk space.
+    Finished test cases are appended to suite xml and dropped from memory. Xml is valid after every case,
+    so results of finished cases survive a crash of the run.
+    """
+    COPY_CHUNK = 1024 * 1024
+
+    _suite_file = None
+    _suite_footer = None
+    _cases_start = _cases_end = 0  # offsets of written test cases in suite xml
+
+    def current(self):
+        """
+        :return: allure.structure.TestCase or allure.structure.TestStep - active item attachments go to
+        """
+        return self.stack[-1]
+
+    def attach_to(self, target, title, contents, attach_type):
+        """
+        Save attachment to report folder and add it to given test case or step.
+        :param target: allure.structure.TestCase or allure.structure.TestStep, see current()
+        :param title: str - attachment title
+        :param contents: str - attachment body
+        :param attach_type: allure.constants.AttachmentType
+        """
+        attach = Attach(source=self._save_attach(contents, attach_type=attach_type),
+                        title=title,
+                        type=attach_type.mime_type)
+        target.attachments.append(attach)
+
+    def attach_file(self, title, path, attach_type, target=None, move=False):
+        """
+        Add existing file to report folder and to given test case or step. File is not read into memory:
+        it is copied or moved.
+        :param title: str - attachment title
+        :param path: str - file path
+        :param attach_type: allure.constants.AttachmentType
+        :param target: allure.structure.TestCase or allure.structure.TestStep, see current(). Active item by default
+        :param move: boolean - move file instead of linking, original path will not exist anymore
+        """
+        source = '{}-attachment.{}'.format(uuid.uuid4(), attach_type.extension)
+        destination = os.path.join(self.logdir, source)
+
+        if move:
+            shutil.move(path, destination)
+        else:
+            shutil.copyfile(path, destination)
+
+        attach = Attach(source=source, title=title, type=attach_type.mime_type)
+        (target or self.current()).attachments.append(attach)
+
+    def start_suite(self, name, description=None, title=None, labels=None):
+        """
+        Starts test suite and writes its xml without test cases.
+        """
+        self._suite_file = '{}-testsuite.xml'.format(uuid.uuid4())
+        AllureImpl.start_suite(self, name, description, title, labels)
+
+        header, self._suite_footer = self._suite_parts()
+        with open(self._suite_path(), 'wb') as _file:
+            _file.write(header + self._suite_footer)
+        self._cases_start = self._cases_end = len(header)
+
+    def stop_case(self, status, message=None, trace=None):
+        """
+        Stops current test case, appends it to suite xml and drops it from memory.
+        """
+        test = AllureImpl.stop_case(self, status, message, trace)
+        self.testsuite.tests.remove(test)
+
+        case = etree.tostring(test.toxml(), pretty_print=True, encoding=unicode).encode('utf-8')
+        with open(self._suite_path(), 'r+b') as _file:
+            _file.seek(self._cases_end)
+            _file.write(case + self._suite_footer)
+            _file.truncate()
+        self._cases_end += len(case)
+        return test
+
+    def stop_suite(self):
+        """
+        Stops current test suite and writes final version of its xml: header with stop time and already written cases.
+        Final file is written to temporary one and renamed over previous version, so xml is never half written.
+        """
+        self.testsuite.stop = now()
+        header, footer = self._suite_parts()
+
+        path = self._suite_path()
+        temporary = '{}.tmp'.format(path)
+        with open(path, 'rb') as source, open(temporary, 'wb') as target:
+            target.write(header)
+            source.seek(self._cases_start)
+            remaining = self._cases_end - self._cases_start
+            while remaining:
+                chunk = source.read(min(remaining, self.COPY_CHUNK))
+                target.write(chunk)
+                remaining -= len(chunk)
+            target.write(footer)
+
+        if os.name == 'nt':  # rename does not overwrite on windows
+            os.remove(path)
+        os.rename(temporary, path)
+        self._suite_file = None
+
+    def _suite_path(self):
+        return os.path.join(self.logdir, self._suite_file)
+
+    def _suite_parts(self):
+        """
+        :return: tuple (header, footer) - utf-8 suite xml before and after its test cases
+        """
+        xml = self.testsuite.toxml()
+        marker = 'cases-{}'.format(uuid.uuid4().hex)
+        etree.SubElement(xml.find('test-cases'), marker)
+        header, footer = etree.tostring(xml, pretty_print=True, encoding=unicode).split(u'<{}/>'.format(marker))
+        return header.encode('utf-8'), footer.encode('utf-8')
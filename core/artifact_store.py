@@ -0,0 +1,201 @@
+"""
+Content addressed store for screenshots and other artifacts of test run.
+Every file is saved once under objects/<first 2 chars of sha1>/<sha1>.<extension>, identical frames of different
+steps and scenarios share one file. Scenario folder gets manifest.json which maps artifact names to objects.
+Old objects are pruned by age and total size of store, manifests are rewritten without pruned objects,
+scenario folders left without artifacts are removed.
+"""
+import hashlib
+import json
+import logging
+import os
+from StringIO import StringIO
+import threading
+import time
+import uuid
+
+try:
+    from PIL import Image  # optional, needed only for webp compression
+except ImportError:
+    Image = None
+
+
+class ArtifactStore(object):
+    """
+    Store of artifacts keyed by hash of content.
+    Compression:
+        none - objects are saved as is
+        webp - PNG screenshots are recompressed to lossless WebP (needs Pillow, falls back to none without it)
+    """
+    NONE = 'none'
+    WEBP = 'webp'
+
+    def __init__(self, root, compression=NONE, max_age_days=0, max_size_mb=0):
+        """
+        :param root: str - store folder
+        :param compression: str - NONE or WEBP
+        :param max_age_days: int - objects not used for longer are pruned, 0 - no limit
+        :param max_size_mb: int - oldest objects are pruned until store is smaller, 0 - no limit
+        """
+        if compression not in (self.NONE, self.WEBP):
+            raise ValueError('Unknown artifact compression: {}'.format(compression))
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if compression == self.WEBP and Image is None:
+            self.logger.warning('Pillow is not installed, artifacts are stored without webp compression')
+            compression = self.NONE
+
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.compression = compression
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+        if not os.path.exists(self.objects_dir):
+            os.makedirs(self.objects_dir)
+
+    def put(self, data, extension):
+        """
+        Save artifact if store does not have it yet.
+        :param data: str - file contents
+        :param extension: str - file extension without dot, for example png
+        :return: str - object path
+        """
+        if self.compression == self.WEBP and extension == 'png':
+            data, extension = self._to_webp(data), self.WEBP
+
+        digest = hashlib.sha1(data).hexdigest()
+        folder = os.path.join(self.objects_dir, digest[:2])
+        path = os.path.join(folder, '{}.{}'.format(digest, extension))
+
+        if os.path.exists(path):
+            os.utime(path, None)  # object is in use again, keep it from age pruning
+            return path
+
+        if not os.path.exists(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:  # created by other worker
+                pass
+
+        temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        with open(temporary, 'wb') as _file:
+            _file.write(data)
+        os.rename(temporary, path)  # concurrent writers of the same object write the same bytes
+        return path
+
+    def prune(self, manifests_dir=None):
+        """
+        Remove objects older than max_age_days, then oldest objects until store is smaller than max_size_mb.
+        :param manifests_dir: str - folder with scenario folders (searched recursively), their manifests
+        are rewritten without removed objects
+        :return: int - number of removed objects
+        """
+        objects = []
+        for root, _, files in os.walk(self.objects_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                objects.append((stat.st_mtime, stat.st_size, path))
+        objects.sort()
+
+        expired = []
+        if self.max_age_days:
+            oldest_allowed = time.time() - self.max_age_days * 24 * 60 * 60
+            while objects and objects[0][0] < oldest_allowed:
+                expired.append(objects.pop(0))
+
+        if self.max_size_mb:
+            total_size = sum(size for _, size, _ in objects)
+            while objects and total_size > self.max_size_mb * 1024 * 1024:
+                item = objects.pop(0)
+                total_size -= item[1]
+                expired.append(item)
+
+        removed = 0
+        for _, _, path in expired:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                self.logger.debug('Failed to remove artifact: %s', path, exc_info=True)
+
+        if removed and manifests_dir:
+            self._clean_manifests(manifests_dir)
+        return removed
+
+    def _clean_manifests(self, manifests_dir):
+        """
+        Drop entries of missing objects from manifests under manifests_dir. Manifest without entries is removed,
+        and so is its folder if nothing else is left in it.
+        """
+        for root, folders, files in os.walk(manifests_dir):
+            if os.path.abspath(root) == os.path.abspath(self.root):
+                del folders[:]  # store itself has no manifests
+                continue
+            if Manifest.FILE_NAME not in files:
+                continue
+            path = os.path.join(root, Manifest.FILE_NAME)
+            try:
+                with open(path) as _file:
+                    manifest = json.load(_file)
+                artifacts = [entry for entry in manifest['artifacts']
+                             if os.path.exists(os.path.join(root, entry['object']))]
+                if len(artifacts) == len(manifest['artifacts']):
+                    continue
+                if artifacts:
+                    manifest['artifacts'] = artifacts
+                    with open(path, 'w') as _file:
+                        json.dump(manifest, _file, indent=2)
+                    continue
+                os.remove(path)
+                if not os.listdir(root):
+                    os.rmdir(root)
+            except (IOError, OSError, ValueError, KeyError):
+                self.logger.debug('Failed to clean manifest: %s', path, exc_info=True)
+
+    @staticmethod
+    def _to_webp(png):
+        output = StringIO()
+        Image.open(StringIO(png)).save(output, 'WEBP', lossless=True)
+        return output.getvalue()
+
+
+class Manifest(object):
+    """
+    List of artifacts of one scenario, written as manifest.json into scenario folder.
+    Entries can be added from writer thread.
+    """
+    FILE_NAME = 'manifest.json'
+
+    def __init__(self, directory, scenario):
+        """
+        :param directory: str - scenario folder
+        :param scenario: str - scenario name
+        """
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self.scenario = scenario
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def add(self, name, object_path, title=None):
+        """
+        :param name: str - artifact name, for example 1__Open_main_page__.png
+        :param object_path: str - path returned by ArtifactStore.put
+        :param title: str - allure attachment title
+        """
+        entry = {'name': name,
+                 'object': os.path.relpath(object_path, os.path.dirname(self.path)),
+                 'title': title,
+                 'time': time.time()}
+        with self._lock:
+            self.entries.append(entry)
+
+    def write(self):
+        with self._lock:
+            entries = sorted(self.entries, key=lambda entry: entry['time'])
+        with open(self.path, 'w') as _file:
+            json.dump({'scenario': self.scenario, 'artifacts': entries}, _file, indent=2)
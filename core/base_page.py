@@ -4,16 +4,19 @@ Created on September 18, 2015
 @author: oleg-toporkov
 """
 import logging
-from time import sleep
+import time
 
+from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions
-from selenium.webdriver.support.ui import WebDriverWait
 
-from decorators import log_exception
+from core import scripts, waits
+from core.locator_stats import collector
+from decorators import log_exception, measure_action
 from utilities.config import Config
+from utilities.locator import Locator
 
 
 class BasePage(object):
@@ -21,7 +24,21 @@ class BasePage(object):
     Base page representation.
     Contains all actions related to UI interaction.
     All pages may be inherited from this class.
+    Locator arguments are utilities.locator.Locator or str: css=..., id=..., name=..., xpath=... or just xpath.
+    With cache_elements found web elements are reused by next actions with the same locator and condition
+    (presence, visibility, clickable). Element cached for presence is reused without driver calls, when it became
+    stale (after click or ENTER navigation) the action is repeated with element found again. Visible and clickable
+    elements are checked by one script call before reuse, element not meeting condition anymore is found again.
+    Cache is cleared by open() and frame switches.
+    Waits are done by wait_engine (see core.waits), it can be changed for page or for single _get_element call.
+    Public actions record their wait and driver call time to stats (see core.locator_stats).
     """
+    CACHED_CONDITIONS = {
+        expected_conditions.presence_of_element_located: 'present',
+        expected_conditions.visibility_of_element_located: 'visible',
+        expected_conditions.element_to_be_clickable: 'clickable',
+    }
+
     def __init__(self, browser):
         """
         :type browser: selenium.webdriver.*
@@ -29,26 +46,55 @@ class BasePage(object):
         self.browser = browser
         self.logger = logging.getLogger(self.__class__.__name__)
         self.timeout = 15
+        self.cache_elements = Config.ELEMENT_CACHE
+        self.wait_engine = Config.WAIT_ENGINE
+        self.stats = collector if Config.LOCATOR_STATS else None
+        self._measuring = False
+        self._wait_time = 0.0
+        self._wait_condition = None
+        self._wait_timeout = None
+        self._elements = {}  # (locator, expected condition) -> WebElement
 
-    @log_exception('Failed to get web element with xpath: {}')
-    def _get_element(self, element, expected_condition=expected_conditions.presence_of_element_located, wait=None):
+    @log_exception('Failed to get web element with locator: {}')
+    def _get_element(self, element, expected_condition=expected_conditions.presence_of_element_located, wait=None,
+                     engine=None):
         """
-        Function for getting WebElement from given xpath.
+        Function for getting WebElement from given locator.
         Also performs highlight of that element if Config.HIGHLIGHT is True.
-        :type element: str - web element xpath or can be selenium.webdriver.remote.webelement.WebElement
+        :type element: web element locator or can be selenium.webdriver.remote.webelement.WebElement
         :type expected_condition: selenium.webdriver.support.expected_conditions.*
         :param wait: int - element wait time, if None takes self.timeout
+        :param engine: str - wait engine from core.waits, if None takes self.wait_engine
         :return: element: selenium.webdriver.remote.webelement.WebElement
         """
         if wait is None:
             wait = self.timeout
+        if engine is None:
+            engine = self.wait_engine
+
+        if isinstance(element, basestring):
+            element = Locator.parse(element)
 
-        if isinstance(element, str):
-            self.logger.debug('Waiting {} seconds for web element with condition: {}'
-                              .format(wait, expected_condition.__name__))
+        if isinstance(element, Locator):
+            key = (element, expected_condition)
+            cached = self._cached_element(key)
+            if cached is not None:
+                element = cached
+            else:
+                self.logger.debug('Waiting %s seconds for web element with condition: %s (%s wait)',
+                                  wait, expected_condition.__name__, engine)
 
-            wd_wait = WebDriverWait(self.browser, wait)
-            element = wd_wait.until(expected_condition((By.XPATH, element)))
+                started = time.time()
+                try:
+                    element = waits.wait_for(self.browser, element, expected_condition, wait, engine)
+                finally:
+                    self._wait_time += time.time() - started
+                    self._wait_condition = expected_condition.__name__
+                    self._wait_timeout = wait
+
+                if self.cache_elements and expected_condition in self.CACHED_CONDITIONS and \
+                        isinstance(element, WebElement):
+                    self._elements[key] = element
 
         if element:
             self.logger.debug('Got web element!')
@@ -58,36 +104,150 @@ class BasePage(object):
 
         return element
 
+    def _with_element(self, locator, action, expected_condition=expected_conditions.presence_of_element_located,
+                      wait=None):
+        """
+        Call action with web element. If cached element became stale it is found again and action is repeated.
+        :param locator: web element locator
+        :param action: callable taking selenium.webdriver.remote.webelement.WebElement
+        :type expected_condition: selenium.webdriver.support.expected_conditions.*
+        :param wait: int - element wait time, if None takes self.timeout
+        :return: result of action
+        """
+        if isinstance(locator, basestring):
+            locator = Locator.parse(locator)
+
+        try:
+            return action(self._get_element(locator, expected_condition, wait))
+        except StaleElementReferenceException:
+            if not self.cache_elements or (locator, expected_condition) not in self._elements:
+                raise
+            self.logger.debug('Cached web element is stale, getting it again: %s', locator)
+            del self._elements[(locator, expected_condition)]
+            return action(self._get_element(locator, expected_condition, wait))
+
+    def _wait_for(self, locator, expected_condition=expected_conditions.presence_of_element_located, wait=None):
+        """
+        Wait for web element found again, not taken from cache: cached present element is not checked and could
+        be stale. Found element is cached for next actions.
+        :param locator: web element locator
+        :type expected_condition: selenium.webdriver.support.expected_conditions.*
+        :param wait: int - element wait time, if None takes self.timeout
+        :return: selenium.webdriver.remote.webelement.WebElement or result of expected condition
+        """
+        if isinstance(locator, basestring):
+            locator = Locator.parse(locator)
+        self._elements.pop((locator, expected_condition), None)
+        return self._get_element(locator, expected_condition, wait)
+
+    def _cached_element(self, key):
+        """
+        Get cached web element. Visible or clickable one is checked to be still attached to the page and to meet
+        expected condition, stale element or one which does not meet condition anymore is removed from cache.
+        Present one is returned without check, stale element is found again by _with_element.
+        :param key: tuple (locator, expected condition)
+        :return: selenium.webdriver.remote.webelement.WebElement or None
+        """
+        element = self._elements.get(key) if self.cache_elements else None
+        if element is None:
+            return None
+        if key[1] is expected_conditions.presence_of_element_located:  # staleness is handled by _with_element
+            self.logger.debug('Got web element from cache')
+            return element
+        try:
+            usable = self.browser.execute_script(scripts.CHECK_ELEMENT, element, self.CACHED_CONDITIONS[key[1]])
+        except StaleElementReferenceException:
+            usable = False
+        if not usable:
+            self.logger.debug('Cached web element is stale or does not meet condition, getting it again: %s', key[0])
+            del self._elements[key]
+            return None
+        self.logger.debug('Got web element from cache')
+        return element
+
+    def clear_element_cache(self):
+        """
+        Forget cached web elements. Called on page load and frame switch.
+        """
+        self._elements.clear()
+
     def _highlight(self, element):
         """
-        Highlight given web element with red border using JS execution.
-        WARNING: Contains time.sleep in 1 sec between scrolling to element and highlighting
+        Scroll to given web element and highlight it with red border using JS execution.
+        Highlight is removed by the page itself after Config.HIGHLIGHT_DURATION milliseconds, test does not wait.
         :type element: selenium.webdriver.remote.webelement.WebElement
         """
-        self.execute_script(element, 'scrollIntoView(true);')
-        sleep(1)
-        self.execute_script(element, 'setAttribute("style", "color: red; border: 5px solid red;");')
-        sleep(1)
-        self.execute_script(element, 'setAttribute("style", "");')
+        self.browser.execute_script(scripts.HIGHLIGHT, element, Config.HIGHLIGHT_DURATION)
 
-    @log_exception('Failed to get web elements with xpath: {}')
-    def get_elements(self, xpath):
+    @log_exception('Failed to get web elements with locator: {}')
+    @measure_action
+    def get_elements(self, locator):
         """
-        Get multiple elements by xpath.
-        :param xpath: str - web element xpath
+        Get multiple elements by locator.
+        :param locator: web element locator
         :return: tuple of selenium.webdriver.remote.webelement.WebElement
         """
-        self.logger.debug('Getting web elements with xpath: {}'.format(xpath))
-        self._get_element(xpath)
-        elements = self.browser.find_elements_by_xpath(xpath)
-        self.logger.debug('Got web elements with xpath: {}'.format(xpath))
+        locator = Locator.parse(locator)
+        self.logger.debug('Getting web elements with locator: %s', locator)
+        self._wait_for(locator)
+        elements = self.browser.find_elements(*locator)
+        self.logger.debug('Got web elements with locator: %s', locator)
         return elements
 
-    @log_exception('Failed presence check of web element with xpath: {}')
-    def is_present(self, xpath, wait=None, expected=True):
+    @log_exception('Failed to get texts of web elements with locator: {}')
+    @measure_action
+    def get_texts(self, locator, wait=None):
+        """
+        Get texts of all elements found by locator in one browser call.
+        :param locator: web element locator
+        :param wait: int - if given, wait for presence of first element before reading
+        :return: list of str
+        """
+        locator = Locator.parse(locator)
+        if wait is not None:
+            self._wait_for(locator, wait=wait)
+        texts = self.browser.execute_script(scripts.GET_TEXTS, locator.by, locator.value)
+        self.logger.debug('Got %s texts of web elements with locator: %s', len(texts), locator)
+        return texts
+
+    @log_exception('Failed to get attributes of web elements with locator: {}')
+    @measure_action
+    def get_attributes(self, locator, names, wait=None):
+        """
+        Get attributes (or properties like value, checked) of all elements found by locator in one browser call.
+        :param locator: web element locator
+        :param names: list of str - attribute names
+        :param wait: int - if given, wait for presence of first element before reading
+        :return: list of dicts {name: value}, one dict per element
+        """
+        locator = Locator.parse(locator)
+        if wait is not None:
+            self._wait_for(locator, wait=wait)
+        values = self.browser.execute_script(scripts.GET_ATTRIBUTES, locator.by, locator.value, list(names))
+        self.logger.debug('Got attributes %s of %s web elements with locator: %s', names, len(values), locator)
+        return values
+
+    @log_exception('Failed to get states of web elements with locators: {}')
+    @measure_action
+    def get_states(self, locators):
+        """
+        Check presence, visibility and enabled state of many locators in one browser call, without waiting.
+        :param locators: list of web element locators
+        :return: dict {locator: {'present': bool, 'visible': bool, 'enabled': bool, 'count': int}},
+                 state is of the first element found by locator
+        """
+        locators = list(locators)
+        parsed = [list(Locator.parse(locator)) for locator in locators]
+        states = self.browser.execute_script(scripts.GET_STATES, parsed)
+        self.logger.debug('Got states of %s locators', len(states))
+        return dict(zip(locators, states))
+
+    @log_exception('Failed presence check of web element with locator: {}')
+    @measure_action
+    def is_present(self, locator, wait=None, expected=True):
         """
         Presence check of web element on the UI.
-        :param xpath: str - web element xpath
+        :param locator: web element locator
         :param wait: int - wait time
         :param expected: boolean - expected to find it
         :return: boolean - element presence
@@ -97,16 +257,17 @@ class BasePage(object):
         if not expected:
             expected_condition = expected_conditions.staleness_of
 
-        self.logger.debug('Checking presence of web element with xpath: {}. Expected: {!s}'.format(xpath, expected))
-        found = self._get_element(xpath, expected_condition, wait) is not None
-        self.logger.debug('Presence check of web element with xpath: {}. Result: {!s}'.format(xpath, found))
+        self.logger.debug('Checking presence of web element with locator: %s. Expected: %s', locator, expected)
+        found = self._wait_for(locator, expected_condition, wait) is not None
+        self.logger.debug('Presence check of web element with locator: %s. Result: %s', locator, found)
         return found
 
-    @log_exception('Failed visible check of web element with xpath: {}')
-    def is_visible(self, xpath, wait=None, expected=True):
+    @log_exception('Failed visible check of web element with locator: {}')
+    @measure_action
+    def is_visible(self, locator, wait=None, expected=True):
         """
         Visibility check of web element on the UI.
-        :param xpath: str - web element xpath
+        :param locator: web element locator
         :param wait: int - wait time
         :param expected: boolean - expected to be visible
         :return: boolean - element visibility
@@ -116,31 +277,34 @@ class BasePage(object):
         if not expected:
             expected_condition = expected_conditions.invisibility_of_element_located
 
-        self.logger.debug('Checking visibility of web element with xpath: {}. Expected: {!s}'.format(xpath, expected))
-        found = self._get_element(xpath, expected_condition, wait).is_displayed()
-        self.logger.debug('Visible check of web element with xpath: {}. Result: {!s}'.format(xpath, found))
+        self.logger.debug('Checking visibility of web element with locator: %s. Expected: %s', locator, expected)
+        found = self._with_element(locator, lambda element: element.is_displayed(), expected_condition, wait)
+        self.logger.debug('Visible check of web element with locator: %s. Result: %s', locator, found)
         return found
 
-    @log_exception('Failed to click web element with xpath: {}')
-    def click(self, xpath):
+    @log_exception('Failed to click web element with locator: {}')
+    @measure_action
+    def click(self, locator):
         """
-        Click web element with given xpath
-        :type xpath: str - web element xpath
+        Click web element with given locator
+        :type locator: web element locator
         """
-        self.logger.info('Clicking web element with xpath: {}'.format(xpath))
-        self._get_element(xpath, expected_conditions.element_to_be_clickable).click()
-        self.logger.info('Clicked web element with xpath: {}'.format(xpath))
+        self.logger.info('Clicking web element with locator: %s', locator)
+        self._with_element(locator, lambda element: element.click(), expected_conditions.element_to_be_clickable)
+        self.logger.info('Clicked web element with locator: %s', locator)
 
-    @log_exception('Failed to type text into web element with xpath: {}')
-    def type(self, xpath, text):
+    @log_exception('Failed to type text into web element with locator: {}')
+    @measure_action
+    def type(self, locator, text):
         """
-        Type text into input field with given xpath
-        :type xpath: str - web element xpath
+        Type text into input field with given locator
+        :type locator: web element locator
         :type text: str - text to type
         """
-        self.logger.info('Typing "{}" into field with xpath: {}'.format(text, xpath))
-        self._get_element(xpath, expected_conditions.visibility_of_element_located).send_keys(text)
-        self.logger.info('Typed "{}" into field with xpath: {}'.format(text, xpath))
+        self.logger.info('Typing "%s" into field with locator: %s', text, locator)
+        self._with_element(locator, lambda element: element.send_keys(text),
+                           expected_conditions.visibility_of_element_located)
+        self.logger.info('Typed "%s" into field with locator: %s', text, locator)
 
     def execute_script(self, element, script):
         """
@@ -154,52 +318,60 @@ class BasePage(object):
             raise ValueError('Argument element cannot be None')
         return self.browser.execute_script("return arguments[0].{}".format(script), element)
 
-    @log_exception('Failed to mouse over web element with xpath: {}')
-    def mouse_over(self, xpath):
+    @log_exception('Failed to mouse over web element with locator: {}')
+    @measure_action
+    def mouse_over(self, locator):
         """
         Simulate mouse cursor over given web element.
-        :type xpath: str - web element xpath
+        :type locator: web element locator
         """
-        actions = ActionChains(self.browser)
-        actions.move_to_element(self._get_element(xpath)).perform()
-        self.logger.info('Mouse over web element with xpath: {}'.format(xpath))
+        self._with_element(locator, lambda element: ActionChains(self.browser).move_to_element(element).perform())
+        self.logger.info('Mouse over web element with locator: %s', locator)
 
     @log_exception('Failed open URL: {}')
+    @measure_action
     def open(self, url):
         """
         Open given URL in browser
         :type url: str - URL to open
         """
+        self.clear_element_cache()
         self.browser.get(url)
-        self.logger.info('Opened URL: {}'.format(url))
+        self.logger.info('Opened URL: %s', url)
 
     @log_exception('Cannot switch to frame: {}')
-    def switch_to_frame(self, xpath):
+    @measure_action
+    def switch_to_frame(self, locator):
         """
         Switch to frame
-        :param xpath: str - frame xpath
+        :param locator: frame locator
         """
-        self.browser.switch_to.frame(self._get_element(xpath))
+        self._with_element(locator, self.browser.switch_to.frame)
+        self.clear_element_cache()
 
     @log_exception('Cannot switch to default frame')
+    @measure_action
     def switch_to_default_frame(self):
         """
         Switch to default frame
         """
         self.browser.switch_to.default_content()
+        self.clear_element_cache()
 
     @log_exception('Cannot get text located: {}')
-    def get_text(self, xpath):
+    @measure_action
+    def get_text(self, locator):
         """
         Get text of the web element
-        :param xpath: str - web element xpath
+        :param locator: web element locator
         """
-        return self._get_element(xpath).text
+        return self._with_element(locator, lambda element: element.text)
 
-    @log_exception('Cannot send ENTER to the web element with xpath: {}')
-    def send_enter(self, xpath):
+    @log_exception('Cannot send ENTER to the web element with locator: {}')
+    @measure_action
+    def send_enter(self, locator):
         """
         Emulate sending ENTER key from keyboard to the given web element.
-        :param xpath: str - web element xpath
+        :param locator: web element locator
         """
-        self._get_element(xpath).send_keys(Keys.ENTER)
+        self._with_element(locator, lambda element: element.send_keys(Keys.ENTER))
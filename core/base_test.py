@@ -33,62 +33,182 @@ Created on September 18, 2015
 
 @author: oleg-toporkov
 """
-from allure.common import AllureImpl
 from allure.constants import AttachmentType, Label
 from allure.structure import TestLabel
 from allure.utils import LabelsList
 
 import logging
+import os
 import re
 import sys
-
+import time
+
+from core import http_proxy, profiler, sharding, snapshots
+from core.allure_report import AllureReport
+from core.artifact_store import ArtifactStore, Manifest
+from core.browser_factory import BrowserFactory
+from core.command_tracer import CommandTracer
+from core.driver_pool import DriverPool
+from core.http_proxy import HttpProxy
+from core.locator_stats import collector as locator_stats
+from core.parallel_runner import worker_log_dir
+from core.profiler import Profiler
+from core.remote_driver import PooledConnection
+from core.results_db import ResultsDB
+from core.scenarios import scenario_key
+from core.screenshot_policy import ScreenshotPolicy
+from core.screenshot_writer import ScreenshotWriter
+from core.sharding import DurationHistory
+from core.snapshots import SnapshotStore
 from utilities.config import Config
+from utilities.locator_registry import LocatorRegistry
 from utilities.log import Logger
 
 
+def _split(text):
+    """
+    :param text: str - comma separated config value
+    :return: list of str
+    """
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+
 def before_all(context):
     """
     Before all hook.
-    Set config variables for whole run, setup logging, init allure.
+    Set config variables for whole run, setup logging, load locators, init allure and screenshot writer.
     context.config.userdata is a dict with values from behave commandline.
     Example: -D foo=bar will store value in config.userdata['foo'].
+    In parallel mode (core.parallel_runner) -D worker=N moves LOG_DIR and allure report to worker folder.
+    With -D shard=i/N only i-th of N shards balanced by scenario durations history is run (see core.sharding).
+    -D proxy=record|replay routes browsers through local record/replay HTTP proxy (see core.http_proxy).
+    -D hub=http://host:4444/wd/hub sets Selenium Grid hub of -D browser=remote (see core.remote_driver).
+    -D run_mode=rerun-failed|failed-first selects or orders scenarios by results database (see core.results_db).
+    -D snapshot_ttl=0 runs setup steps of @snapshot scenarios without restoring snapshots (see core.snapshots).
     Will be executed once at the beginning of the test run.
     Context injected automatically by Behave.
     :type context: behave.runner.Context
     """
     if context.config.userdata:
         Config.BROWSER = context.config.userdata.get('browser', Config.BROWSER).lower()
+        Config.BROWSER_PROFILE = context.config.userdata.get('browser_profile', Config.BROWSER_PROFILE)
         Config.APP_URL = context.config.userdata.get('url', Config.APP_URL).lower()
-        Config.REUSE = context.config.userdata.get('reuse', Config.REUSE).lower()
-        Config.HIGHLIGHT = context.config.userdata.get('highlight', Config.HIGHLIGHT).lower()
+        Config.REUSE = context.config.userdata.getbool('reuse', Config.REUSE)
+        Config.HIGHLIGHT = context.config.userdata.getbool('highlight', Config.HIGHLIGHT)
+        Config.HIGHLIGHT_DURATION = context.config.userdata.getint('highlight_duration', Config.HIGHLIGHT_DURATION)
+        Config.ELEMENT_CACHE = context.config.userdata.getbool('element_cache', Config.ELEMENT_CACHE)
+        Config.WAIT_ENGINE = context.config.userdata.get('wait_engine', Config.WAIT_ENGINE).lower()
+        Config.TRACE_COMMANDS = context.config.userdata.getbool('trace', Config.TRACE_COMMANDS)
+        Config.PROFILE = context.config.userdata.get('profile', Config.PROFILE).lower()
+        Config.SCREENSHOT_POLICY = context.config.userdata.get('screenshots', Config.SCREENSHOT_POLICY).lower()
+        Config.LOG_LEVELS = context.config.userdata.get('log_levels', Config.LOG_LEVELS)
+        Config.PROXY_MODE = context.config.userdata.get('proxy', Config.PROXY_MODE).lower()
+        Config.RUN_MODE = context.config.userdata.get('run_mode', Config.RUN_MODE).lower()
+        Config.REMOTE_HUB_URL = context.config.userdata.get('hub', Config.REMOTE_HUB_URL)
+        Config.SNAPSHOT_TTL = context.config.userdata.getint('snapshot_ttl', Config.SNAPSHOT_TTL)
+
+        worker = context.config.userdata.get('worker')
+        if worker is not None:  # started by core.parallel_runner
+            Config.LOG_DIR = worker_log_dir(Config.LOG_DIR, worker)
 
     Logger.configure_logging()
     logger = logging.getLogger(__name__)
 
+    if os.path.isdir(Config.DEFINITIONS_DIR):
+        LocatorRegistry.preload(Config.DEFINITIONS_DIR)
+
+    context.duration_history = DurationHistory(Config.DURATION_HISTORY)
+    shard = context.config.userdata.get('shard')
+    if shard:
+        sharding.select_shard(context._runner.features, sharding.parse_shard(shard), context.duration_history)
+
+    context.results_db = ResultsDB(Config.RESULTS_DB)
+    context.results_db.apply(context._runner.features, Config.RUN_MODE)
+
     allure_report_path = '{}/allure_report'.format(Config.LOG_DIR)
 
     try:
-        context.allure = AllureImpl(allure_report_path)
+        context.allure = AllureReport(allure_report_path)
     except Exception:
-        logger.error('Failed to init allure at: {}'.format(allure_report_path))
+        logger.error('Failed to init allure at: %s', allure_report_path)
         raise
 
+    context.artifact_store = ArtifactStore(Config.ARTIFACTS_DIR, Config.ARTIFACT_COMPRESSION,
+                                           Config.ARTIFACT_MAX_AGE_DAYS, Config.ARTIFACT_MAX_SIZE_MB)
+    context.screenshot_writer = ScreenshotWriter(context.allure, context.artifact_store,
+                                                 Config.SCREENSHOT_QUEUE_SIZE, Config.SCREENSHOT_BACKPRESSURE)
+    context.screenshot_policy = ScreenshotPolicy(Config.SCREENSHOT_POLICY, Config.SCREENSHOT_EVERY_N_STEPS)
+    context.command_tracer = CommandTracer() if Config.TRACE_COMMANDS else None
+    context.profiler = Profiler(Config.PROFILE) if Config.PROFILE != profiler.OFF else None
+    context.snapshots = SnapshotStore(Config.SNAPSHOT_DIR, Config.SNAPSHOT_TTL) if Config.SNAPSHOT_TTL else None
+
+    context.http_proxy = None
+    if Config.PROXY_MODE != http_proxy.OFF:
+        context.http_proxy = HttpProxy(Config.PROXY_MODE, Config.PROXY_ARCHIVE, Config.PROXY_PORT,
+                                       Config.PROXY_MATCH_BODY, _split(Config.PROXY_IGNORE_PARAMS),
+                                       _split(Config.PROXY_STRIP_HEADERS), Config.PROXY_CERT_FILE,
+                                       Config.PROXY_KEY_FILE)
+        context.http_proxy.start()
+        Config.PROXY_ADDRESS = context.http_proxy.address
+
+    context.driver_pool = None
+    if Config.POOL_SIZE:
+        context.driver_pool = DriverPool(BrowserFactory.create, Config.POOL_SIZE, Config.POOL_PREWARM,
+                                         Config.POOL_TIMEOUT)
+        context.driver_pool.start()
+
 
 def after_all(context):
     """
     After all hook.
-    Empty for now.
-    Will be executed once at the beginning of the test run.
+    Write remaining screenshots, close all browsers of driver pool and hub connections, stop HTTP proxy,
+    prune old artifacts.
+    Write scenario durations, close results database.
+    Write locator timings, command trace and profile reports, stop background logging.
+    Will be executed once at the end of the test run.
     Context injected automatically by Behave.
     :type context: behave.runner.Context
     """
-    pass
+    context.screenshot_writer.close()
+
+    if context.driver_pool is not None:
+        context.driver_pool.close()
+
+    if context.http_proxy is not None:
+        context.http_proxy.stop()
+    PooledConnection.close_all()
+
+    logger = logging.getLogger(__name__)
+
+    if Config.ARTIFACT_MAX_AGE_DAYS or Config.ARTIFACT_MAX_SIZE_MB:
+        logger.info('Pruned artifacts: %s', context.artifact_store.prune(Config.LOG_DIR))
+
+    duration_history = os.path.join(Config.LOG_DIR, sharding.HISTORY_FILE)
+    context.duration_history.save(duration_history)
+    logger.info('Scenario durations: %s', duration_history)
+    context.results_db.close()
+
+    if Config.LOCATOR_STATS:
+        logger.info('Locator timings report: %s', ', '.join(locator_stats.write_report(Config.LOG_DIR)))
+
+    if context.command_tracer is not None:
+        trace_report = '{}/command_trace.json'.format(Config.LOG_DIR)
+        context.command_tracer.write_report(trace_report)
+        logger.info('Command trace report: %s', trace_report)
+
+    if context.profiler is not None:
+        logger.info('Profile summary: %s', ', '.join(context.profiler.write_summary(Config.LOG_DIR)))
+
+    if context.snapshots is not None:
+        logger.info('Snapshots restored: %s, saved: %s', context.snapshots.restored, context.snapshots.saved)
+
+    Logger.stop_logging()
 
 
 def before_feature(context, feature):
     """
     Before feature hook.
-    Init variables and allure suite.
+    Init variables, allure suite and feature timing.
     Will be executed for every .feature file.
     Context and feature injected automatically by Behave
     :type context: behave.runner.Context
@@ -103,14 +223,17 @@ def before_feature(context, feature):
         context.allure.start_suite(feature.name, feature.description,
                                    labels=LabelsList([TestLabel(name=Label.FEATURE, value=feature.name)]))
     except Exception:
-        logger.error('Failed to init allure suite with name: {}'.format(feature.name))
+        logger.error('Failed to init allure suite with name: %s', feature.name)
         raise
 
+    if context.profiler is not None:
+        context.profiler.start_feature(feature.name)
+
 
 def after_feature(context, feature):
     """
     After feature hook.
-    Shut down allure test suite.
+    Shut down allure test suite, stop feature timing.
     Will be executed after every .feature file.
     Context and feature injected automatically by Behave
     :type context: behave.runner.Context
@@ -121,49 +244,76 @@ def after_feature(context, feature):
     try:
         context.allure.stop_suite()
     except Exception:
-        logger.error('Failed to stop allure suite with name: {}'.format(feature.name))
+        logger.error('Failed to stop allure suite with name: %s', feature.name)
         raise
 
+    if context.profiler is not None:
+        context.profiler.end_feature(feature.status)
+
 
 def before_scenario(context, scenario):
     """
     Before scenario hook.
-    Create folder for screenshot, open browser, set Full HD resolution and place browser in test context.
+    Create scenario folder with artifact manifest, open browser (or take one from driver pool)
+    and place browser in test context.
+    Scenario with @snapshot tag gets browser state of its setup steps from snapshot instead of running them,
+    or its state is saved after setup if there is no valid snapshot yet.
     Also start allure test case.
     Will be executed in the beginning of every scenario in .feature file.
     Context and scenario injected automatically by Behave
     :type context: behave.runner.Context
     :type scenario: behave.model.Scenario
     """
-    Logger.create_test_folder(scenario.name)
+    context.scenario_started = time.time()
+    if context.profiler is not None:
+        context.profiler.start_scenario(scenario.name)
+
+    context.test_dir = Logger.create_test_folder(scenario.name)
+    context.manifest = Manifest(context.test_dir, scenario.name)
     logger = logging.getLogger(__name__)
 
     try:
         context.allure.start_case(scenario.name,
                                   labels=LabelsList([TestLabel(name=Label.FEATURE, value=scenario.feature.name)]))
     except Exception:
-        logger.error('Failed to init allure test with name: {}'.format(scenario.name))
+        logger.error('Failed to init allure test with name: %s', scenario.name)
         raise
 
     context.test_name = scenario.name
+    context.screenshot_policy.reset()
+    locator_stats.start_scenario()
 
     if context.browser is None:
         try:
-            # use in constructor service_args=['--webdriver-logfile=path_to_log'] to debug deeper...
-            context.browser = Config.browser_types[Config.BROWSER]()
-            context.browser.set_window_size(1920, 1080)
+            if context.driver_pool is not None:
+                context.browser = context.driver_pool.checkout()
+            else:
+                context.browser = BrowserFactory.create()
         except Exception:
-            logger.error('Failed to start browser: {}'.format(Config.BROWSER))
+            logger.error('Failed to start browser: %s', Config.BROWSER)
             raise
-    logger.info('Start of test: {}'.format(scenario.name))
+
+    context.snapshot = None  # (key, last setup step) when state should be saved after setup
+    if context.snapshots is not None and snapshots.TAG in scenario.effective_tags:
+        background, steps = snapshots.setup_steps(scenario)
+        if background or steps:
+            key = snapshots.snapshot_key(background + steps, Config.BROWSER, Config.BROWSER_PROFILE, Config.APP_URL)
+            if not context.snapshots.fast_forward(context.browser, scenario, key):
+                context.snapshot = key, (background + steps)[-1]
+
+    if context.command_tracer is not None:
+        context.command_tracer.install(context.browser)
+        context.command_tracer.start_scenario()
+    logger.info('Start of test: %s', scenario.name)
 
 
 def after_scenario(context, scenario):
     """
     After scenario hook.
-    Close browser in case it don't needed anymore.
+    Close browser (or return it to driver pool) in case it don't needed anymore.
     Make screenshot when test result = failed.
-    And stop allure test case.
+    Wait for screenshots to be written, write artifact manifest, attach locator timings, command trace, profile
+    and stop allure test case.
     Will be executed after every scenario in .feature file.
     Context and scenario injected automatically by Behave
     :type context: behave.runner.Context
@@ -172,27 +322,60 @@ def after_scenario(context, scenario):
     logger = logging.getLogger(__name__)
 
     if scenario.status.lower() == 'failed':
-        _screenshot = '{}/{}/__Fail.png'.format(Config.LOG_DIR, scenario.name.replace(' ', '_'))
+        try:
+            png = context.browser.get_screenshot_as_png()
+        except Exception:
+            logger.error('Failed to take fail screenshot of: %s', scenario.name)
+            raise
+        context.screenshot_writer.submit(context.manifest, '__Fail.png', png, '{} fail'.format(scenario.name),
+                                         block=True)  # never dropped, even with drop backpressure
+
+    if context.command_tracer is not None:
+        context.command_tracer.uninstall()
 
+    if not Config.REUSE:
         try:
-            context.browser.save_screenshot(_screenshot)
+            if context.driver_pool is not None:
+                context.driver_pool.checkin(context.browser)
+            else:
+                context.browser.quit()
         except Exception:
-            logger.error('Failed to take screenshot to: {}'.format(Config.LOG_DIR))
+            logger.error('Failed to close browser: %s', Config.BROWSER)
             raise
+        context.browser = None
+
+    context.screenshot_writer.flush()
+    try:
+        context.manifest.write()
+    except Exception:
+        logger.error('Failed to write artifact manifest: %s', context.manifest.path)
+        raise
+
+    if Config.LOCATOR_STATS and locator_stats.scenario.timings:
         try:
-            with open(_screenshot, 'rb') as _file:
-                context.allure.attach('{} fail'.format(scenario.name), _file.read(), AttachmentType.PNG)
+            context.allure.attach('{} locator timings'.format(scenario.name), locator_stats.scenario_summary(),
+                                  AttachmentType.TEXT)
         except Exception:
-            logger.error('Failed to attach to report screenshot: {}'.format(_screenshot))
+            logger.error('Failed to attach locator timings of: %s', scenario.name)
             raise
 
-    if not Config.REUSE:
+    if context.command_tracer is not None:
         try:
-            context.browser.quit()
+            context.allure.attach('{} command trace'.format(scenario.name), context.command_tracer.scenario_report(),
+                                  AttachmentType.TEXT)
         except Exception:
-            logger.error('Failed to close browser: {}'.format(Config.BROWSER))
+            logger.error('Failed to attach command trace of: %s', scenario.name)
+            raise
+
+    if context.profiler is not None:
+        prof_path, profile_text = context.profiler.end_scenario(scenario.status, context.test_dir)
+        try:
+            context.allure.attach('{} profile'.format(scenario.name), profile_text, AttachmentType.TEXT)
+            if prof_path is not None:
+                context.allure.attach_file('{} profile.prof'.format(scenario.name), prof_path, AttachmentType.OTHER)
+        except Exception:
+            logger.error('Failed to attach profile of: %s', scenario.name)
             raise
-        context.browser = None
 
     try:
         _status = scenario.status
@@ -202,16 +385,27 @@ def after_scenario(context, scenario):
                                  getattr(context, 'last_error_message', None),
                                  getattr(context, 'last_traceback', None))
     except Exception:
-        logger.error('Failed to stop allure test with name: {}'.format(scenario.name))
+        logger.error('Failed to stop allure test with name: %s', scenario.name)
         raise
 
-    logger.info('End of test: {}. Status: {} !!!\n\n\n'.format(scenario.name, scenario.status.upper()))
+    if scenario.status != 'skipped':
+        duration = time.time() - context.scenario_started
+        context.duration_history.record(scenario_key(scenario), duration)
+        try:
+            context.results_db.record(scenario_key(scenario), scenario.status, duration,
+                                      getattr(context, 'last_error_message', None)
+                                      if scenario.status == 'failed' else None)
+        except Exception:
+            logger.error('Failed to record result of: %s', scenario.name)
+            raise
+
+    logger.info('End of test: %s. Status: %s !!!\n\n\n', scenario.name, scenario.status.upper())
 
 
 def before_step(context, step):
     """
     Before step hook.
-    Call allure reporting for current step.
+    Call allure reporting for current step, start command trace and timing of step.
     Will be executed before every test step.
     Context and step injected automatically by Behave
     :type context: behave.runner.Context
@@ -222,44 +416,55 @@ def before_step(context, step):
     try:
         context.allure.start_step(step.name)
     except Exception:
-        logger.error('Failed to init allure step with name: {}'.format(step.name))
+        logger.error('Failed to init allure step with name: %s', step.name)
         raise
 
+    if context.command_tracer is not None:
+        context.command_tracer.start_step(step.name)
+
+    if context.profiler is not None:
+        context.profiler.start_step(step.name)
+
 
 def after_step(context, step):
     """
     After step hook.
-    Perform screenshot with step name and order num.
-    Stop allure step.
+    Perform screenshot with step name and order num if context.screenshot_policy allows it.
+    Screenshot is saved and attached to allure step in background by context.screenshot_writer.
+    Stop command trace and timing of step (before screenshot, so it is not counted) and allure step.
+    Save browser state snapshot after the last setup step of @snapshot scenario.
     Context and step injected automatically by Behave
     :type context: behave.runner.Context
     :type step: behave.model.Step
     """
     logger = logging.getLogger(__name__)
-    step_name = re.sub('[^A-Za-z0-9]+', '_', step.name)
-    _screenshot = '{}/{}/{}__{}__.png'.format(Config.LOG_DIR,
-                                              context.test_name.replace(' ', '_'),
-                                              context.picture_num, step_name)
-    try:
-        if context.browser is not None:
-            context.browser.save_screenshot(_screenshot)
-            context.picture_num += 1
-    except Exception:
-        logger.error('Failed to take screenshot to: {}'.format(Config.LOG_DIR))
-        logger.error('Screenshot name: {}'.format(step_name))
-        raise
 
+    if context.profiler is not None:
+        context.profiler.end_step()
+
+    if context.command_tracer is not None:
+        trace = context.command_tracer.end_step()
+        logger.debug('Step "%s": %s round trips, driver %.3fs, python %.3fs',
+                     step.name, trace['round_trips'], trace['driver'], trace['python'])
+
+    step_name = re.sub('[^A-Za-z0-9]+', '_', step.name)
+    _screenshot = '{}__{}__.png'.format(context.picture_num, step_name)
     try:
-        with open(_screenshot, 'rb') as _file:
-            context.allure.attach('{}_{}'.format(context.test_name, step.name), _file.read(), AttachmentType.PNG)
+        if context.browser is not None and context.screenshot_policy.should_capture(context.browser, step):
+            png = context.browser.get_screenshot_as_png()
+            if context.screenshot_policy.is_new_frame(png):
+                context.screenshot_writer.submit(context.manifest, _screenshot, png,
+                                                 '{}_{}'.format(context.test_name, step.name))
+                context.picture_num += 1
     except Exception:
-        logger.error('Failed to attach to report screenshot: {}'.format(_screenshot))
+        logger.error('Failed to take screenshot to: %s', Config.ARTIFACTS_DIR)
+        logger.error('Screenshot name: %s', step_name)
         raise
 
     try:
         context.allure.stop_step()
     except Exception:
-        logger.error('Failed to stop allure step with name: {}'.format(step.name))
+        logger.error('Failed to stop allure step with name: %s', step.name)
         raise
 
     if step.status == 'failed':  # get last traceback and error message
@@ -268,3 +473,9 @@ def after_step(context, step):
             context.last_error_message = step.error_message.split('ERROR:')[1]
         except IndexError:
             context.last_error_message = step.error_message
+
+    if context.snapshot is not None and step is context.snapshot[1] and step.status == 'passed':
+        try:
+            context.snapshots.put(context.snapshot[0], snapshots.capture(context.browser))
+        except Exception:
+            logger.warning('Failed to save snapshot after step: %s', step.name, exc_info=True)
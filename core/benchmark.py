@@ -0,0 +1,176 @@
+"""
+Benchmark of framework overhead: runs features in-process against fake browser (core.fake_driver)
+and measures Python time of BasePage actions and hooks without time spent inside the driver.
+Report is written to LOG_DIR/benchmark.json, with --baseline the run fails when overhead of any action
+or hook grew more than --max-regression compared to baseline report.
+
+Usage (from project root):
+    python -m core.benchmark [--runs 5] [--baseline logs/benchmark_baseline.json] [--max-regression 0.2]
+                             [tests/features] [other behave options]
+"""
+import argparse
+from functools import wraps
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+
+from behave.__main__ import main as behave_main
+
+from core import base_test
+from core.base_page import BasePage
+from utilities.config import Config
+
+HOOKS = ('before_all', 'after_all', 'before_feature', 'after_feature', 'before_scenario', 'after_scenario',
+         'before_step', 'after_step')
+NOISE_FLOOR = 0.0005  # seconds, smaller differences of overhead are not regressions
+
+logger = logging.getLogger(__name__)
+
+
+class Recorder(object):
+    """
+    Collects overhead samples: measured time minus time spent in fake driver.
+    """
+    def __init__(self):
+        self.samples = {}  # name -> list of (total, driver) seconds
+        self._depth = 0
+
+    def measure(self, name, func, get_driver):
+        """
+        Wrap function to record its time, nested measured calls are counted as part of outer one.
+        :param name: str - sample name
+        :param func: callable
+        :param get_driver: callable taking call arguments and returning driver or None
+        :return: wrapped callable
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._depth:
+                return func(*args, **kwargs)
+
+            driver = get_driver(*args)
+            driver_before = getattr(driver, 'busy_time', 0.0)
+            self._depth += 1
+            started = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                total = time.time() - started
+                self._depth -= 1
+                driver_time = getattr(driver, 'busy_time', 0.0) - driver_before
+                self.samples.setdefault(name, []).append((total, driver_time))
+        return wrapper
+
+    def report(self):
+        """
+        :return: dict name -> {calls, total, driver, overhead, overhead_median} with mean seconds per call
+        """
+        result = {}
+        for name, samples in sorted(self.samples.items()):
+            overheads = sorted(max(total - driver, 0.0) for total, driver in samples)
+            result[name] = {
+                'calls': len(samples),
+                'total': sum(total for total, _ in samples) / len(samples),
+                'driver': sum(driver for _, driver in samples) / len(samples),
+                'overhead': sum(overheads) / len(overheads),
+                'overhead_median': overheads[len(overheads) // 2],
+            }
+        return result
+
+
+def instrument(recorder):
+    """
+    Wrap public BasePage actions and base_test hooks.
+    :type recorder: Recorder
+    :return: callable restoring original functions
+    """
+    originals = []
+
+    for name, method in inspect.getmembers(BasePage, inspect.ismethod):
+        if not name.startswith('_'):
+            originals.append((BasePage, name, BasePage.__dict__[name]))
+            setattr(BasePage, name, recorder.measure('action.' + name, method.im_func,
+                                                     lambda page, *args: page.browser))
+
+    for name in HOOKS:
+        hook = getattr(base_test, name)
+        originals.append((base_test, name, hook))
+        setattr(base_test, name, recorder.measure('hook.' + name, hook,
+                                                  lambda context, *args: getattr(context, 'browser', None)))
+
+    def restore():
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+    return restore
+
+
+def regressions(report, baseline, max_regression):
+    """
+    :param report: dict from Recorder.report
+    :param baseline: dict from Recorder.report of previous run
+    :param max_regression: float - allowed relative growth of mean overhead
+    :return: list of str - regression descriptions
+    """
+    found = []
+    for name, current in sorted(report.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = previous['overhead'] * (1 + max_regression)
+        if current['overhead'] > limit and current['overhead'] - previous['overhead'] > NOISE_FLOOR:
+            found.append('{}: {:.3f} ms -> {:.3f} ms'.format(name, previous['overhead'] * 1000,
+                                                             current['overhead'] * 1000))
+    return found
+
+
+def run(args):
+    """
+    :param args: list of command line arguments
+    :return: int - exit code, 1 if features failed or overhead regressed
+    """
+    parser = argparse.ArgumentParser(prog='python -m core.benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    options, behave_args = parser.parse_known_args(args)
+
+    recorder = Recorder()
+    restore = instrument(recorder)
+    started = time.time()
+    try:
+        for _ in range(options.runs):
+            code = behave_main(['-D', 'browser=fake', '--no-capture', '-f', 'null'] + behave_args)
+            if code:
+                logger.error('Features failed with fake browser, exit code: %s', code)
+                return code
+    finally:
+        restore()
+
+    report = recorder.report()
+    report_path = os.path.join(Config.LOG_DIR, 'benchmark.json')
+    with open(report_path, 'w') as _file:
+        json.dump({'runs': options.runs, 'wall_time': time.time() - started, 'overhead': report},
+                  _file, indent=2, sort_keys=True)
+
+    print('{:<32} {:>7} {:>12} {:>12} {:>12}'.format('name', 'calls', 'total ms', 'driver ms', 'overhead ms'))
+    for name, item in sorted(report.items()):
+        print('{:<32} {:>7} {:>12.3f} {:>12.3f} {:>12.3f}'.format(name, item['calls'], item['total'] * 1000,
+                                                                  item['driver'] * 1000, item['overhead'] * 1000))
+    print('Report: {}'.format(report_path))
+
+    if options.baseline:
+        with open(options.baseline) as _file:
+            found = regressions(report, json.load(_file)['overhead'], options.max_regression)
+        for item in found:
+            print('Overhead regression {}'.format(item))
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)5s] [%(name)s]  %(message)s')
+    sys.exit(run(sys.argv[1:]))
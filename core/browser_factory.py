@@ -0,0 +1,174 @@
+"""
+Browser creation in one place for hooks and driver pool.
+"""
+from collections import namedtuple
+import ConfigParser
+import logging
+
+from selenium.webdriver import ChromeOptions, DesiredCapabilities, FirefoxProfile, Proxy
+from selenium.webdriver.firefox.firefox_binary import FirefoxBinary
+
+from core.fake_driver import FakeDriver
+from core.remote_driver import RemoteBrowser
+from utilities.config import Config
+
+Config.browser_types.setdefault('fake', FakeDriver)  # in-process browser on HTML fixtures, see core.fake_driver
+Config.browser_types.setdefault('remote', RemoteBrowser)  # Selenium Grid, see core.remote_driver
+
+
+class BrowserProfile(namedtuple('BrowserProfile', 'name headless page_load_strategy disable_images disable_fonts '
+                                                  'disable_extensions args window_size')):
+    """
+    Browser capabilities from [PROFILE:<name>] section of config.ini.
+    Missing section or option means visible 1920x1080 browser with default settings.
+    """
+    __slots__ = ()
+
+    SECTION = 'PROFILE:{}'
+    PAGE_LOAD_STRATEGIES = ('normal', 'eager', 'none')
+
+    @classmethod
+    def load(cls, name, config=Config.config):
+        """
+        :param name: str - profile name
+        :type config: ConfigParser.ConfigParser
+        :return: BrowserProfile
+        """
+        section = cls.SECTION.format(name)
+        if name != 'default' and not config.has_section(section):
+            raise ValueError('Unknown browser profile "{}", add section [{}] to config.ini'.format(name, section))
+
+        def option(key, default, getter=ConfigParser.ConfigParser.get):
+            if config.has_option(section, key):
+                return getter(config, section, key)
+            return default
+
+        page_load_strategy = option('PageLoadStrategy', 'normal').lower()
+        if page_load_strategy not in cls.PAGE_LOAD_STRATEGIES:
+            raise ValueError('Unknown page load strategy "{}" in [{}]'.format(page_load_strategy, section))
+
+        width, _, height = option('WindowSize', '1920x1080').lower().partition('x')
+
+        return cls(name=name,
+                   headless=option('Headless', False, ConfigParser.ConfigParser.getboolean),
+                   page_load_strategy=page_load_strategy,
+                   disable_images=option('DisableImages', False, ConfigParser.ConfigParser.getboolean),
+                   disable_fonts=option('DisableFonts', False, ConfigParser.ConfigParser.getboolean),
+                   disable_extensions=option('DisableExtensions', False, ConfigParser.ConfigParser.getboolean),
+                   args=option('Args', '').split(),
+                   window_size=(int(width), int(height)))
+
+
+def _chrome(profile):
+    options = ChromeOptions()
+    if profile.headless:
+        options.add_argument('--headless')
+        options.add_argument('--disable-gpu')
+    if profile.disable_images:
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    if profile.disable_fonts:
+        options.add_argument('--disable-remote-fonts')
+    if profile.disable_extensions:
+        options.add_argument('--disable-extensions')
+    options.add_argument('--window-size={},{}'.format(*profile.window_size))
+    for argument in profile.args:
+        options.add_argument(argument)
+
+    capabilities = DesiredCapabilities.CHROME.copy()
+    capabilities['pageLoadStrategy'] = profile.page_load_strategy
+    return dict(chrome_options=options, desired_capabilities=capabilities)
+
+
+def _firefox(profile):
+    """
+    Selenium 2.46 starts Firefox through its legacy extension (Firefox 47 and older), these versions have no
+    -headless switch, so Headless is ignored with warning: run such browser under Xvfb (xvfb-run behave ...).
+    """
+    if profile.headless:
+        logging.getLogger(BrowserFactory.__name__).warning(
+            'Headless is not supported by Firefox driven with selenium 2.46 (Firefox 47 and older), '
+            'starting visible browser - run it under Xvfb or use chrome/phantomjs')
+
+    firefox_profile = FirefoxProfile()
+    if profile.disable_images:
+        firefox_profile.set_preference('permissions.default.image', 2)
+    if profile.disable_fonts:
+        firefox_profile.set_preference('browser.display.use_document_fonts', 0)
+    if profile.disable_extensions:
+        firefox_profile.set_preference('extensions.enabledScopes', 0)
+
+    binary = None  # found by driver itself
+    if profile.args:
+        binary = FirefoxBinary()
+        binary.add_command_line_options(*profile.args)
+
+    capabilities = DesiredCapabilities.FIREFOX.copy()
+    capabilities['pageLoadStrategy'] = profile.page_load_strategy
+    return dict(firefox_profile=firefox_profile, firefox_binary=binary, capabilities=capabilities)
+
+
+def _phantomjs(profile):
+    service_args = list(profile.args)
+    if profile.disable_images:
+        service_args.append('--load-images=false')
+    capabilities = DesiredCapabilities.PHANTOMJS.copy()
+    return dict(service_args=service_args, desired_capabilities=capabilities)  # always headless
+
+
+def _ie(profile):
+    capabilities = DesiredCapabilities.INTERNETEXPLORER.copy()
+    capabilities['pageLoadStrategy'] = profile.page_load_strategy
+    return dict(capabilities=capabilities)
+
+
+def _remote(profile):
+    """
+    Capabilities of Config.REMOTE_BROWSER built like for local browser plus Config.REMOTE_CAPABILITIES.
+    Firefox binary arguments (Args) are not applied, binary is chosen by node.
+    """
+    browser = Config.REMOTE_BROWSER
+    if browser == 'firefox':
+        profile = profile._replace(headless=False, args=[])
+    capabilities = getattr(DesiredCapabilities, browser.upper(), {'browserName': browser}).copy()
+    make_options = BrowserFactory.options.get(browser)
+    kwargs = make_options(profile) if make_options is not None and browser != 'remote' else {}
+    capabilities.update(kwargs.get('desired_capabilities', kwargs.get('capabilities', {})))
+    if 'chrome_options' in kwargs:
+        capabilities.update(kwargs['chrome_options'].to_capabilities())
+        capabilities['pageLoadStrategy'] = profile.page_load_strategy
+
+    for item in Config.REMOTE_CAPABILITIES.split(','):
+        name, _, value = item.partition('=')
+        if name.strip():
+            capabilities[name.strip()] = value.strip()
+    return dict(desired_capabilities=capabilities, browser_profile=kwargs.get('firefox_profile'))
+
+
+class BrowserFactory(object):
+    """
+    Creates browsers configured by Config and browser profile.
+    """
+    # browser type -> function making constructor keyword arguments from BrowserProfile
+    options = dict(chrome=_chrome, firefox=_firefox, phantomjs=_phantomjs, ie=_ie, remote=_remote)
+
+    @staticmethod
+    def create():
+        """
+        Start new browser of Config.BROWSER type with Config.BROWSER_PROFILE capabilities,
+        routed through Config.PROXY_ADDRESS if it is set.
+        :return: selenium.webdriver.*
+        """
+        profile = BrowserProfile.load(Config.BROWSER_PROFILE)
+        make_options = BrowserFactory.options.get(Config.BROWSER)
+        kwargs = make_options(profile) if make_options is not None else {}
+        if Config.PROXY_ADDRESS:  # started by before_all, see core.http_proxy
+            capabilities = kwargs.get('desired_capabilities', kwargs.get('capabilities'))
+            if capabilities is not None:
+                Proxy({'proxyType': 'MANUAL', 'httpProxy': Config.PROXY_ADDRESS,
+                       'sslProxy': Config.PROXY_ADDRESS}).add_to_capabilities(capabilities)
+        logging.getLogger(BrowserFactory.__name__).debug('Starting %s with %s', Config.BROWSER, profile)
+
+        # use in constructor service_args=['--webdriver-logfile=path_to_log'] to debug deeper...
+        browser = Config.browser_types[Config.BROWSER](**kwargs)
+        browser.set_window_size(*profile.window_size)
+        return browser
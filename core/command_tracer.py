@@ -0,0 +1,176 @@
+"""
+Tracer of WebDriver wire commands.
+Wraps execute() of browser instance, so every remote command (including WebElement ones) is recorded with
+its latency, payload size and page object method which caused it. Commands are rolled up per step and scenario:
+number of round trips and split of step time between driver and python.
+"""
+import json
+import os
+import sys
+import time
+
+
+class CommandTracer(object):
+    """
+    Usage:
+        tracer = CommandTracer()
+        tracer.install(browser)
+        tracer.start_scenario(); tracer.start_step('step'); ...; tracer.end_step(); tracer.scenario_report()
+        tracer.uninstall()
+        tracer.write_report('trace.json')
+    """
+    def __init__(self):
+        self.browser = None
+        self.page_methods = {}  # page method -> [round trips, driver time] for the whole life of tracer
+        self._execute = None
+        self._step = None
+        self._steps = []
+        self._commands = []  # commands of finished steps of scenario
+
+    def install(self, browser):
+        """
+        Start tracing commands of browser. Tracing of previous browser is stopped.
+        :type browser: selenium.webdriver.remote.webdriver.WebDriver
+        """
+        if browser is self.browser:
+            return
+        self.uninstall()
+        self.browser = browser
+        self._execute = browser.execute
+        browser.execute = self._traced_execute
+
+    def uninstall(self):
+        """
+        Stop tracing, browser gets its own execute() back.
+        """
+        if self.browser is not None:
+            del self.browser.execute
+            self.browser = None
+            self._execute = None
+
+    def start_scenario(self):
+        self._steps = []
+        self._commands = []
+
+    def start_step(self, name):
+        self._step = {'name': name, 'started': time.time(), 'commands': []}
+
+    def end_step(self):
+        """
+        Finish current step.
+        :return: dict - step summary, see _summary()
+        """
+        if self._step is None:
+            return None
+        step = self._summary(self._step['name'], self._step['commands'], time.time() - self._step['started'])
+        self._steps.append(step)
+        self._commands.extend(self._step['commands'])
+        self._step = None
+        return step
+
+    def scenario_report(self):
+        """
+        Human readable report of scenario: round trips and driver/python time per step, chattiest page methods.
+        :return: str
+        """
+        lines = ['{:>6} {:>9} {:>9} {:>9}  step'.format('trips', 'wall, s', 'driver, s', 'python, s')]
+        for step in self._steps:
+            lines.append('{round_trips:>6} {wall:>9.3f} {driver:>9.3f} {python:>9.3f}  {name}'.format(**step))
+
+        scenario = self._summary('scenario', self._commands, sum(step['wall'] for step in self._steps))
+        lines.append('{round_trips:>6} {wall:>9.3f} {driver:>9.3f} {python:>9.3f}  total in steps'.format(**scenario))
+
+        lines.append('')
+        lines.append('Round trips by page method:')
+        for method, (count, driver) in sorted(scenario['page_methods'].items(), key=lambda item: -item[1][0]):
+            lines.append('{:>6} {:>9.3f}  {}'.format(count, driver, method))
+
+        lines.append('')
+        lines.append('Round trips by command:')
+        for command, (count, driver) in sorted(scenario['commands'].items(), key=lambda item: -item[1][0]):
+            lines.append('{:>6} {:>9.3f}  {}'.format(count, driver, command))
+        return '\n'.join(lines)
+
+    def write_report(self, path):
+        """
+        Write round trips and driver time per page method for the whole life of tracer.
+        :param path: str - JSON file path
+        """
+        methods = [{'page_method': method, 'round_trips': count, 'driver_time': round(driver, 4)}
+                   for method, (count, driver) in self.page_methods.items()]
+        with open(path, 'w') as _file:
+            json.dump(sorted(methods, key=lambda item: -item['round_trips']), _file, indent=2)
+
+    def _traced_execute(self, command, params=None):
+        started = time.time()
+        response = None
+        try:
+            response = self._execute(command, params)
+            return response
+        finally:  # commands outside of steps (hooks) are counted only per page method
+            elapsed = time.time() - started
+            record = {
+                'command': command,
+                'latency': elapsed,
+                'sent': self._size(params),
+                'received': self._size(response.get('value') if isinstance(response, dict) else response),
+                'page_method': self._page_method(),
+            }
+            if self._step is not None:
+                self._step['commands'].append(record)
+
+            totals = self.page_methods.setdefault(record['page_method'], [0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed
+
+    @staticmethod
+    def _size(payload):
+        if payload is None:
+            return 0
+        try:
+            return len(json.dumps(payload))
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _page_method():
+        """
+        Find method of page object (pages package) or BasePage which issued current command.
+        :return: str - module.function or '-' if command was not issued by page object
+        """
+        frame = sys._getframe(2)
+        base_page = None
+        while frame is not None:
+            path = frame.f_code.co_filename
+            if '{0}pages{0}'.format(os.sep) in path:
+                return '{}.{}'.format(os.path.splitext(os.path.basename(path))[0], frame.f_code.co_name)
+            if base_page is None and path.endswith('base_page.py'):
+                base_page = 'base_page.{}'.format(frame.f_code.co_name)
+            frame = frame.f_back
+        return base_page or '-'
+
+    @staticmethod
+    def _summary(name, commands, wall):
+        """
+        :return: dict with keys: name, round_trips, wall, driver, python, sent, received,
+                 commands {command: [count, driver time]}, page_methods {method: [count, driver time]}
+        """
+        driver = sum(record['latency'] for record in commands)
+        by_command = {}
+        by_method = {}
+        for record in commands:
+            for key, totals in ((record['command'], by_command), (record['page_method'], by_method)):
+                item = totals.setdefault(key, [0, 0.0])
+                item[0] += 1
+                item[1] += record['latency']
+        return {
+            'name': name,
+            'round_trips': len(commands),
+            'wall': wall,
+            'driver': driver,
+            'python': max(wall - driver, 0.0),
+            'sent': sum(record['sent'] for record in commands),
+            'received': sum(record['received'] for record in commands),
+            'commands': by_command,
+            'page_methods': by_method,
+        }
@@ -5,6 +5,9 @@ Created on September 18, 2015
 """
 from functools import wraps
 import logging
+import time
+
+from utilities.locator import Locator
 
 
 def log_exception(message, logger=None):
@@ -27,3 +30,49 @@ def log_exception(message, logger=None):
                 raise
         return wrapper
     return decorator
+
+
+def measure_action(func):
+    """
+    Decorator for BasePage actions: records locator (first argument), wait time and driver call time
+    to page stats collector (core.locator_stats). Wait time is accumulated by _get_element.
+    List of locators is recorded as one entry, action without arguments - under NO_LOCATOR.
+    Nested actions are recorded as a part of outer one.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.stats is None or self._measuring:
+            return func(self, *args, **kwargs)
+
+        self._measuring = True
+        self._wait_time = 0.0
+        self._wait_condition = None
+        self._wait_timeout = None
+        failed = True
+        started = time.time()
+        try:
+            result = func(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self._measuring = False
+            call_time = max(time.time() - started - self._wait_time, 0.0)
+            self.stats.record(_stats_locator(args), func.__name__, self._wait_condition, self._wait_time,
+                              call_time, self._wait_timeout, failed)
+    return wrapper
+
+
+NO_LOCATOR = '(no locator)'
+
+
+def _stats_locator(args):
+    """
+    :param args: tuple - action arguments without self
+    :return: locator to record action under
+    """
+    if not args:
+        return NO_LOCATOR
+    locator = args[0]
+    if isinstance(locator, (list, tuple)) and not isinstance(locator, Locator):
+        return ' | '.join(str(Locator.parse(item)) for item in locator)
+    return locator
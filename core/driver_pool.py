@@ -0,0 +1,194 @@
+"""
+Pool of started browsers.
+Browser start is the most expensive part of scenario setup, so browsers are started in background threads
+and reused between scenarios. Returned browser is cleaned (cookies, storages, extra windows) before next use,
+browser which failed cleaning is closed and replaced with new one.
+"""
+import logging
+import Queue
+import threading
+
+from core import scripts
+
+
+class DriverPool(object):
+    """
+    Thread safe pool of browsers.
+    Usage:
+        pool = DriverPool(BrowserFactory.create, size=2, prewarm=1)
+        pool.start()
+        browser = pool.checkout()
+        ...
+        pool.checkin(browser)
+        pool.close()
+    """
+    def __init__(self, factory, size, prewarm=0, timeout=None):
+        """
+        :param factory: callable without arguments returning new browser
+        :param size: int - max number of browsers started by pool
+        :param prewarm: int - number of browsers started by start()
+        :param timeout: int - seconds to wait for free browser when all of them are busy, None - forever
+        """
+        self.factory = factory
+        self.size = size
+        self.prewarm = min(prewarm, size)
+        self.timeout = timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._idle = Queue.Queue()
+        self._lock = threading.Lock()
+        self._drivers = set()  # all alive browsers: idle and checked out
+        self._pending = 0  # browsers being started right now
+        self._closed = False
+
+    def start(self):
+        """
+        Start prewarm number of browsers in background.
+        """
+        self.logger.info('Starting driver pool. Size: %s, prewarm: %s', self.size, self.prewarm)
+        for _ in range(self.prewarm):
+            self._fill_async()
+
+    def checkout(self):
+        """
+        Get ready to use browser.
+        Takes idle one, otherwise starts new one if pool is not full, otherwise waits for returned one.
+        Free slot is refilled in background, so next scenario gets warm browser.
+        :return: selenium.webdriver.*
+        """
+        try:
+            driver = self._idle.get_nowait()
+        except Queue.Empty:
+            driver = self._create() if self._reserve() else self._wait()
+
+        self._fill_async()
+        return driver
+
+    def checkin(self, driver):
+        """
+        Return browser to the pool. Browser is cleaned in background.
+        :type driver: selenium.webdriver.*
+        """
+        thread = threading.Thread(target=self._recycle, args=(driver,), name='DriverPoolRecycle')
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        """
+        Quit all browsers started by pool, including checked out ones.
+        """
+        with self._lock:
+            self._closed = True
+            drivers = list(self._drivers)
+            self._drivers.clear()
+
+        for driver in drivers:
+            self._quit(driver)
+        self.logger.info('Driver pool closed. Browsers quit: %s', len(drivers))
+
+    @staticmethod
+    def reset(driver):
+        """
+        Bring browser to the state of just started one: single window, no cookies and storages, blank page.
+        :type driver: selenium.webdriver.*
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.switch_to.default_content()
+
+        driver.delete_all_cookies()
+        driver.execute_script(scripts.CLEAR_STORAGE)
+        driver.get('about:blank')
+
+    def _reserve(self):
+        """
+        Take slot for new browser if pool is not full.
+        :return: boolean - True if browser can be started
+        """
+        with self._lock:
+            if self._closed or len(self._drivers) + self._pending >= self.size:
+                return False
+            self._pending += 1
+            return True
+
+    def _create(self):
+        """
+        Start browser in reserved slot.
+        :return: selenium.webdriver.*
+        """
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        with self._lock:
+            self._pending -= 1
+            self._drivers.add(driver)
+        return driver
+
+    def _wait(self):
+        """
+        Wait for browser returned to the pool.
+        :return: selenium.webdriver.*
+        """
+        self.logger.debug('All %s browsers are busy. Waiting for free one', self.size)
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except Queue.Empty:
+            self.logger.error('No free browser in pool after %s seconds', self.timeout)
+            raise
+
+    def _fill_async(self):
+        """
+        Start one more browser in background if pool is not full.
+        """
+        if not self._reserve():
+            return
+        thread = threading.Thread(target=self._fill, name='DriverPoolFill')
+        thread.daemon = True
+        thread.start()
+
+    def _fill(self):
+        try:
+            driver = self._create()
+        except Exception:
+            self.logger.exception('Failed to start browser for pool')
+            return
+        self._release(driver)
+
+    def _recycle(self, driver):
+        try:
+            self.reset(driver)
+        except Exception:
+            self.logger.warning('Failed to reset browser, replacing it with new one', exc_info=True)
+            self._discard(driver)
+            self._fill_async()
+            return
+        self._release(driver)
+
+    def _release(self, driver):
+        """
+        Put browser to idle queue or quit it if pool was closed meanwhile.
+        """
+        with self._lock:
+            closed = self._closed
+        if closed:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._drivers.discard(driver)
+        self._quit(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            self.logger.warning('Failed to quit browser', exc_info=True)
@@ -0,0 +1,459 @@
+"""
+In-process fake WebDriver for measuring framework overhead without real browser.
+Pages are static HTML fixtures parsed with lxml, url http://host/path is served from <site>/host/path.html
+or <site>/host/path/index.html (query is ignored). Links are followed on click, forms are submitted
+by submit button click or ENTER key as GET requests.
+Implemented subset of WebDriver is the one used by BasePage, DriverPool and hooks, framework scripts
+(core.scripts) are emulated in Python, other scripts are not supported.
+Time spent inside driver is accumulated in busy_time, so caller can subtract it from measured action time.
+"""
+from functools import wraps
+import hashlib
+import itertools
+import os
+import re
+import time
+import urllib
+import urlparse
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # optional, needed only for fake browser
+    lxml = etree = None
+
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, \
+    NoSuchFrameException, StaleElementReferenceException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+
+from core import scripts
+from utilities.config import Config
+
+# 1x1 transparent PNG
+BLANK_PNG = ('\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4'
+             '\x89\x00\x00\x00\rIDATx\x9cc\xf8\xff\xff?\x03\x00\x08\xfc\x02\xfe\xa7\x9a\xa0\xa0\x00\x00\x00\x00IEND'
+             '\xaeB`\x82')
+BLANK_PAGE = '<html><head><title></title></head><body></body></html>'
+ELEMENT_PROPERTY = re.compile(r'^\s*return\s+arguments\[0\]\.(\w+)\s*;?\s*$')
+
+
+def _driver_call(func):
+    """
+    Adds time spent in method to driver busy_time. Nested calls are counted once.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        driver = self if isinstance(self, FakeDriver) else self.parent
+        if driver._busy:
+            return func(self, *args, **kwargs)
+        driver._busy = True
+        started = time.time()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            driver.busy_time += time.time() - started
+            driver.calls += 1
+            driver._busy = False
+    return wrapper
+
+
+def _find(root, by, value):
+    """
+    :param root: lxml element to search in
+    :param by: str - selenium strategy
+    :param value: str - locator value
+    :return: list of lxml elements
+    """
+    if by == By.XPATH:
+        try:
+            return [node for node in root.xpath(value) if isinstance(node, etree.ElementBase)]
+        except etree.XPathError as e:
+            raise InvalidSelectorException('Invalid xpath {}: {}'.format(value, e))
+    if by == By.CSS_SELECTOR:
+        try:
+            return root.cssselect(value)
+        except ImportError:
+            raise WebDriverException('Install cssselect to use css locators with fake browser')
+    if by == By.ID:
+        return root.xpath('.//*[@id=$value]', value=value)
+    if by == By.NAME:
+        return root.xpath('.//*[@name=$value]', value=value)
+    if by == By.TAG_NAME:
+        return root.xpath('.//*[local-name()=$value]', value=value)
+    if by == By.CLASS_NAME:
+        return root.xpath('.//*[contains(concat(" ", normalize-space(@class), " "), $value)]',
+                          value=' {} '.format(value))
+    if by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+        links = root.xpath('.//a')
+        if by == By.LINK_TEXT:
+            return [link for link in links if link.text_content().strip() == value]
+        return [link for link in links if value in link.text_content()]
+    raise InvalidSelectorException('Unsupported locator strategy: {}'.format(by))
+
+
+def _is_displayed(node):
+    for item in itertools.chain([node], node.iterancestors()):
+        style = re.sub(r'\s+', '', (item.get('style') or '').lower())
+        if item.get('hidden') is not None or 'display:none' in style or 'visibility:hidden' in style:
+            return False
+        if item.tag in ('head', 'script', 'style', 'title') or \
+                (item.tag == 'input' and (item.get('type') or '').lower() == 'hidden'):
+            return False
+    return True
+
+
+class FakeElement(WebElement):
+    """
+    WebElement of fake browser. WebElement methods which are not overridden send commands to
+    FakeDriver.execute, which supports only mouse and keyboard ones.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, parent, node, document):
+        """
+        :type parent: FakeDriver
+        :param node: lxml element
+        :param document: lxml document element belongs to, element is stale when it is not shown anymore
+        """
+        WebElement.__init__(self, parent, 'fake-{}'.format(next(self._ids)))
+        self.node = node
+        self.document = document
+
+    def __eq__(self, other):
+        return isinstance(other, FakeElement) and self.node is other.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.node)
+
+    def _check(self):
+        if self.document is not self.parent._document:
+            raise StaleElementReferenceException('Element is not attached to the page document')
+
+    @property
+    @_driver_call
+    def tag_name(self):
+        self._check()
+        return self.node.tag
+
+    @property
+    @_driver_call
+    def text(self):
+        self._check()
+        if not _is_displayed(self.node):
+            return ''
+        return re.sub(r'\s+', ' ', self.node.text_content()).strip()
+
+    @_driver_call
+    def get_attribute(self, name):
+        self._check()
+        if name in ('checked', 'selected', 'disabled'):
+            return 'true' if self.node.get(name) is not None else None
+        return self.node.get(name)
+
+    @_driver_call
+    def is_displayed(self):
+        self._check()
+        return _is_displayed(self.node)
+
+    @_driver_call
+    def is_enabled(self):
+        self._check()
+        return self.node.get('disabled') is None
+
+    @_driver_call
+    def is_selected(self):
+        self._check()
+        return self.node.get('checked') is not None or self.node.get('selected') is not None
+
+    @_driver_call
+    def clear(self):
+        self._check()
+        self.node.set('value', '')
+
+    @_driver_call
+    def send_keys(self, *values):
+        self._check()
+        text = ''.join(values)
+        submit = Keys.ENTER in text or Keys.RETURN in text
+        text = text.replace(Keys.ENTER, '').replace(Keys.RETURN, '')
+        self.node.set('value', (self.node.get('value') or '') + text)
+        if submit:
+            self.parent._submit(self.node)
+
+    @_driver_call
+    def click(self):
+        self._check()
+        node_type = (self.node.get('type') or '').lower()
+        if self.node.tag == 'a' and self.node.get('href'):
+            self.parent.get(urlparse.urljoin(self.parent.current_url, self.node.get('href')))
+        elif node_type in ('checkbox', 'radio'):
+            if self.node.get('checked') is None:
+                self.node.set('checked', 'checked')
+            elif node_type == 'checkbox':
+                del self.node.attrib['checked']
+        elif node_type == 'submit' or (self.node.tag == 'button' and node_type in ('', 'submit')):
+            self.parent._submit(self.node)
+
+    def submit(self):
+        self.parent._submit(self.node)
+
+    @_driver_call
+    def find_element(self, by=By.ID, value=None):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException('Unable to locate element: {}={}'.format(by, value))
+        return elements[0]
+
+    @_driver_call
+    def find_elements(self, by=By.ID, value=None):
+        self._check()
+        return [FakeElement(self.parent, node, self.document) for node in _find(self.node, by, value)]
+
+
+class _SwitchTo(object):
+    def __init__(self, driver):
+        self._driver = driver
+
+    @_driver_call
+    def frame(self, frame_reference):
+        driver = self._driver
+        if isinstance(frame_reference, FakeElement):
+            node = frame_reference.node
+        else:
+            frames = driver._document.xpath('//iframe|//frame')
+            if isinstance(frame_reference, int):
+                node = frames[frame_reference] if frame_reference < len(frames) else None
+            else:
+                node = next((item for item in frames if frame_reference in (item.get('id'), item.get('name'))), None)
+        if node is None or node.get('src') is None:
+            raise NoSuchFrameException('Unable to locate frame: {}'.format(frame_reference))
+        driver._frames.append(driver._load(urlparse.urljoin(driver.current_url, node.get('src'))))
+
+    @_driver_call
+    def default_content(self):
+        del self._driver._frames[1:]
+
+    @_driver_call
+    def window(self, window_name):
+        if window_name not in self._driver.window_handles:
+            raise WebDriverException('Unknown window: {}'.format(window_name))
+
+    @property
+    def parent(self):
+        return self._driver
+
+
+class FakeDriver(object):
+    """
+    WebDriver subset working on static HTML fixtures. Registered in Config.browser_types as 'fake'.
+    """
+    WINDOW = 'fake-window'
+
+    def __init__(self, site_dir=None):
+        """
+        :param site_dir: str - folder with HTML fixtures, Config.FAKE_SITE_DIR by default
+        """
+        if lxml is None:
+            raise WebDriverException('Install lxml to use fake browser')
+
+        self.site_dir = site_dir or Config.FAKE_SITE_DIR
+        self.switch_to = _SwitchTo(self)
+        self.busy_time = 0.0
+        self.calls = 0
+        self._busy = False
+        self._frames = [('about:blank', lxml.html.document_fromstring(BLANK_PAGE))]  # top document and frames
+        self._cookies = {}
+        self._storage = {'local': {}, 'session': {}}  # one origin for all fixtures
+        self._history = []
+        self._scripts = {
+            scripts.CLEAR_STORAGE: self._clear_storage,
+            scripts.GET_STORAGE: lambda: dict((name, dict(items)) for name, items in self._storage.items()),
+            scripts.SET_STORAGE: self._set_storage,
+            scripts.DOM_FINGERPRINT: self._fingerprint,
+            scripts.GET_TEXTS: self._get_texts,
+            scripts.GET_ATTRIBUTES: self._get_attributes,
+            scripts.GET_STATES: self._get_states,
+            scripts.CHECK_ELEMENT: self._check_element,
+            scripts.HIGHLIGHT: lambda *args: None,
+        }
+
+    @property
+    def _document(self):
+        return self._frames[-1][1]
+
+    @property
+    def current_url(self):
+        return self._frames[0][0]
+
+    @property
+    def title(self):
+        titles = self._frames[0][1].xpath('//title')
+        return titles[0].text_content().strip() if titles else ''
+
+    @property
+    def page_source(self):
+        return lxml.html.tostring(self._document)
+
+    @property
+    def window_handles(self):
+        return [self.WINDOW]
+
+    @property
+    def current_window_handle(self):
+        return self.WINDOW
+
+    @_driver_call
+    def get(self, url):
+        self._history.append(self.current_url)
+        self._frames = [self._load(url)]
+
+    @_driver_call
+    def back(self):
+        if self._history:
+            self._frames = [self._load(self._history.pop())]
+
+    @_driver_call
+    def refresh(self):
+        self._frames = [self._load(self.current_url)]
+
+    @_driver_call
+    def find_element(self, by=By.ID, value=None):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException('Unable to locate element: {}={}'.format(by, value))
+        return elements[0]
+
+    @_driver_call
+    def find_elements(self, by=By.ID, value=None):
+        document = self._document
+        return [FakeElement(self, node, document) for node in _find(document, by, value)]
+
+    @_driver_call
+    def execute_script(self, script, *args):
+        if script in self._scripts:
+            return self._scripts[script](*args)
+
+        match = ELEMENT_PROPERTY.match(script)
+        if match and args and isinstance(args[0], FakeElement):
+            return args[0].get_attribute(match.group(1))
+        raise WebDriverException('Script is not supported by fake browser: {}'.format(script.strip()[:80]))
+
+    def execute_async_script(self, script, *args):
+        raise WebDriverException('Async scripts are not supported by fake browser')
+
+    def execute(self, driver_command, params=None):
+        """
+        Remote command entry point, used by ActionChains. Mouse and keyboard commands do nothing.
+        """
+        if driver_command in (Command.MOVE_TO, Command.CLICK, Command.MOUSE_DOWN, Command.MOUSE_UP,
+                              Command.SEND_KEYS_TO_ACTIVE_ELEMENT):
+            return {'value': None}
+        raise WebDriverException('Command is not supported by fake browser: {}'.format(driver_command))
+
+    @_driver_call
+    def get_screenshot_as_png(self):
+        return BLANK_PNG
+
+    @_driver_call
+    def save_screenshot(self, filename):
+        with open(filename, 'wb') as _file:
+            _file.write(BLANK_PNG)
+        return True
+
+    get_screenshot_as_file = save_screenshot
+
+    def add_cookie(self, cookie_dict):
+        self._cookies[cookie_dict['name']] = cookie_dict
+
+    def get_cookies(self):
+        return list(self._cookies.values())
+
+    def delete_all_cookies(self):
+        self._cookies.clear()
+
+    def set_window_size(self, width, height, windowHandle='current'):
+        pass
+
+    def maximize_window(self):
+        pass
+
+    def set_script_timeout(self, time_to_wait):
+        pass
+
+    def implicitly_wait(self, time_to_wait):
+        pass
+
+    def set_page_load_timeout(self, time_to_wait):
+        pass
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self._frames = []
+
+    def _load(self, url):
+        """
+        :param url: str
+        :return: tuple (url, lxml document)
+        """
+        if url.startswith('about:'):
+            return url, lxml.html.document_fromstring(BLANK_PAGE)
+
+        parts = urlparse.urlsplit(url)
+        path = os.path.join(self.site_dir, parts.netloc, *[part for part in parts.path.split('/') if part])
+        for candidate in (path + '.html', os.path.join(path, 'index.html')):
+            if os.path.isfile(candidate):
+                return url, lxml.html.parse(candidate).getroot()
+        raise WebDriverException('No fixture for {}, expected {}.html or {}/index.html'.format(url, path, path))
+
+    def _submit(self, node):
+        forms = [item for item in itertools.chain([node], node.iterancestors()) if item.tag == 'form']
+        if not forms:
+            return
+        form = forms[0]
+        fields = [(field.get('name'), field.get('value') or '') for field in form.xpath('.//input|.//textarea')
+                  if field.get('name') and ((field.get('type') or '').lower() not in ('checkbox', 'radio')
+                                            or field.get('checked') is not None)]
+        action = urlparse.urljoin(self.current_url, form.get('action') or '')
+        self.get('{}?{}'.format(action.split('?')[0], urllib.urlencode(fields)))
+
+    def _clear_storage(self):
+        for items in self._storage.values():
+            items.clear()
+
+    def _set_storage(self, local, session):
+        self._storage = {'local': dict(local), 'session': dict(session)}
+
+    def _fingerprint(self):
+        return '{}#{}'.format(self.current_url, hashlib.sha1(etree.tostring(self._document)).hexdigest())
+
+    def _get_texts(self, by, value):
+        return [FakeElement(self, node, self._document).text for node in _find(self._document, by, value)]
+
+    def _get_attributes(self, by, value, names):
+        return [dict((name, FakeElement(self, node, self._document).get_attribute(name)) for name in names)
+                for node in _find(self._document, by, value)]
+
+    @staticmethod
+    def _check_element(element, condition):
+        element._check()
+        if condition == 'present':
+            return True
+        return _is_displayed(element.node) and (condition == 'visible' or element.node.get('disabled') is None)
+
+    def _get_states(self, locators):
+        states = []
+        for by, value in locators:
+            nodes = _find(self._document, by, value)
+            states.append({'present': bool(nodes),
+                           'visible': bool(nodes) and _is_displayed(nodes[0]),
+                           'enabled': bool(nodes) and nodes[0].get('disabled') is None,
+                           'count': len(nodes)})
+        return states
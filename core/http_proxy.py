@@ -0,0 +1,302 @@
+"""
+Local record/replay HTTP proxy for hermetic runs.
+    record - requests go to network, responses are saved to archive folder
+    replay - responses are served from archive, network is not used, unknown request gets 404
+Archive folder has index.json (request key -> list of responses) and bodies/<sha1> files.
+Request key is method, url without ignored query parameters (sorted) and optionally body hash.
+HTTPS is recorded and replayed only with certificate and key for intercepting CONNECT tunnels (browser should
+trust it or ignore certificate errors), without them HTTPS is tunnelled as is in record mode and refused in replay.
+"""
+import BaseHTTPServer
+import hashlib
+import httplib
+import json
+import logging
+import os
+import select
+import socket
+import SocketServer
+import ssl
+import threading
+import urllib
+import urlparse
+import uuid
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+MODES = (OFF, RECORD, REPLAY)
+
+HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+                      'te', 'trailers', 'transfer-encoding', 'upgrade')
+
+
+class Archive(object):
+    """
+    Recorded responses on disk.
+    """
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, path):
+        """
+        :param path: str - archive folder
+        """
+        self.path = path
+        self.bodies_dir = os.path.join(path, 'bodies')
+        self.index = self._load()  # key -> list of {'status', 'reason', 'headers', 'body'}
+        self._replayed = {}  # key -> number of responses already served in this run
+        self._lock = threading.Lock()
+
+    def add(self, key, status, reason, headers, body):
+        """
+        :param key: str - request key
+        :param status: int - response status
+        :param reason: str - response reason phrase
+        :param headers: list of (name, value)
+        :param body: str - response body
+        """
+        digest = hashlib.sha1(body).hexdigest()
+        body_path = os.path.join(self.bodies_dir, digest)
+        if not os.path.exists(body_path):
+            temporary = '{}.{}.tmp'.format(body_path, uuid.uuid4().hex)
+            with open(temporary, 'wb') as _file:
+                _file.write(body)
+            os.rename(temporary, body_path)
+
+        with self._lock:
+            self.index.setdefault(key, []).append({'status': status, 'reason': reason,
+                                                   'headers': headers, 'body': digest})
+
+    def next(self, key):
+        """
+        Responses of the same request are served in recorded order, the last one is repeated.
+        :param key: str - request key
+        :return: tuple (status, reason, headers, body) or None if request was not recorded
+        """
+        with self._lock:
+            responses = self.index.get(key)
+            if not responses:
+                return None
+            number = self._replayed.get(key, 0)
+            self._replayed[key] = number + 1
+            response = responses[min(number, len(responses) - 1)]
+
+        with open(os.path.join(self.bodies_dir, response['body']), 'rb') as _file:
+            body = _file.read()
+        return response['status'], response['reason'], response['headers'], body
+
+    def save(self):
+        """
+        Write index, responses recorded by other processes meanwhile are kept.
+        """
+        with self._lock:
+            index = self._load()
+            for key, responses in self.index.items():
+                index[key] = responses
+            self.index = index
+
+            temporary = os.path.join(self.path, '{}.{}.tmp'.format(self.INDEX_FILE, uuid.uuid4().hex))
+            with open(temporary, 'w') as _file:
+                json.dump(index, _file, indent=1, sort_keys=True)
+            index_path = os.path.join(self.path, self.INDEX_FILE)
+            if os.name == 'nt' and os.path.exists(index_path):  # rename does not overwrite on windows
+                os.remove(index_path)
+            os.rename(temporary, index_path)
+
+    def _load(self):
+        if not os.path.exists(self.bodies_dir):
+            os.makedirs(self.bodies_dir)
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path) as _file:
+            return json.load(_file)
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address):
+        logging.getLogger(HttpProxy.__name__).debug('Proxy connection error', exc_info=True)
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Handles browser requests for HttpProxy (available as self.server.proxy).
+    """
+    protocol_version = 'HTTP/1.1'
+    tunnel_host = None  # host:port of intercepted CONNECT tunnel, requests inside have path only
+
+    def do_CONNECT(self):
+        proxy = self.server.proxy
+        if proxy.certfile:
+            self.send_response(200, 'Connection established')
+            self.end_headers()
+            self.wfile.flush()
+            self.connection = ssl.wrap_socket(self.connection, server_side=True,
+                                              certfile=proxy.certfile, keyfile=proxy.keyfile)
+            self.rfile = self.connection.makefile('rb', self.rbufsize)
+            self.wfile = self.connection.makefile('wb', self.wbufsize)
+            self.tunnel_host = self.path
+            self.close_connection = 0
+        elif proxy.mode == RECORD:
+            self._tunnel()
+        else:
+            proxy.logger.warning('HTTPS is not replayed without [PROXY] CertFile: %s', self.path)
+            self.send_error(502, 'HTTPS is not replayed without certificate')
+
+    def do_GET(self):
+        proxy = self.server.proxy
+        url = self.path if self.tunnel_host is None else 'https://{}{}'.format(self.tunnel_host, self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else ''
+        key = proxy.request_key(self.command, url, body)
+
+        if proxy.mode == REPLAY:
+            response = proxy.archive.next(key)
+            if response is None:
+                proxy.misses += 1
+                proxy.logger.warning('Request is not recorded: %s', key)
+                self._respond(404, 'Not Recorded', [('Content-Type', 'text/plain')], 'Not recorded: ' + key)
+                return
+            self._respond(*response)
+            return
+
+        status, reason, headers, body = self._forward(url, body)
+        headers = [(name, value) for name, value in headers if name.lower() not in proxy.strip_headers]
+        proxy.archive.add(key, status, reason, headers, body)
+        self._respond(status, reason, headers, body)
+
+    do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = do_GET
+
+    def _forward(self, url, body):
+        parts = urlparse.urlsplit(url)
+        connection_class = httplib.HTTPSConnection if parts.scheme == 'https' else httplib.HTTPConnection
+        connection = connection_class(parts.netloc, timeout=self.server.proxy.timeout)
+        headers = dict((name, value) for name, value in self.headers.items()
+                       if name.lower() not in HOP_BY_HOP_HEADERS)
+        try:
+            connection.request(self.command, urlparse.urlunsplit(('', '', parts.path or '/', parts.query, '')),
+                               body or None, headers)
+            response = connection.getresponse()
+            return response.status, response.reason, response.getheaders(), response.read()
+        finally:
+            connection.close()
+
+    def _respond(self, status, reason, headers, body):
+        self.send_response(status, reason)
+        for name, value in headers:
+            if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'content-length':
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _tunnel(self):
+        host, _, port = self.path.partition(':')
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=self.server.proxy.timeout)
+        except socket.error:
+            self.send_error(502, 'Cannot connect to {}'.format(self.path))
+            return
+
+        self.send_response(200, 'Connection established')
+        self.end_headers()
+        self.wfile.flush()
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, failed = select.select(sockets, [], sockets, self.server.proxy.timeout)
+                if failed or not readable:
+                    break
+                for source in readable:
+                    data = source.recv(65536)
+                    if not data:
+                        return
+                    (upstream if source is self.connection else self.connection).sendall(data)
+        finally:
+            upstream.close()
+            self.close_connection = 1
+
+    def log_message(self, message, *args):
+        self.server.proxy.logger.debug(message, *args)
+
+
+class HttpProxy(object):
+    """
+    Proxy server in background thread. Browser is routed through it by BrowserFactory.
+    """
+    def __init__(self, mode, archive_path, port=0, match_body=False, ignore_params=(), strip_headers=(),
+                 certfile=None, keyfile=None, timeout=60):
+        """
+        :param mode: str - RECORD or REPLAY
+        :param archive_path: str - archive folder
+        :param port: int - local port, 0 - any free one
+        :param match_body: boolean - request body is part of request key
+        :param ignore_params: list of query parameters not used for matching (cache busters, timestamps)
+        :param strip_headers: list of response headers not saved to archive (Date, Set-Cookie, ...)
+        :param certfile: str - certificate for intercepting HTTPS
+        :param keyfile: str - private key of certificate, if not included in certfile
+        :param timeout: int - seconds to wait for network
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError('Unknown proxy mode: {}'.format(mode))
+
+        self.mode = mode
+        self.archive = Archive(archive_path)
+        self.match_body = match_body
+        self.ignore_params = set(ignore_params)
+        self.strip_headers = set(header.lower() for header in strip_headers)
+        self.certfile = certfile or None
+        self.keyfile = keyfile or None
+        self.timeout = timeout
+        self.misses = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.proxy = self
+        self._thread = None
+
+    @property
+    def address(self):
+        """
+        :return: str - host:port for browser proxy settings
+        """
+        return '{}:{}'.format(*self._server.server_address)
+
+    def request_key(self, method, url, body=''):
+        """
+        :param method: str - HTTP method
+        :param url: str - absolute url
+        :param body: str - request body
+        :return: str - key for matching recorded responses
+        """
+        parts = urlparse.urlsplit(url)
+        params = sorted((name, value) for name, value in urlparse.parse_qsl(parts.query, keep_blank_values=True)
+                        if name not in self.ignore_params)
+        key = '{} {}://{}{}'.format(method, parts.scheme, parts.netloc.lower(), parts.path or '/')
+        if params:
+            key += '?' + urllib.urlencode(params)
+        if self.match_body and body:
+            key += ' ' + hashlib.sha1(body).hexdigest()
+        return key
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='HttpProxy')
+        self._thread.daemon = True
+        self._thread.start()
+        self.logger.info('HTTP proxy in %s mode on %s, archive: %s', self.mode, self.address, self.archive.path)
+
+    def stop(self):
+        """
+        Stop server, in record mode save archive index.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if self.mode == RECORD:
+            self.archive.save()
+        if self.misses:
+            self.logger.warning('Requests not found in archive: %s', self.misses)
@@ -0,0 +1,181 @@
+"""
+Timing statistics of BasePage actions per locator.
+Every action records time spent waiting for element and time spent in the driver call itself.
+Run report is written to LOG_DIR as locator_stats.json and locator_stats.csv,
+scenario summary is attached to allure test case.
+"""
+import csv
+import json
+import os
+
+# upper bounds (seconds) of histogram buckets, last bucket is for everything slower
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+NEAR_TIMEOUT_RATIO = 0.5  # waits longer than this part of timeout are reported
+
+
+class _Timings(object):
+    """
+    Aggregated timings of one locator.
+    """
+    def __init__(self, locator):
+        self.locator = locator
+        self.actions = set()
+        self.conditions = set()
+        self.count = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.call_total = 0.0
+        self.call_max = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, action, condition, wait_time, call_time, failed):
+        self.actions.add(action)
+        if condition:
+            self.conditions.add(condition)
+        self.count += 1
+        self.failures += int(failed)
+        self.wait_total += wait_time
+        self.wait_max = max(self.wait_max, wait_time)
+        self.call_total += call_time
+        self.call_max = max(self.call_max, call_time)
+
+        total = wait_time + call_time
+        bucket = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if total <= bound:
+                bucket = i
+                break
+        self.histogram[bucket] += 1
+
+    @property
+    def total(self):
+        return self.wait_total + self.call_total
+
+    def as_dict(self):
+        return {
+            'locator': self.locator,
+            'actions': sorted(self.actions),
+            'conditions': sorted(self.conditions),
+            'count': self.count,
+            'failures': self.failures,
+            'total': round(self.total, 4),
+            'wait_total': round(self.wait_total, 4),
+            'wait_max': round(self.wait_max, 4),
+            'wait_avg': round(self.wait_total / self.count, 4),
+            'call_total': round(self.call_total, 4),
+            'call_max': round(self.call_max, 4),
+            'call_avg': round(self.call_total / self.count, 4),
+            'histogram': dict(zip(['<={}'.format(bound) for bound in BUCKETS] + ['>{}'.format(BUCKETS[-1])],
+                                  self.histogram)),
+        }
+
+
+class _Scope(object):
+    """
+    Timings of all locators plus waits which came close to timeout.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.near_timeout = []
+
+    def add(self, locator, action, condition, wait_time, call_time, timeout, failed):
+        timings = self.timings.get(locator)
+        if timings is None:
+            timings = self.timings[locator] = _Timings(locator)
+        timings.add(action, condition, wait_time, call_time, failed)
+
+        if timeout and wait_time >= timeout * NEAR_TIMEOUT_RATIO:
+            self.near_timeout.append({'locator': locator, 'action': action, 'condition': condition,
+                                      'wait': round(wait_time, 4), 'timeout': timeout,
+                                      'ratio': round(wait_time / timeout, 4), 'failed': failed})
+
+    def slowest(self, top=None):
+        """
+        :param top: int - number of locators, None - all
+        :return: list of dicts sorted by total time
+        """
+        timings = sorted(self.timings.values(), key=lambda item: item.total, reverse=True)
+        return [item.as_dict() for item in timings[:top]]
+
+    def closest_to_timeout(self, top=None):
+        """
+        :param top: int - number of waits, None - all
+        :return: list of dicts sorted by wait/timeout ratio
+        """
+        return sorted(self.near_timeout, key=lambda item: item['ratio'], reverse=True)[:top]
+
+
+class LocatorStats(object):
+    """
+    Collector of BasePage action timings for the whole run and for the current scenario.
+    """
+    def __init__(self):
+        self.run = _Scope()
+        self.scenario = _Scope()
+
+    def record(self, locator, action, condition, wait_time, call_time, timeout=None, failed=False):
+        """
+        Add timing of one action.
+        :param locator: web element locator, any object with meaningful str()
+        :param action: str - BasePage method name
+        :param condition: str - expected condition name, None if action did not wait
+        :param wait_time: float - seconds spent waiting for element
+        :param call_time: float - seconds spent in action itself (driver calls)
+        :param timeout: int - wait timeout in seconds
+        :param failed: boolean - action raised exception
+        """
+        locator = str(locator)
+        for scope in (self.run, self.scenario):
+            scope.add(locator, action, condition, wait_time, call_time, timeout, failed)
+
+    def start_scenario(self):
+        """
+        Forget timings of previous scenario.
+        """
+        self.scenario = _Scope()
+
+    def scenario_summary(self, top=10):
+        """
+        Human readable summary of the current scenario for report attachment.
+        :param top: int - number of locators in every list
+        :return: str
+        """
+        lines = ['Slowest locators (total = wait + driver call, seconds):']
+        for item in self.scenario.slowest(top):
+            lines.append('{total:>8.3f} = {wait_total:.3f} + {call_total:.3f}  x{count}  {locator}  {actions}'
+                         .format(**item))
+
+        near_timeout = self.scenario.closest_to_timeout(top)
+        if near_timeout:
+            lines.append('')
+            lines.append('Waits close to timeout:')
+            for item in near_timeout:
+                lines.append('{wait:>8.3f} of {timeout}s  {action}  {condition}  {locator}'.format(**item))
+        return '\n'.join(lines)
+
+    def write_report(self, directory):
+        """
+        Write run statistics to locator_stats.json and locator_stats.csv.
+        :param directory: str - folder for report files
+        :return: tuple of paths (json, csv)
+        """
+        json_path = os.path.join(directory, 'locator_stats.json')
+        with open(json_path, 'w') as _file:
+            json.dump({'locators': self.run.slowest(), 'near_timeout': self.run.closest_to_timeout()}, _file, indent=2)
+
+        csv_path = os.path.join(directory, 'locator_stats.csv')
+        columns = ['locator', 'count', 'failures', 'total', 'wait_total', 'wait_avg', 'wait_max',
+                   'call_total', 'call_avg', 'call_max', 'actions', 'conditions']
+        with open(csv_path, 'wb') as _file:
+            writer = csv.writer(_file)
+            writer.writerow(columns + ['histogram <= ' + ' '.join(str(bound) for bound in BUCKETS) + ' >'])
+            for item in self.run.slowest():
+                row = [item[column] for column in columns]
+                row[-2] = ' '.join(item['actions'])
+                row[-1] = ' '.join(item['conditions'])
+                writer.writerow(row + [' '.join(str(count) for count in self.run.timings[item['locator']].histogram)])
+        return json_path, csv_path
+
+
+collector = LocatorStats()
@@ -0,0 +1,110 @@
+"""
+Registry of page objects found in pages package.
+Every BasePage subclass becomes context attribute named in snake case (MainPage -> context.main_page)
+with locators from <definitions folder>/<ClassName>.def.csv.
+Page is created on first access and created again when context.browser is replaced.
+"""
+import importlib
+import inspect
+import logging
+import os
+import pkgutil
+import re
+
+from core.base_page import BasePage
+from utilities.config import Config
+
+
+def attribute_name(class_name):
+    """
+    :param class_name: str - for example MainPage
+    :return: str - for example main_page
+    """
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])', '_', class_name).lower()
+
+
+class LazyPage(object):
+    """
+    Stands for page object in context, passes all attribute access to page created for current context.browser.
+    """
+    def __init__(self, context, page_class, locators_path):
+        """
+        :type context: behave.runner.Context
+        :param page_class: BasePage subclass
+        :param locators_path: str - path to *.def.csv file with locators of page
+        """
+        self.__dict__['_context'] = context
+        self.__dict__['_page_class'] = page_class
+        self.__dict__['_locators_path'] = locators_path
+        self.__dict__['_page'] = None
+
+    def page(self):
+        """
+        :return: BasePage - page object bound to current context.browser
+        """
+        browser = self._context.browser
+        if self._page is None or self._page.browser is not browser:
+            self.__dict__['_page'] = self._page_class(self._locators_path, browser)
+        return self._page
+
+    def __getattr__(self, name):
+        return getattr(self.page(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.page(), name, value)
+
+    def __repr__(self):
+        return '<LazyPage {} ({})>'.format(self._page_class.__name__, 'created' if self._page else 'not created')
+
+
+class PageRegistry(object):
+    """
+    Page classes found in package, see discover().
+    """
+    def __init__(self, package='pages', definitions_dir=None):
+        """
+        :param package: str - package with page modules
+        :param definitions_dir: str - folder with *.def.csv files, Config.DEFINITIONS_DIR by default
+        """
+        self.package = package
+        self.definitions_dir = definitions_dir or Config.DEFINITIONS_DIR
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pages = {}  # attribute name -> page class
+
+    def discover(self):
+        """
+        Import all modules of package and collect BasePage subclasses defined there.
+        :return: PageRegistry - self
+        """
+        package = importlib.import_module(self.package)
+        for _, module_name, _ in pkgutil.iter_modules(package.__path__):
+            module = importlib.import_module('{}.{}'.format(self.package, module_name))
+            for _, page_class in inspect.getmembers(module, inspect.isclass):
+                if issubclass(page_class, BasePage) and page_class.__module__ == module.__name__:
+                    self.register(page_class)
+        return self
+
+    def register(self, page_class, name=None):
+        """
+        :param page_class: BasePage subclass with (locators_path, browser) constructor
+        :param name: str - context attribute name, snake case class name by default
+        """
+        name = name or attribute_name(page_class.__name__)
+        if name in self.pages and self.pages[name] is not page_class:
+            raise ValueError('Pages {} and {} have the same name: {}'.format(self.pages[name], page_class, name))
+        self.pages[name] = page_class
+
+    def locators_path(self, page_class):
+        """
+        :return: str - definitions file of page by convention <definitions folder>/<ClassName>.def.csv
+        """
+        return os.path.join(self.definitions_dir, '{}.def.csv'.format(page_class.__name__))
+
+    def bind(self, context):
+        """
+        Place lazy pages to context. Call in before_all, pages live for the whole run and follow context.browser.
+        :type context: behave.runner.Context
+        """
+        for name, page_class in sorted(self.pages.items()):
+            setattr(context, name, LazyPage(context, page_class, self.locators_path(page_class)))
+            self.logger.debug('Page %s is available as context.%s', page_class.__name__, name)
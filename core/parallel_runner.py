@@ -0,0 +1,245 @@
+"""
+Parallel execution mode.
+Splits scenarios of given features between worker processes. Every worker is a separate behave run
+with own browser, own LOG_DIR subtree (logs/worker_N) and own allure report directory.
+Hooks from tests/environment.py are used as is, worker number is passed to them as -D worker=N.
+When all workers are finished their allure results, logs and scenario durations are merged into LOG_DIR.
+
+Usage (from project root):
+    python -m core.parallel_runner -D workers=4 tests/features [other behave options]
+"""
+from datetime import datetime
+import heapq
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from behave.parser import parse_file
+
+from core.sharding import DurationHistory, HISTORY_FILE
+from utilities.config import Config
+
+DEFAULT_FEATURES = 'tests/features'
+LOG_RECORD_START = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}')
+
+logger = logging.getLogger(__name__)
+
+
+def worker_log_dir(log_dir, worker):
+    """
+    Folder for logs, screenshots and allure results of one worker.
+    :param log_dir: str - root log folder
+    :param worker: worker number
+    :return: str - path to worker folder
+    """
+    return os.path.join(log_dir, 'worker_{}'.format(worker))
+
+
+def split_arguments(args):
+    """
+    Split behave command line into number of workers, feature paths and remaining behave options.
+    -D workers=N is consumed here and not passed to workers.
+    :param args: list of command line arguments
+    :return: tuple (workers, paths, options)
+    """
+    workers = multiprocessing.cpu_count()
+    paths = []
+    options = []
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        define = None
+        if arg in ('-D', '--define') and args:
+            define = args[0]
+        elif arg.startswith('-D') or arg.startswith('--define='):
+            define = arg.split('=', 1)[1] if arg.startswith('--define=') else arg[2:]
+
+        if define is not None and define.startswith('workers='):
+            workers = int(define.split('=', 1)[1])
+            if arg in ('-D', '--define'):
+                args.pop(0)
+        elif os.path.isdir(arg) or arg.endswith('.feature'):
+            paths.append(arg)
+        else:
+            options.append(arg)
+
+    return max(workers, 1), paths or [DEFAULT_FEATURES], options
+
+
+def collect_scenarios(paths):
+    """
+    Find all scenarios in given feature files and folders.
+    :param paths: list of .feature files or folders with them
+    :return: list of locations in behave format: /absolute/path/to/file.feature:line
+    (behave resolves paths of @file relative to its folder)
+    """
+    feature_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                feature_files.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.feature'))
+        else:
+            feature_files.append(path)
+
+    locations = []
+    for feature_file in feature_files:
+        feature = parse_file(feature_file)
+        if feature is None:
+            continue
+        for scenario in feature.scenarios:
+            locations.append('{}:{}'.format(os.path.abspath(feature_file), scenario.line))
+    return locations
+
+
+def partition(locations, workers):
+    """
+    Distribute scenario locations between workers.
+    :param locations: list of scenario locations
+    :param workers: int - number of workers
+    :return: list of non empty lists of locations
+    """
+    return [chunk for chunk in (locations[i::workers] for i in range(workers)) if chunk]
+
+
+def start_worker(worker, locations, options):
+    """
+    Start behave in separate process for given scenarios.
+    Locations are passed through file to avoid command line length limits.
+    :param worker: int - worker number
+    :param locations: list of scenario locations
+    :param options: list of behave options
+    :return: tuple (subprocess.Popen, output file)
+    """
+    worker_dir = worker_log_dir(Config.LOG_DIR, worker)
+    if os.path.exists(worker_dir):
+        shutil.rmtree(worker_dir)
+    os.makedirs(worker_dir)
+
+    locations_file = os.path.join(worker_dir, 'locations.txt')
+    with open(locations_file, 'w') as _file:
+        _file.write('\n'.join(locations))
+
+    output = open(os.path.join(worker_dir, 'behave_output.txt'), 'w')
+    command = [sys.executable, '-m', 'behave'] + options + ['-D', 'worker={}'.format(worker), '@' + locations_file]
+    logger.info('Starting worker %s with %s scenarios', worker, len(locations))
+    return subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT), output
+
+
+def merge_allure_reports(workers):
+    """
+    Copy allure results of all workers into one allure report folder.
+    File names of allure results are unique (uuid based) so they can be placed together.
+    :param workers: list of worker numbers
+    :return: str - path to merged report
+    """
+    report_dir = os.path.join(Config.LOG_DIR, 'allure_report')
+    if os.path.exists(report_dir):
+        shutil.rmtree(report_dir)
+    os.makedirs(report_dir)
+
+    for worker in workers:
+        worker_report = os.path.join(worker_log_dir(Config.LOG_DIR, worker), 'allure_report')
+        if not os.path.isdir(worker_report):
+            logger.warning('No allure results for worker %s', worker)
+            continue
+        for name in os.listdir(worker_report):
+            shutil.copy2(os.path.join(worker_report, name), report_dir)
+    return report_dir
+
+
+def _log_records(path, worker):
+    """
+    Read log file record by record. Multiline records (tracebacks) are kept together.
+    :param path: str - path to log file
+    :param worker: worker number, added to every record
+    :return: generator of tuples (timestamp, record)
+    """
+    prefix = '[worker_{}] '.format(worker)
+    record = []
+    timestamp = ''
+    with open(path) as _file:
+        for line in _file:
+            match = LOG_RECORD_START.match(line)
+            if match and record:
+                yield timestamp, ''.join(record)
+                record = []
+            if match:
+                timestamp = match.group(0)
+            record.append(prefix + line)
+    if record:
+        yield timestamp, ''.join(record)
+
+
+def merge_logs(workers):
+    """
+    Merge log files of all workers in one file sorted by record time.
+    :param workers: list of worker numbers
+    :return: str - path to merged log file
+    """
+    sources = []
+    for worker in workers:
+        worker_dir = worker_log_dir(Config.LOG_DIR, worker)
+        if not os.path.isdir(worker_dir):
+            continue
+        for name in sorted(os.listdir(worker_dir)):
+            if name.startswith('test_log_') and name.endswith('.txt'):
+                sources.append(_log_records(os.path.join(worker_dir, name), worker))
+
+    merged_log = os.path.join(Config.LOG_DIR,
+                              'test_log_{}_merged.txt'.format(datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')))
+    with open(merged_log, 'w') as _file:
+        for _, record in heapq.merge(*sources):
+            _file.write(record)
+    return merged_log
+
+
+def merge_durations(workers):
+    """
+    Merge scenario durations recorded by workers into LOG_DIR history.
+    :param workers: list of worker numbers
+    :return: str - path to merged history
+    """
+    history = DurationHistory(os.path.join(Config.LOG_DIR, HISTORY_FILE))
+    for worker in workers:
+        history.merge(DurationHistory(os.path.join(worker_log_dir(Config.LOG_DIR, worker), HISTORY_FILE)))
+    history.save()
+    return history.path
+
+
+def run(args):
+    """
+    Run scenarios in parallel and merge results.
+    :param args: list of command line arguments
+    :return: int - exit code, non zero if any of workers failed
+    """
+    workers, paths, options = split_arguments(args)
+
+    if not os.path.exists(Config.LOG_DIR):
+        os.makedirs(Config.LOG_DIR)
+
+    chunks = partition(collect_scenarios(paths), workers)
+    processes = [start_worker(worker, chunk, options) for worker, chunk in enumerate(chunks)]
+
+    exit_code = 0
+    for worker, (process, output) in enumerate(processes):
+        code = process.wait()
+        output.close()
+        if code:
+            logger.error('Worker %s finished with exit code %s', worker, code)
+        exit_code = max(exit_code, code)
+
+    worker_ids = range(len(processes))
+    logger.info('Merged allure results to: %s', merge_allure_reports(worker_ids))
+    logger.info('Merged logs to: %s', merge_logs(worker_ids))
+    logger.info('Merged scenario durations to: %s', merge_durations(worker_ids))
+    return exit_code
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)5s] [%(name)s]  %(message)s')
+    sys.exit(run(sys.argv[1:]))
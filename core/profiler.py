@@ -0,0 +1,141 @@
+"""
+Profiling of test run.
+    timing - wall time of every step, scenario and feature, run summary in LOG_DIR/profile_summary.*
+    cprofile - timing plus cProfile of every scenario (hooks, steps, page objects, logging, allure),
+               saved as .prof file into scenario folder. Open with: python -m pstats file.prof or snakeviz.
+"""
+import cProfile
+import json
+import os
+import pstats
+import StringIO
+import time
+
+OFF = 'off'
+TIMING = 'timing'
+CPROFILE = 'cprofile'
+MODES = (OFF, TIMING, CPROFILE)
+
+
+class Profiler(object):
+    """
+    Collects timings from hooks. Methods are called in hooks order: feature -> scenario -> step.
+    """
+    def __init__(self, mode=TIMING):
+        """
+        :param mode: str - TIMING or CPROFILE
+        """
+        if mode not in (TIMING, CPROFILE):
+            raise ValueError('Unknown profile mode: {}'.format(mode))
+
+        self.mode = mode
+        self.features = []
+        self.scenarios = []
+        self.steps = {}  # step name -> [count, total, max]
+        self._feature = None
+        self._scenario = None
+        self._step = None
+        self._profile = None
+
+    def start_feature(self, name):
+        self._feature = {'name': name, 'started': time.time()}
+
+    def end_feature(self, status):
+        self.features.append({'name': self._feature['name'], 'status': status,
+                              'duration': time.time() - self._feature['started']})
+
+    def start_scenario(self, name):
+        self._scenario = {'name': name, 'feature': self._feature['name'] if self._feature else None,
+                          'started': time.time(), 'steps': 0.0}
+        if self.mode == CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def end_scenario(self, status, directory=None):
+        """
+        Finish scenario. In CPROFILE mode saves profile.prof to directory.
+        :param status: str - scenario status
+        :param directory: str - scenario folder for profile file
+        :return: tuple (path to .prof or None, text summary of scenario)
+        """
+        prof_path = None
+        stats_text = ''
+        if self._profile is not None:
+            self._profile.disable()
+            if directory is not None:
+                prof_path = os.path.join(directory, 'profile.prof')
+                self._profile.dump_stats(prof_path)
+            stats_text = self._top_functions(self._profile)
+            self._profile = None
+
+        duration = time.time() - self._scenario['started']
+        scenario = {'name': self._scenario['name'], 'feature': self._scenario['feature'], 'status': status,
+                    'duration': duration, 'steps': self._scenario['steps'],
+                    'overhead': max(duration - self._scenario['steps'], 0.0)}
+        self.scenarios.append(scenario)
+
+        summary = ('Scenario: {name}\nStatus: {status}\nWall time: {duration:.3f}s\n'
+                   'Steps: {steps:.3f}s\nHooks and framework: {overhead:.3f}s\n').format(**scenario)
+        return prof_path, summary + stats_text
+
+    def start_step(self, name):
+        self._step = {'name': name, 'started': time.time()}
+
+    def end_step(self):
+        duration = time.time() - self._step['started']
+        if self._scenario is not None:
+            self._scenario['steps'] += duration
+
+        totals = self.steps.setdefault(self._step['name'], [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] = max(totals[2], duration)
+        return duration
+
+    def summary(self):
+        """
+        :return: dict - run timings: features, scenarios (slowest first), steps aggregated by name (slowest first)
+        """
+        steps = [{'name': name, 'count': count, 'total': total, 'avg': total / count, 'max': max_time}
+                 for name, (count, total, max_time) in self.steps.items()]
+        return {
+            'mode': self.mode,
+            'features': self.features,
+            'scenarios': sorted(self.scenarios, key=lambda item: -item['duration']),
+            'steps': sorted(steps, key=lambda item: -item['total']),
+            'total': sum(feature['duration'] for feature in self.features),
+            'overhead': sum(scenario['overhead'] for scenario in self.scenarios),
+        }
+
+    def write_summary(self, directory):
+        """
+        Write run timings to profile_summary.json and profile_summary.txt.
+        :param directory: str - report folder
+        :return: tuple of paths (json, txt)
+        """
+        summary = self.summary()
+        json_path = os.path.join(directory, 'profile_summary.json')
+        with open(json_path, 'w') as _file:
+            json.dump(summary, _file, indent=2)
+
+        lines = ['Total: {total:.3f}s, hooks and framework overhead: {overhead:.3f}s'.format(**summary), '',
+                 'Features:']
+        lines.extend('{duration:>9.3f}  {status:<8} {name}'.format(**item) for item in summary['features'])
+        lines.extend(['', 'Scenarios (wall, steps, overhead):'])
+        lines.extend('{duration:>9.3f} {steps:>9.3f} {overhead:>9.3f}  {status:<8} {name}'.format(**item)
+                     for item in summary['scenarios'])
+        lines.extend(['', 'Steps (total, count, avg, max):'])
+        lines.extend('{total:>9.3f} {count:>5} {avg:>9.3f} {max:>9.3f}  {name}'.format(**item)
+                     for item in summary['steps'])
+
+        txt_path = os.path.join(directory, 'profile_summary.txt')
+        with open(txt_path, 'w') as _file:
+            _file.write('\n'.join(lines) + '\n')
+        return json_path, txt_path
+
+    @staticmethod
+    def _top_functions(profile, top=40):
+        stream = StringIO.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats('cumulative').print_stats(top)
+        return '\n' + stream.getvalue()
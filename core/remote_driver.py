@@ -0,0 +1,247 @@
+"""
+Remote WebDriver for Selenium Grid hub or standalone server (Browser=remote).
+All remote browsers share per host pools of keep-alive HTTP connections, so wire commands do not open new
+TCP connection each, and browsers used by DriverPool threads do not wait for each other.
+New session is retried with growing delay when hub is saturated (no free node) or temporarily unavailable
+(connection refused, server error page). Timed out new session request is not retried, it may still be started
+on a node and would stay there until hub cleans it up.
+"""
+import base64
+import errno
+import httplib
+import logging
+import Queue
+import select
+import socket
+import threading
+import time
+import urlparse
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote import utils
+from selenium.webdriver.remote.errorhandler import ErrorCode
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utilities.config import Config
+
+
+class HubUnavailableException(WebDriverException):
+    """
+    Hub answered with server error page instead of wire protocol response (hub restarts, proxy error).
+    """
+
+
+class ConnectionPool(object):
+    """
+    Thread safe set of keep-alive connections to one host.
+    Connections are created on demand, at most size idle ones are kept, extra returned ones are closed.
+    """
+    def __init__(self, scheme, netloc, size, timeout):
+        """
+        :param scheme: str - http or https
+        :param netloc: str - host:port
+        :param size: int - max number of idle connections
+        :param timeout: int - socket timeout in seconds
+        """
+        self.connection_class = httplib.HTTPSConnection if scheme == 'https' else httplib.HTTPConnection
+        self.netloc = netloc
+        self.timeout = timeout
+        self.created = 0
+        self._idle = Queue.LifoQueue(size)  # last returned connection is the least likely to be closed by server
+
+    def get(self):
+        """
+        :return: tuple (connection, reused) - idle connection or new one
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Queue.Empty:
+                self.created += 1
+                return self.connection_class(self.netloc, timeout=self.timeout), False
+            if connection.sock is not None and not select.select([connection.sock], [], [], 0)[0]:
+                return connection, True
+            connection.close()  # idle connection is readable only when it was closed by server
+
+    def put(self, connection):
+        """
+        :param connection: httplib.HTTPConnection with fully read response
+        """
+        try:
+            self._idle.put_nowait(connection)
+        except Queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Queue.Empty:
+                return
+
+
+class PooledConnection(RemoteConnection):
+    """
+    RemoteConnection sending commands through shared ConnectionPool of its host.
+    Selenium's own keep_alive mode uses one connection without locking, which breaks when the same connection
+    is used from several threads.
+    """
+    _pools = {}  # (scheme, netloc) -> ConnectionPool
+    _pools_lock = threading.Lock()
+
+    def __init__(self, remote_server_addr):
+        """
+        :param remote_server_addr: str - hub url, for example http://127.0.0.1:4444/wd/hub
+        """
+        RemoteConnection.__init__(self, remote_server_addr, keep_alive=False)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @classmethod
+    def pool(cls, scheme, netloc):
+        """
+        :return: ConnectionPool - shared by all connections to the host
+        """
+        with cls._pools_lock:
+            key = (scheme, netloc)
+            if key not in cls._pools:
+                cls._pools[key] = ConnectionPool(scheme, netloc, Config.REMOTE_POOL_SIZE, Config.REMOTE_TIMEOUT)
+            return cls._pools[key]
+
+    @classmethod
+    def close_all(cls):
+        """
+        Close idle connections of all pools.
+        """
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+    def _request(self, method, url, body=None):
+        """
+        Send command, connection closed by server while it was idle is replaced with new one.
+        Command is sent again only if it surely was not handled: sending failed or connection was closed
+        without status line. Timeout is never retried, command may be still in progress on hub.
+        :param method: str - HTTP method
+        :param url: str - command url
+        :param body: str - json payload, sent for POST and PUT only
+        :return: dict - parsed response like in RemoteConnection
+        """
+        parts = urlparse.urlsplit(url)
+        netloc = parts.hostname + (':{}'.format(parts.port) if parts.port else '')
+        path = urlparse.urlunsplit(('', '', parts.path, parts.query, ''))
+        headers = {'Connection': 'keep-alive',
+                   'Content-Type': 'application/json;charset=UTF-8',
+                   'Accept': 'application/json'}
+        if parts.username:
+            credentials = '{}:{}'.format(parts.username, parts.password or '')
+            headers['Authorization'] = 'Basic ' + base64.b64encode(credentials)
+        if method not in ('POST', 'PUT'):
+            body = None
+
+        pool = self.pool(parts.scheme, netloc)
+        while True:
+            connection, reused = pool.get()
+            sent = False
+            try:
+                connection.request(method, path, body, headers)
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+            except (httplib.HTTPException, socket.error) as error:
+                connection.close()
+                if reused and not isinstance(error, socket.timeout) and \
+                        (not sent or isinstance(error, httplib.BadStatusLine)):  # closed by server while idle
+                    self.logger.debug('Idle connection to %s was closed, reconnecting', netloc)
+                    continue
+                raise
+            break
+
+        if response.will_close:
+            connection.close()
+        else:
+            pool.put(connection)
+
+        if 300 <= response.status < 304:
+            return self._request('GET', urlparse.urljoin(url, response.getheader('location')))
+        return self._parse(response.status, response.getheader('Content-Type') or '', data)
+
+    @staticmethod
+    def _parse(status, content_type, data):
+        body = data.decode('utf-8').replace('\x00', '').strip()
+        if 399 < status < 500:
+            return {'status': status, 'value': body}
+        if content_type.startswith('image/png'):
+            return {'status': ErrorCode.SUCCESS, 'value': body}
+        try:
+            result = utils.load_json(body)
+        except ValueError:
+            if status > 499:
+                raise HubUnavailableException('Hub responded with HTTP {}: {}'.format(status, body[:200]))
+            return {'status': ErrorCode.SUCCESS if 199 < status < 300 else ErrorCode.UNKNOWN_ERROR, 'value': body}
+        if not isinstance(result, dict):
+            raise WebDriverException('Invalid server response body: {}'.format(body))
+        result.setdefault('value', None)
+        return result
+
+
+class RemoteBrowser(WebDriver):
+    """
+    Remote WebDriver on pooled connections with retried session creation.
+    Registered in Config.browser_types as 'remote', capabilities come from BrowserFactory.
+    """
+    BUSY_MESSAGES = ('timed out waiting for a node to become available', 'new session request timed out',
+                     'no free slot')  # lower case parts of hub errors when no node is free
+
+    def __init__(self, desired_capabilities=None, browser_profile=None, hub_url=None, retries=None,
+                 retry_delay=None):
+        """
+        :param desired_capabilities: dict - requested capabilities
+        :param browser_profile: selenium.webdriver.FirefoxProfile - for remote firefox only
+        :param hub_url: str - Config.REMOTE_HUB_URL by default
+        :param retries: int - attempts to start session after the first one, Config.REMOTE_RETRIES by default
+        :param retry_delay: float - seconds before the first retry, doubled for every next one,
+        Config.REMOTE_RETRY_DELAY by default
+        """
+        self.retries = Config.REMOTE_RETRIES if retries is None else retries
+        self.retry_delay = Config.REMOTE_RETRY_DELAY if retry_delay is None else retry_delay
+        self.logger = logging.getLogger(self.__class__.__name__)
+        WebDriver.__init__(self, PooledConnection(hub_url or Config.REMOTE_HUB_URL),
+                           desired_capabilities=desired_capabilities, browser_profile=browser_profile)
+
+    def start_session(self, desired_capabilities, browser_profile=None):
+        """
+        Request new session, request failed for transient reason is repeated up to retries times.
+        """
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                WebDriver.start_session(self, dict(desired_capabilities), browser_profile)
+                self.logger.debug('Remote session %s started, attempt %s', self.session_id, attempt + 1)
+                return
+            except (WebDriverException, httplib.HTTPException, socket.error) as error:
+                if attempt == self.retries or not self.is_transient(error):
+                    raise
+                self.logger.warning('Remote session was not started (%s), retry %s of %s in %ss',
+                                    str(error).strip() or error.__class__.__name__, attempt + 1, self.retries,
+                                    delay)
+                time.sleep(delay)
+                delay *= 2
+
+    def is_transient(self, error):
+        """
+        :param error: exception of new session request
+        :return: boolean - True if hub did not start session and can start it later: connection refused,
+        server error page or no free node
+        """
+        if isinstance(error, HubUnavailableException):
+            return True
+        if isinstance(error, socket.timeout):
+            return False
+        if isinstance(error, socket.error):
+            return error.errno == errno.ECONNREFUSED
+        if isinstance(error, WebDriverException):
+            message = (error.msg or '').lower()
+            return any(busy in message for busy in self.BUSY_MESSAGES)
+        return False
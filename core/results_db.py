@@ -0,0 +1,120 @@
+"""
+Local database of scenario results (SQLite), filled by after_scenario hook.
+Used to select and order scenarios of the next run:
+    all - run everything in feature file order
+    rerun-failed - run only scenarios which failed last time
+    failed-first - run everything, scenarios which failed last time and fail often go first
+"""
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+from core.scenarios import leaf_scenarios, scenario_key, select
+
+ALL = 'all'
+RERUN_FAILED = 'rerun-failed'
+FAILED_FIRST = 'failed-first'
+RUN_MODES = (ALL, RERUN_FAILED, FAILED_FIRST)
+
+
+class ResultsDB(object):
+    """
+    Results of all runs, one row per executed scenario.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            run_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            duration REAL,
+            error TEXT,
+            finished REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_key ON results (key, finished);
+    """
+    HISTORY_DEPTH = 10  # last results of scenario used for failure rate
+
+    def __init__(self, path):
+        """
+        :param path: str - database file, created if missing. Can be shared by parallel workers
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.run_id = uuid.uuid4().hex
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.executescript(self.SCHEMA)
+
+    def record(self, key, status, duration=None, error=None):
+        """
+        :param key: str - scenario key, see core.scenarios.scenario_key
+        :param status: str - behave scenario status
+        :param duration: float - seconds
+        :param error: str - error message of failed scenario
+        """
+        with self._connection:
+            self._connection.execute('INSERT INTO results (run_id, key, status, duration, error, finished) '
+                                     'VALUES (?, ?, ?, ?, ?, ?)',
+                                     (self.run_id, key, status, duration, error, time.time()))
+
+    def last_statuses(self):
+        """
+        :return: dict scenario key -> status of its latest result
+        """
+        rows = self._connection.execute('SELECT key, status FROM results AS r WHERE finished = '
+                                        '(SELECT MAX(finished) FROM results WHERE key = r.key)')
+        return dict(rows)
+
+    def failure_rates(self):
+        """
+        :return: dict scenario key -> part of failed results among last HISTORY_DEPTH ones
+        """
+        results = {}
+        for key, status in self._connection.execute('SELECT key, status FROM results ORDER BY finished DESC'):
+            statuses = results.setdefault(key, [])
+            if len(statuses) < self.HISTORY_DEPTH:
+                statuses.append(status)
+        return dict((key, statuses.count('failed') / float(len(statuses))) for key, statuses in results.items())
+
+    def apply(self, features, mode):
+        """
+        Select or reorder scenarios of features for run mode.
+        :param features: list of behave.model.Feature, changed in place
+        :param mode: str - one of RUN_MODES
+        """
+        if mode not in RUN_MODES:
+            raise ValueError('Unknown run mode: {}'.format(mode))
+
+        if mode == RERUN_FAILED:
+            failed = set(key for key, status in self.last_statuses().items() if status == 'failed')
+            removed = select(features, lambda element: bool(failed & self._keys(element)))
+            self.logger.info('Rerun of failed scenarios, %s passed ones are not run', removed)
+
+        elif mode == FAILED_FIRST:
+            statuses = self.last_statuses()
+            rates = self.failure_rates()
+
+            def priority(element):
+                keys = self._keys(element)
+                failed_last_time = any(statuses.get(key) == 'failed' for key in keys)
+                return not failed_last_time, -max(rates.get(key, 0.0) for key in keys)
+
+            for feature in features:
+                feature.scenarios.sort(key=priority)  # stable, equal scenarios keep file order
+            features.sort(key=lambda feature: min([priority(element) for element in feature.scenarios] or [(True, 0)]))
+            self.logger.info('Scenarios are ordered by failures: %s of %s failed last time',
+                             sum(1 for status in statuses.values() if status == 'failed'), len(statuses))
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def _keys(element):
+        keys = set(scenario_key(scenario) for scenario in leaf_scenarios(element))
+        keys.add(scenario_key(element))
+        return keys
@@ -0,0 +1,54 @@
+"""
+Helpers for scenarios of parsed features: stable keys and selection of scenarios to run.
+Selection changes features in place, so it works from before_all hook with context._runner.features.
+"""
+import os
+
+from behave.model import ScenarioOutline
+
+
+def scenario_key(scenario):
+    """
+    Key which does not change when lines are added to feature file.
+    :type scenario: behave.model.Scenario or behave.model.ScenarioOutline
+    :return: str - relative/path/to/file.feature:Scenario name
+    """
+    filename = os.path.relpath(scenario.filename).replace(os.sep, '/')
+    return '{}:{}'.format(filename, scenario.name)
+
+
+def leaf_scenarios(element):
+    """
+    :param element: behave.model.Scenario or behave.model.ScenarioOutline - item of feature.scenarios
+    :return: list of behave.model.Scenario - scenarios which are actually run for element
+    """
+    if isinstance(element, ScenarioOutline):
+        return list(element.scenarios)
+    return [element]
+
+
+def iter_elements(features):
+    """
+    :param features: list of behave.model.Feature
+    :return: generator of tuples (feature, scenario or scenario outline)
+    """
+    for feature in features:
+        for element in feature.scenarios:
+            yield feature, element
+
+
+def select(features, predicate):
+    """
+    Keep only scenarios and scenario outlines for which predicate is True, features without scenarios are removed.
+    :param features: list of behave.model.Feature, changed in place
+    :param predicate: callable taking scenario or scenario outline
+    :return: int - number of removed scenarios and outlines
+    """
+    removed = 0
+    for feature in list(features):
+        kept = [element for element in feature.scenarios if predicate(element)]
+        removed += len(feature.scenarios) - len(kept)
+        feature.scenarios[:] = kept
+        if not kept:
+            features.remove(feature)
+    return removed
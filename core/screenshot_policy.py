@@ -0,0 +1,92 @@
+"""
+Rules deciding which steps get screenshot.
+"""
+import hashlib
+import logging
+
+from core import scripts
+
+
+class ScreenshotPolicy(object):
+    """
+    Step screenshot policy:
+        always - screenshot after every step
+        on_failure - only after failed step
+        every_n_steps - after every N-th step of scenario and after failed step
+        on_change - only if page changed since previous screenshot.
+                    Page change is detected first by DOM mutations counter (no screenshot taken at all),
+                    then by hash of screenshot itself (identical frames are not saved).
+    Fail screenshot in after_scenario does not depend on policy.
+    """
+    ALWAYS = 'always'
+    ON_FAILURE = 'on_failure'
+    EVERY_N_STEPS = 'every_n_steps'
+    ON_CHANGE = 'on_change'
+
+    def __init__(self, policy=ALWAYS, every_n=1):
+        """
+        :param policy: str - one of ALWAYS, ON_FAILURE, EVERY_N_STEPS, ON_CHANGE
+        :param every_n: int - step interval for EVERY_N_STEPS
+        """
+        if policy not in (self.ALWAYS, self.ON_FAILURE, self.EVERY_N_STEPS, self.ON_CHANGE):
+            raise ValueError('Unknown screenshot policy: {}'.format(policy))
+
+        self.policy = policy
+        self.every_n = max(every_n, 1)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget previous steps. Called for every scenario.
+        """
+        self._step_num = 0
+        self._dom_fingerprint = None
+        self._frame_hash = None
+
+    def should_capture(self, browser, step):
+        """
+        Check if screenshot should be taken after given step.
+        :type browser: selenium.webdriver.*
+        :type step: behave.model.Step
+        :return: boolean
+        """
+        self._step_num += 1
+        failed = step.status == 'failed'
+
+        if self.policy == self.ALWAYS:
+            return True
+        if self.policy == self.ON_FAILURE:
+            return failed
+        if self.policy == self.EVERY_N_STEPS:
+            return failed or (self._step_num - 1) % self.every_n == 0
+        return failed or self._dom_changed(browser)
+
+    def is_new_frame(self, png):
+        """
+        Check that screenshot differs from previous one. Always True if policy is not ON_CHANGE.
+        :param png: str - PNG bytes
+        :return: boolean
+        """
+        if self.policy != self.ON_CHANGE:
+            return True
+
+        frame_hash = hashlib.sha1(png).hexdigest()
+        if frame_hash == self._frame_hash:
+            self.logger.debug('Skipped screenshot identical to previous one')
+            return False
+        self._frame_hash = frame_hash
+        return True
+
+    def _dom_changed(self, browser):
+        try:
+            fingerprint = browser.execute_script(scripts.DOM_FINGERPRINT)
+        except Exception:
+            self.logger.debug('Cannot get DOM fingerprint, falling back to screenshot hash', exc_info=True)
+            return True
+
+        if fingerprint is not None and fingerprint == self._dom_fingerprint:
+            self.logger.debug('Skipped screenshot, page not changed: %s', fingerprint)
+            return False
+        self._dom_fingerprint = fingerprint
+        return True
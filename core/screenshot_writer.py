@@ -0,0 +1,107 @@
+"""
+Background saving of step screenshots.
+Screenshot is taken in memory as PNG bytes, saving to artifact store, scenario manifest and allure attachment
+are done by writer thread, so step does not wait for file system.
+Stored file is attached by reference, bytes are released right after write.
+"""
+import logging
+import Queue
+import threading
+
+from allure.constants import AttachmentType
+
+
+class ScreenshotWriter(object):
+    """
+    Bounded queue of screenshots with one writer thread.
+    When queue is full screenshot is either waited to be queued (block) or thrown away (drop).
+    """
+    BLOCK = 'block'
+    DROP = 'drop'
+
+    def __init__(self, allure, store, max_size=16, backpressure=BLOCK):
+        """
+        :type allure: core.allure_report.AllureReport
+        :type store: core.artifact_store.ArtifactStore
+        :param max_size: int - max number of screenshots waiting to be written
+        :param backpressure: str - BLOCK or DROP, what to do when queue is full
+        """
+        if backpressure not in (self.BLOCK, self.DROP):
+            raise ValueError('Unknown screenshot backpressure policy: {}'.format(backpressure))
+
+        self.allure = allure
+        self.store = store
+        self.backpressure = backpressure
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.dropped = 0
+
+        self._queue = Queue.Queue(max_size)
+        self._thread = threading.Thread(target=self._run, name='ScreenshotWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, manifest, name, png, title, block=False):
+        """
+        Queue screenshot for saving to store and attaching to currently active allure step or test case.
+        :type manifest: core.artifact_store.Manifest
+        :param name: str - screenshot name in scenario manifest
+        :param png: str - PNG bytes
+        :param title: str - allure attachment title
+        :param block: boolean - wait for place in queue regardless of backpressure, for screenshot which
+        must not be lost (failure)
+        :return: boolean - False if screenshot was dropped
+        """
+        item = (manifest, name, png, title, self.allure.current())
+
+        if block or self.backpressure == self.BLOCK:
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+        except Queue.Full:
+            self.dropped += 1
+            self.logger.warning('Screenshot queue is full, dropped screenshot: %s', name)
+            return False
+        return True
+
+    def flush(self):
+        """
+        Wait until all queued screenshots are written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Write remaining screenshots and stop writer thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.dropped:
+            self.logger.warning('Screenshots dropped because of full queue: %s', self.dropped)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, manifest, name, png, title, target):
+        try:
+            path = self.store.put(png, 'png')
+            manifest.add(name, path, title)
+        except Exception:
+            self.logger.exception('Failed to save screenshot: %s', name)
+            return
+
+        try:
+            if path.endswith('.png'):
+                self.allure.attach_file(title, path, AttachmentType.PNG, target)
+            else:  # recompressed by store, report gets original
+                self.allure.attach_to(target, title, png, AttachmentType.PNG)
+        except Exception:
+            self.logger.exception('Failed to attach to report screenshot: %s', name)
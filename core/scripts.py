@@ -0,0 +1,202 @@
+"""
+JavaScript snippets executed in browser by framework.
+"""
+
+# localStorage/sessionStorage are not accessible on about:blank and some other pages - ignore such errors
+CLEAR_STORAGE = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+# Returns {local: {key: value}, session: {key: value}} of current page, null when storages are not accessible
+GET_STORAGE = """
+try {
+    var result = {local: {}, session: {}};
+    var storages = {local: window.localStorage, session: window.sessionStorage};
+    for (var name in storages) {
+        for (var i = 0; i < storages[name].length; i++) {
+            var key = storages[name].key(i);
+            result[name][key] = storages[name].getItem(key);
+        }
+    }
+    return result;
+} catch (e) {
+    return null;
+}
+"""
+
+# arguments: {key: value} for localStorage, {key: value} for sessionStorage of current page (replace current items)
+SET_STORAGE = """
+var storages = [[window.localStorage, arguments[0]], [window.sessionStorage, arguments[1]]];
+storages.forEach(function (item) {
+    item[0].clear();
+    for (var key in item[1]) {
+        item[0].setItem(key, item[1][key]);
+    }
+});
+"""
+
+# Cheap page fingerprint: URL + number of DOM mutations seen by observer installed on first call.
+# Returns null when observer was just installed (page is new for us).
+DOM_FINGERPRINT = """
+var state = window.__bddMutations;
+if (!state) {
+    state = window.__bddMutations = {count: 0};
+    new MutationObserver(function (records) { state.count += records.length; })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    return null;
+}
+return document.URL + '#' + state.count;
+"""
+
+# Elements search by selenium strategy (By.*) inside page, used by batch queries below
+_FIND = """
+function find(by, value) {
+    var nodes = [];
+    if (by === 'xpath') {
+        var result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < result.snapshotLength; i++) {
+            nodes.push(result.snapshotItem(i));
+        }
+        return nodes;
+    }
+    if (by === 'css selector') {
+        return Array.prototype.slice.call(document.querySelectorAll(value));
+    }
+    if (by === 'id') {
+        return Array.prototype.slice.call(document.querySelectorAll('[id="' + value.replace(/"/g, '\\\\"') + '"]'));
+    }
+    if (by === 'name') {
+        return Array.prototype.slice.call(document.getElementsByName(value));
+    }
+    throw new Error('Unsupported locator strategy: ' + by);
+}
+function isVisible(element) {
+    var style = window.getComputedStyle(element);
+    return style.visibility !== 'hidden' && style.display !== 'none' && element.getClientRects().length > 0;
+}
+"""
+
+# arguments: strategy, value. Returns list of visible texts
+GET_TEXTS = _FIND + """
+return find(arguments[0], arguments[1]).map(function (element) {
+    return (element.innerText !== undefined ? element.innerText : element.textContent).trim();
+});
+"""
+
+# arguments: strategy, value, list of names. Returns list of {name: value}, property is taken before attribute
+GET_ATTRIBUTES = _FIND + """
+var names = arguments[2];
+return find(arguments[0], arguments[1]).map(function (element) {
+    var values = {};
+    names.forEach(function (name) {
+        var value = element[name];
+        if (value === undefined || value === null || typeof value === 'object' || typeof value === 'function') {
+            value = element.getAttribute(name);
+        }
+        values[name] = value;
+    });
+    return values;
+});
+"""
+
+# arguments: list of [strategy, value]. Returns list of {present, visible, enabled, count} for first found element
+GET_STATES = _FIND + """
+return arguments[0].map(function (locator) {
+    var elements = find(locator[0], locator[1]);
+    var element = elements[0];
+    return {
+        present: !!element,
+        visible: !!element && isVisible(element),
+        enabled: !!element && !element.disabled,
+        count: elements.length
+    };
+});
+"""
+
+# arguments: element, condition (present, visible, clickable). Returns true if element is still attached to the page
+# and meets condition. Element of previous document fails with stale element reference before script is run
+CHECK_ELEMENT = _FIND + """
+var element = arguments[0], condition = arguments[1];
+if (!element.ownerDocument.documentElement.contains(element)) {
+    return false;
+}
+if (condition === 'present') {
+    return true;
+}
+return isVisible(element) && (condition === 'visible' || !element.disabled);
+"""
+
+# arguments: element, duration in ms. Scrolls to element and highlights it, original style is restored by page timer.
+# Original style is saved once per highlight, repeated highlight of the same element extends the pending one
+HIGHLIGHT = """
+var element = arguments[0];
+var state = element.__bddHighlight;
+if (state) {
+    clearTimeout(state.timer);  // highlighted again: keep original style, restore it later
+} else {
+    state = element.__bddHighlight = {style: element.getAttribute('style')};
+    element.setAttribute('style', (state.style ? state.style + '; ' : '') + 'color: red; border: 5px solid red;');
+}
+element.scrollIntoView(true);
+state.timer = setTimeout(function () {
+    if (state.style === null) {
+        element.removeAttribute('style');
+    } else {
+        element.setAttribute('style', state.style);
+    }
+    delete element.__bddHighlight;
+}, arguments[1]);
+"""
+
+# Async script. arguments: strategy, value, condition (present, visible, clickable, gone), timeout in ms, callback.
+# Checks condition on every DOM mutation (and by page timer for pure CSS changes).
+# Returns {element: WebElement}, {gone: true} or {timeout: true}
+WAIT_FOR = _FIND + """
+var by = arguments[0], value = arguments[1], condition = arguments[2], timeout = arguments[3];
+var callback = arguments[arguments.length - 1];
+var finished = false, observer = null, timer = null, ticker = null;
+
+function check() {
+    var element = find(by, value)[0];
+    if (condition === 'present') {
+        return element ? {element: element} : null;
+    }
+    if (condition === 'visible') {
+        return element && isVisible(element) ? {element: element} : null;
+    }
+    if (condition === 'clickable') {
+        return element && isVisible(element) && !element.disabled ? {element: element} : null;
+    }
+    if (condition === 'gone') {
+        return !element || !isVisible(element) ? {gone: true} : null;
+    }
+    throw new Error('Unsupported wait condition: ' + condition);
+}
+
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(ticker);
+    callback(result);
+}
+
+function onChange() {
+    var result = check();
+    if (result) finish(result);
+}
+
+var result = check();
+if (result) {
+    callback(result);
+} else {
+    observer = new MutationObserver(onChange);
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    ticker = setInterval(onChange, 250);
+    timer = setTimeout(function () { finish({timeout: true}); }, timeout);
+}
+"""
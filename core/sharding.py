@@ -0,0 +1,158 @@
+"""
+Duration aware sharding of scenarios between CI nodes.
+Hooks record duration of every scenario to LOG_DIR/scenario_durations.json. With -D shard=i/N every node loads
+the history, splits scenarios into N shards with longest processing time first heuristic and runs shard i only.
+Scenarios without history get median duration of known ones.
+
+Histories written by nodes are merged with (from project root):
+    python -m core.sharding merge logs/scenario_durations.json node1.json node2.json ...
+"""
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+
+from core.scenarios import iter_elements, leaf_scenarios, scenario_key, select
+
+HISTORY_FILE = 'scenario_durations.json'
+DEFAULT_DURATION = 30.0  # seconds, when history is empty
+
+
+def parse_shard(text):
+    """
+    :param text: str - shard in i/N form, i starts from 1
+    :return: tuple (i, N)
+    """
+    index, _, total = text.partition('/')
+    try:
+        index, total = int(index), int(total)
+    except ValueError:
+        raise ValueError('Shard should be in i/N form, for example 1/4: {}'.format(text))
+    if not 1 <= index <= total:
+        raise ValueError('Shard number should be from 1 to {}: {}'.format(total, text))
+    return index, total
+
+
+class DurationHistory(object):
+    """
+    Last known duration of scenarios by scenario key (see core.scenarios.scenario_key).
+    """
+    def __init__(self, path=None):
+        """
+        :param path: str - json file to load, missing file means empty history
+        """
+        self.path = path
+        self.durations = {}  # key -> {'duration': seconds, 'updated': timestamp}
+        if path is not None and os.path.exists(path):
+            with open(path) as _file:
+                self.durations = json.load(_file)
+
+    def get(self, key, default=None):
+        """
+        :return: float - seconds or default if scenario was never run
+        """
+        if key in self.durations:
+            return self.durations[key]['duration']
+        return default
+
+    def record(self, key, duration):
+        """
+        :param key: str - scenario key
+        :param duration: float - seconds
+        """
+        self.durations[key] = {'duration': round(duration, 3), 'updated': time.time()}
+
+    def median(self, default=DEFAULT_DURATION):
+        """
+        :return: float - median duration of known scenarios
+        """
+        values = sorted(item['duration'] for item in self.durations.values())
+        if not values:
+            return default
+        return values[len(values) // 2]
+
+    def merge(self, other):
+        """
+        Take newer durations from other history.
+        :type other: DurationHistory
+        """
+        for key, item in other.durations.items():
+            if key not in self.durations or self.durations[key]['updated'] < item['updated']:
+                self.durations[key] = item
+
+    def save(self, path=None):
+        """
+        :param path: str - json file, path history was loaded from by default
+        """
+        path = path or self.path
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(path, 'w') as _file:
+            json.dump(self.durations, _file, indent=2, sort_keys=True)
+
+
+def partition(weights, shards):
+    """
+    Longest processing time first: heaviest items go first, every item to the least loaded shard.
+    :param weights: dict item -> duration
+    :param shards: int - number of shards
+    :return: list of sets of items, one per shard
+    """
+    result = [set() for _ in range(shards)]
+    loads = [(0.0, shard) for shard in range(shards)]
+    for item in sorted(weights, key=lambda item: (-weights[item], item)):
+        load, shard = heapq.heappop(loads)
+        result[shard].add(item)
+        heapq.heappush(loads, (load + weights[item], shard))
+    return result
+
+
+def element_duration(element, history, default):
+    """
+    :param element: behave.model.Scenario or behave.model.ScenarioOutline
+    :type history: DurationHistory
+    :param default: float - duration of scenario without history
+    :return: float - expected duration, sum of all examples for scenario outline
+    """
+    return sum(history.get(scenario_key(scenario), default) for scenario in leaf_scenarios(element))
+
+
+def select_shard(features, shard, history):
+    """
+    Remove from features scenarios of other shards.
+    :param features: list of behave.model.Feature, changed in place
+    :param shard: tuple (i, N) from parse_shard
+    :type history: DurationHistory
+    :return: float - expected duration of selected shard
+    """
+    index, total = shard
+    default = history.median()
+    weights = dict((scenario_key(element), element_duration(element, history, default))
+                   for _, element in iter_elements(features))
+
+    selected = partition(weights, total)[index - 1]
+    logging.getLogger(__name__).info('Shard %s/%s: %s of %s scenarios, expected duration %.1fs',
+                                     index, total, len(selected), len(weights),
+                                     sum(weights[key] for key in selected))
+    select(features, lambda element: scenario_key(element) in selected)
+    return sum(weights[key] for key in selected)
+
+
+def main(args):
+    if len(args) < 3 or args[0] != 'merge':
+        print('Usage: python -m core.sharding merge output.json input.json [input.json ...]')
+        return 1
+
+    output = DurationHistory(args[1])
+    for path in args[2:]:
+        output.merge(DurationHistory(path))
+    output.save()
+    print('Merged {} scenario durations to: {}'.format(len(output.durations), args[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
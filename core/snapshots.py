@@ -0,0 +1,154 @@
+"""
+Browser state snapshots for fast-forwarding shared setup steps.
+Scenario with @snapshot tag (on itself or on feature) has setup: background steps plus leading Given steps.
+After setup passes for the first time, cookies, localStorage, sessionStorage and URL of browser are saved.
+Next scenarios with the same setup (the same browser, application URL and step texts) restore the saved state
+instead of running setup steps, until snapshot is older than TTL.
+Steps are skipped completely, so setup should change browser state only (not context attributes).
+Only cookies and storages of the page setup ended on are saved.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+from selenium.common.exceptions import WebDriverException
+
+from core import scripts
+
+TAG = 'snapshot'
+
+
+def setup_steps(scenario):
+    """
+    :type scenario: behave.model.Scenario
+    :return: tuple (background steps, leading Given steps of scenario)
+    """
+    steps = []
+    for step in scenario.steps:
+        if step.step_type != 'given':
+            break
+        steps.append(step)
+    return list(scenario.background_steps), steps
+
+
+def snapshot_key(steps, *environment):
+    """
+    :param steps: list of behave.model.Step
+    :param environment: str - values which make state different for the same steps (browser, application URL)
+    :return: str - hash of environment and step texts, changes when any step is edited
+    """
+    digest = hashlib.sha1()
+    for item in environment:
+        digest.update(u'{}\n'.format(item).encode('utf-8'))
+    for step in steps:
+        digest.update(u'{} {}\n{}\n'.format(step.step_type, step.name, step.text or '').encode('utf-8'))
+        if step.table is not None:
+            for row in [step.table.headings] + list(step.table.rows):
+                digest.update(u'|{}|\n'.format(u'|'.join(row)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def capture(browser):
+    """
+    :param browser: selenium.webdriver.*
+    :return: dict - state of current page: url, cookies, local and session storage
+    """
+    storage = browser.execute_script(scripts.GET_STORAGE) or {'local': {}, 'session': {}}
+    return {'url': browser.current_url, 'cookies': browser.get_cookies(),
+            'local': storage['local'], 'session': storage['session']}
+
+
+def restore(browser, state):
+    """
+    Open saved URL with saved cookies and storages.
+    :param browser: selenium.webdriver.*
+    :param state: dict from capture
+    """
+    browser.get(state['url'])
+    browser.delete_all_cookies()
+    for cookie in state['cookies']:
+        browser.add_cookie(cookie)
+    browser.execute_script(scripts.SET_STORAGE, state['local'], state['session'])
+    browser.refresh()
+
+
+class SnapshotStore(object):
+    """
+    Snapshots in json files by key, shared by runs and parallel workers.
+    """
+    def __init__(self, directory, ttl):
+        """
+        :param directory: str - folder for snapshot files
+        :param ttl: int - seconds snapshot is valid for
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.restored = 0
+        self.saved = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get(self, key):
+        """
+        :param key: str - snapshot key
+        :return: dict - saved state or None if it is missing or expired
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path) as _file:
+                return json.load(_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def put(self, key, state):
+        """
+        :param key: str - snapshot key
+        :param state: dict from capture
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        path = self._path(key)
+        temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        with open(temporary, 'w') as _file:
+            json.dump(state, _file)
+        if os.name == 'nt' and os.path.exists(path):  # rename does not overwrite on windows
+            os.remove(path)
+        os.rename(temporary, path)
+        self.saved += 1
+
+    def fast_forward(self, browser, scenario, key):
+        """
+        Restore snapshot and remove setup steps from scenario. Nothing is changed if snapshot is not usable.
+        :param browser: selenium.webdriver.*
+        :type scenario: behave.model.Scenario
+        :param key: str - snapshot key of scenario setup
+        :return: boolean - True if setup steps were replaced by snapshot
+        """
+        state = self.get(key)
+        if state is None:
+            return False
+        try:
+            restore(browser, state)
+        except WebDriverException:
+            self.logger.warning('Snapshot %s was not restored, setup steps are run', key, exc_info=True)
+            try:
+                browser.delete_all_cookies()
+                browser.execute_script(scripts.CLEAR_STORAGE)
+            except Exception:  # browser may be gone, setup steps fail with their own error then
+                self.logger.debug('Failed to clear partly restored snapshot %s', key, exc_info=True)
+            return False
+
+        background, steps = setup_steps(scenario)
+        del scenario.background_steps[:len(background)]
+        del scenario.steps[:len(steps)]
+        self.restored += 1
+        self.logger.info('Setup of %s (%s steps) restored from snapshot %s', scenario.name,
+                         len(background) + len(steps), key)
+        return True
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
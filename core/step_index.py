@@ -0,0 +1,510 @@
+"""
+Indexed step definition matching for large step libraries.
+behave checks step text against every registered pattern in turn, and every new step definition against all
+existing ones. StepIndex replaces this search in behave's step registry with literal prefix (or suffix) index:
+pattern like "I search '(.*)' text" can only match text starting with "I search '", so only patterns whose
+literal prefix is a prefix of the step text are tried (in registration order, so the first match is the same
+as behave's one). Resolved step texts are kept in LRU cache.
+Inline flags count: (?i) patterns are indexed case-insensitively, verbose (?x) ones are tried for every text.
+One combined alternation regex is not used: python 2 re allows at most 100 named groups in pattern.
+Definitions which behave would report as already defined still raise AmbiguousStep. Definitions with compatible
+literal prefixes or suffixes are checked for overlap (one matches sample text of the other) when steps start to run,
+after all step modules are loaded, overlapping pairs are reported once as warning. Step text really matched by
+several definitions (the first one wins) is reported once too, unless the pair was already reported.
+"""
+from collections import OrderedDict
+import bisect
+import itertools
+import logging
+import re
+import sre_parse
+
+from behave import matchers
+from behave.model import Match
+from behave.step_registry import AmbiguousStep, registry as behave_registry
+from behave.textutil import text as _text
+
+STEP_TYPES = ('given', 'when', 'then', 'step')
+
+_QUANTIFIER = re.compile(r'\*|\+|\?|\{\d+(,\d*)?\}|\{,\d+\}')
+_INLINE_FLAGS = re.compile(r'\(\?[iLmsux]+\)')
+
+
+def _skip_class(pattern, index):
+    """
+    :return: int - index after character class starting at index
+    """
+    index += 1
+    if pattern[index:index + 1] == '^':
+        index += 1
+    if pattern[index:index + 1] == ']':  # literal ] as the first character of class
+        index += 1
+    while index < len(pattern) and pattern[index] != ']':
+        index += 2 if pattern[index] == '\\' else 1
+    return index + 1
+
+
+def _skip_group(pattern, index):
+    """
+    :return: int - index after group starting at index
+    """
+    depth = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '[':
+            index = _skip_class(pattern, index)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return index
+
+
+def regex_atoms(pattern):
+    """
+    :param pattern: str - regular expression of RegexMatcher (without ^ and $)
+    :return: list of top level atoms: literal character or None for anything else (group, class, escape like \\d,
+    quantified atom), None if pattern has top level alternation. Inline flags like (?i) are skipped
+    """
+    atoms = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        atom = None
+        if char == '\\':
+            escaped = pattern[index + 1:index + 2]
+            if escaped and not escaped.isalnum():  # \d, \w, \1 ... are not literals
+                atom = escaped
+            index += 2
+        elif char == '[':
+            index = _skip_class(pattern, index)
+        elif char == '(':
+            flags = _INLINE_FLAGS.match(pattern, index)
+            if flags:  # applies to whole pattern (see literal_affixes), matches nothing itself
+                index = flags.end()
+                continue
+            index = _skip_group(pattern, index)
+        elif char == '|':
+            return None
+        else:
+            if char not in '.^$':
+                atom = char
+            index += 1
+
+        quantifier = _QUANTIFIER.match(pattern, index)
+        if quantifier:
+            atom = None
+            index = quantifier.end()
+            if pattern[index:index + 1] == '?':  # lazy
+                index += 1
+        atoms.append(atom)
+    return atoms
+
+
+def parse_atoms(pattern):
+    """
+    :param pattern: str - format of ParseMatcher or CFParseMatcher
+    :return: list of literal characters (lower case) and None for fields. Non-ASCII characters are None,
+    as case folding of lower() and re.IGNORECASE (used by parse) differs for them
+    """
+    atoms = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char in '{}' and pattern[index + 1:index + 2] == char:
+            atoms.append(char)
+            index += 2
+        elif char == '{':
+            atoms.append(None)
+            end = pattern.find('}', index)
+            index = len(pattern) if end == -1 else end + 1
+        else:
+            atoms.append(char.lower() if ord(char) < 128 else None)
+            index += 1
+    return atoms
+
+
+def _literal_run(atoms):
+    run = []
+    for atom in atoms:
+        if atom is None:
+            break
+        run.append(atom)
+    return ''.join(run)
+
+
+def literal_affixes(matcher):
+    """
+    :param matcher: behave.matchers.Matcher
+    :return: tuple (prefix, suffix, case_insensitive) - literal text every match starts and ends with,
+    empty for unknown matchers
+    """
+    if isinstance(matcher, matchers.RegexMatcher):
+        flags = matcher.regex.flags  # includes inline flags
+        case_insensitive = bool(flags & re.IGNORECASE)
+        atoms = None if flags & re.VERBOSE else regex_atoms(matcher.string)  # verbose pattern ignores whitespace
+        if atoms and case_insensitive:
+            atoms = [atom.lower() if atom is not None and ord(atom) < 128 else None for atom in atoms]
+    elif isinstance(matcher, matchers.ParseMatcher):
+        atoms, case_insensitive = parse_atoms(matcher.string), True
+    else:
+        atoms, case_insensitive = None, False
+    if not atoms:
+        return '', '', case_insensitive
+    return _literal_run(atoms), _literal_run(reversed(atoms))[::-1], case_insensitive
+
+
+def may_overlap(first, second):
+    """
+    :param first: tuple (prefix, suffix, case_insensitive) from literal_affixes
+    :param second: tuple (prefix, suffix, case_insensitive) from literal_affixes
+    :return: boolean - True if literal affixes do not exclude that both patterns match the same text
+    """
+    if first[2] or second[2]:
+        first, second = (first[0].lower(), first[1].lower()), (second[0].lower(), second[1].lower())
+    return (first[0].startswith(second[0]) or second[0].startswith(first[0])) and \
+        (first[1].endswith(second[1]) or second[1].endswith(first[1]))
+
+
+_CATEGORY_SAMPLES = {'category_digit': u'0', 'category_not_digit': u'x', 'category_space': u' ',
+                     'category_not_space': u'x', 'category_word': u'x', 'category_not_word': u' '}
+
+
+def _class_sample(items):
+    op, value = items[0]
+    if op == 'literal':
+        return unichr(value)
+    if op == 'range':
+        return unichr(value[0])
+    if op == 'category':
+        return _CATEGORY_SAMPLES.get(value, u'x')
+    return u'x'  # negated class, the whole sample is checked anyway
+
+
+def _sample(items, groups):
+    text = []
+    for op, value in items:
+        if op == 'literal':
+            text.append(unichr(value))
+        elif op in ('any', 'not_literal'):
+            text.append(u'y' if value == ord(u'x') else u'x')
+        elif op == 'in':
+            text.append(_class_sample(value))
+        elif op in ('max_repeat', 'min_repeat'):
+            text.append(_sample(value[2], groups) * max(value[0], 1))
+        elif op == 'subpattern':
+            sample = _sample(value[-1], groups)
+            if value[0]:
+                groups[value[0]] = sample
+            text.append(sample)
+        elif op == 'branch':
+            text.append(_sample(value[1][0], groups))
+        elif op == 'category':
+            text.append(_CATEGORY_SAMPLES.get(value, u'x'))
+        elif op == 'groupref':
+            text.append(groups.get(value, u''))
+        # at, assert, assert_not match no characters
+    return u''.join(text)
+
+
+def sample_text(matcher):
+    """
+    :param matcher: behave.matchers.Matcher
+    :return: unicode - one step text matched by matcher (built from its regex), None if it is not known
+    """
+    if isinstance(matcher, matchers.RegexMatcher):
+        regex = matcher.regex
+    elif isinstance(matcher, matchers.ParseMatcher):
+        regex = getattr(matcher.parser, '_match_re', None)
+    else:
+        regex = None
+    if regex is None:
+        return None
+    try:
+        text = _sample(sre_parse.parse(regex.pattern, regex.flags), {})
+    except Exception:  # unexpected regex structure, overlap of such definition is not checked
+        return None
+    return text if matcher.match(text) else None
+
+
+def _chained_pairs(items, key):
+    """
+    :param items: list of entries
+    :param key: callable - str of entry, entries with empty one are skipped
+    :return: generator of pairs of entries where key of one starts with key of the other
+    """
+    items = sorted((item for item in items if key(item)), key=key)
+    for position, item in enumerate(items):
+        for other in items[position + 1:]:
+            if not key(other).startswith(key(item)):  # sorted, so no more keys start with this one
+                break
+            yield item, other
+
+
+class PatternIndex(object):
+    """
+    Step definitions of one step type by literal prefix, or by literal suffix when it is longer
+    (patterns starting with parameter). Patterns without both are tried for every text.
+    """
+    def __init__(self):
+        self.matchers = []  # registration order
+        self.affixes = []  # literal_affixes of matchers
+        self._prefixes = {}  # (prefix, case_insensitive) -> list of (order, matcher)
+        self._suffixes = {}  # (suffix, case_insensitive) -> list of (order, matcher)
+        self._prefix_lengths = []  # sorted distinct lengths of keys
+        self._suffix_lengths = []
+
+    def add(self, matcher):
+        """
+        :type matcher: behave.matchers.Matcher
+        """
+        prefix, suffix, case_insensitive = literal_affixes(matcher)
+        self.affixes.append((prefix, suffix, case_insensitive))
+        if len(suffix) > len(prefix):
+            entries, lengths, literal = self._suffixes, self._suffix_lengths, suffix
+        else:
+            entries, lengths, literal = self._prefixes, self._prefix_lengths, prefix
+        entries.setdefault((literal, case_insensitive), []).append((len(self.matchers), matcher))
+        self.matchers.append(matcher)
+        position = bisect.bisect_left(lengths, len(literal))
+        if position == len(lengths) or lengths[position] != len(literal):
+            lengths.insert(position, len(literal))
+
+    def candidates(self, text):
+        """
+        :param text: unicode - step text
+        :return: list of matchers which can match text, in registration order
+        """
+        folded = text.lower()
+        found = []
+        for length in self._prefix_lengths:
+            if length > len(text):
+                break
+            found.extend(self._prefixes.get((text[:length], False), ()))
+            found.extend(self._prefixes.get((folded[:length], True), ()))
+        for length in self._suffix_lengths:  # suffixes are never empty
+            if length > len(text):
+                break
+            found.extend(self._suffixes.get((text[-length:], False), ()))
+            found.extend(self._suffixes.get((folded[-length:], True), ()))
+        found.sort(key=lambda item: item[0])
+        return [matcher for _, matcher in found]
+
+    def find(self, text):
+        """
+        :param text: unicode - step text
+        :return: behave.matchers.Matcher - the first matching definition or None
+        """
+        for matcher in self.candidates(text):
+            if matcher.match(text):
+                return matcher
+        return None
+
+    def find_all(self, text):
+        """
+        :param text: unicode - step text
+        :return: list of all matching definitions in registration order
+        """
+        return [matcher for matcher in self.candidates(text) if matcher.match(text)]
+
+
+class StepIndex(object):
+    """
+    Usage (before step modules are loaded, for example at import of environment.py):
+        StepIndex(cache_size=1024).install()
+    Registry keeps its steps lists, so formatters and other tools reading registry.steps are not affected.
+    """
+    def __init__(self, cache_size=1024):
+        """
+        :param cache_size: int - number of resolved step texts kept, 0 - no cache
+        """
+        self.cache_size = cache_size
+        self.registry = None
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._indexes = {}
+        self._defined = set()  # (step_type, pattern, filename, line) of registered definitions
+        self._cache = OrderedDict()  # (step_type, step text) -> matcher or None
+        self._reported = set()  # ambiguous sets of definitions already reported
+        self._overlapping = set()  # frozensets of matcher pairs reported by check_overlaps
+        self._overlaps_checked = False
+
+    def install(self, registry=behave_registry):
+        """
+        Index definitions of registry and take over its registration and matching.
+        Installing again to the same registry keeps the first index (environment.py is loaded every run).
+        :type registry: behave.step_registry.StepRegistry
+        :return: StepIndex - installed index
+        """
+        installed = getattr(registry.__dict__.get('find_match'), '__self__', None)
+        if isinstance(installed, StepIndex):
+            return installed
+
+        self.registry = registry
+        self._rebuild()
+        registry.add_step_definition = self.add_step_definition
+        registry.find_step_definition = self.find_step_definition
+        registry.find_match = self.find_match
+        self.logger.debug('Step index installed, %s definitions', len(self._defined))
+        return self
+
+    def uninstall(self):
+        """
+        Registry gets its own registration and matching back.
+        """
+        if self.registry is not None:
+            del self.registry.add_step_definition
+            del self.registry.find_step_definition
+            del self.registry.find_match
+            self.registry = None
+
+    def add_step_definition(self, keyword, step_text, func):
+        """
+        Same checks as in StepRegistry.add_step_definition with index lookups instead of full scans.
+        """
+        self._check_registry()
+        location = Match.make_location(func)
+        step_type = keyword.lower()
+        step_text = _text(step_text)
+        key = (step_type, step_text, location.filename, location.line)
+        # like StepRegistry.same_step_definition: functions compiled from <string> have no real location,
+        # so they are never taken for the same definition
+        if key in self._defined and location.filename != '<string>':
+            return  # the same function registered again, for example by imported step module
+
+        existing = self._indexes[step_type].find(step_text)
+        if existing is not None:
+            existing.step_type = step_type
+            raise AmbiguousStep(u"@%s('%s') has already been defined in\n  existing step %s at %s"
+                                % (step_type, step_text, existing.describe(), existing.location))
+
+        matcher = matchers.get_matcher(func, step_text)
+        self.registry.steps[step_type].append(matcher)
+        self._indexes[step_type].add(matcher)
+        self._defined.add(key)
+        self._cache.clear()
+        self._overlaps_checked = False
+
+    def find_step_definition(self, step):
+        """
+        :type step: behave.model.Step
+        :return: behave.matchers.Matcher - definition of step or None
+        """
+        self._check_registry()
+        if not self._overlaps_checked:
+            self.check_overlaps()
+        key = (step.step_type, step.name)
+        if key in self._cache:
+            self.hits += 1
+            matcher = self._cache.pop(key)
+            self._cache[key] = matcher  # most recently used go last
+            return matcher
+
+        self.misses += 1
+        found = self._indexes[step.step_type].find_all(step.name)
+        if step.step_type != 'step':
+            found += self._indexes['step'].find_all(step.name)
+        if len(found) > 1:
+            self._report_ambiguous(step, found)
+
+        matcher = found[0] if found else None
+        if self.cache_size:
+            self._cache[key] = matcher
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return matcher
+
+    def find_match(self, step):
+        """
+        :type step: behave.model.Step
+        :return: behave.model.Match or None
+        """
+        matcher = self.find_step_definition(step)
+        return matcher.match(step.name) if matcher is not None else None
+
+    def check_overlaps(self):
+        """
+        Report once definitions which match the same step text: of definitions of one step type (or of it and
+        generic step) with compatible literal prefixes or suffixes, one matches sample text of the other.
+        Definitions without literals are not checked. Done automatically before the first step is matched
+        after definitions were added.
+        :return: list of pairs of overlapping matchers
+        """
+        self._overlaps_checked = True
+        entries = {}  # step type -> list of (step type, affixes, matcher, precedence of matcher for step type)
+        for step_type in STEP_TYPES:
+            index = self._indexes[step_type]
+            entries[step_type] = [(step_type, affixes, matcher, (step_type == 'step', position))
+                                  for position, (affixes, matcher) in enumerate(zip(index.affixes, index.matchers))]
+        pairs = []
+        found = set()
+        samples = {}
+
+        def overlap(first, second):
+            for matcher, other in ((first, second), (second, first)):
+                if other not in samples:
+                    samples[other] = sample_text(other)
+                if samples[other] is not None and matcher.match(samples[other]):
+                    return True
+            return False
+
+        for step_type in ('given', 'when', 'then'):
+            items = entries[step_type] + entries['step']
+            candidates = itertools.chain(_chained_pairs(items, lambda item: item[1][0].lower()),
+                                         _chained_pairs(items, lambda item: item[1][1][::-1].lower()))
+            for first, second in candidates:
+                key = frozenset((first[2], second[2]))
+                if key not in found and key not in self._overlapping and may_overlap(first[1], second[1]) and \
+                        overlap(first[2], second[2]):
+                    found.add(key)
+                    pairs.append(sorted((first, second), key=lambda item: item[3]))
+
+        if pairs:
+            self._overlapping.update(found)
+            self.logger.warning('%s pairs of step definitions match the same step text, the first one is used:'
+                                '\n  %s', len(pairs),
+                                '\n  '.join(u'{} and {}'.format(self._describe(first[0], first[2]),
+                                                                 self._describe(second[0], second[2]))
+                                             for first, second in pairs))
+        return [(first[2], second[2]) for first, second in pairs]
+
+    @staticmethod
+    def _describe(step_type, matcher):
+        return u"@{}('{}') at {}".format(step_type, matcher.string, matcher.location)
+
+    def _report_ambiguous(self, step, found):
+        reported = tuple(matcher.describe() for matcher in found)
+        if reported in self._reported:
+            return
+        if all(frozenset(pair) in self._overlapping for pair in itertools.combinations(found, 2)):
+            return  # already reported by check_overlaps
+        self._reported.add(reported)
+        self.logger.warning('Step "%s %s" matches %s definitions, the first one is used:\n  %s',
+                            step.step_type, step.name, len(found),
+                            '\n  '.join(u'{} at {}'.format(matcher.describe(), matcher.location) for matcher in found))
+
+    def _check_registry(self):
+        """
+        Rebuild index when steps lists of registry were changed directly.
+        """
+        if any(len(self.registry.steps[step_type]) != len(self._indexes[step_type].matchers)
+               for step_type in STEP_TYPES):
+            self._rebuild()
+
+    def _rebuild(self):
+        self._indexes = dict((step_type, PatternIndex()) for step_type in STEP_TYPES)
+        self._defined = set()
+        self._cache.clear()
+        self._overlaps_checked = False
+        for step_type in STEP_TYPES:
+            for matcher in self.registry.steps[step_type]:
+                self._indexes[step_type].add(matcher)
+                self._defined.add((step_type, matcher.string, matcher.location.filename, matcher.location.line))
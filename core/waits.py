@@ -0,0 +1,181 @@
+"""
+Wait engines for BasePage:
+    webdriver - selenium WebDriverWait, polls driver every 0.5 sec
+    mutation - condition is checked inside page on every DOM change (MutationObserver), one driver call per wait
+    poll - polling with short first interval and growing backoff
+Mutation engine falls back to polling when browser can not run async script, such browser is remembered and
+later waits poll right away. Script timeout of browser is restored after every mutation wait, code which needs
+other script timeout for the session should set it with MutationWait.set_session_script_timeout.
+"""
+import logging
+import time
+import weakref
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, \
+    WebDriverException
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from core import scripts
+
+WEBDRIVER = 'webdriver'
+MUTATION = 'mutation'
+POLL = 'poll'
+ENGINES = (WEBDRIVER, MUTATION, POLL)
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePoll(object):
+    """
+    Same as WebDriverWait, but first check is repeated quickly and interval grows with every attempt.
+    """
+    IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
+    def __init__(self, browser, timeout, first_interval=0.05, backoff=1.5, max_interval=0.5):
+        """
+        :type browser: selenium.webdriver.*
+        :param timeout: int - seconds to wait
+        :param first_interval: float - seconds between first and second check
+        :param backoff: float - interval multiplier
+        :param max_interval: float - max seconds between checks
+        """
+        self.browser = browser
+        self.timeout = timeout
+        self.first_interval = first_interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+
+    def until(self, condition):
+        """
+        Wait until condition returns value which is not False/None.
+        :param condition: callable taking browser, for example expected_conditions.*(locator)
+        :return: condition result
+        :raise TimeoutException: if condition is not met in time
+        """
+        end_time = time.time() + self.timeout
+        interval = self.first_interval
+        while True:
+            try:
+                value = condition(self.browser)
+                if value:
+                    return value
+            except self.IGNORED_EXCEPTIONS:
+                pass
+            if time.time() + interval > end_time:
+                break
+            time.sleep(interval)
+            interval = min(interval * self.backoff, self.max_interval)
+        raise TimeoutException('Condition was not met in {} seconds'.format(self.timeout))
+
+
+class MutationWait(object):
+    """
+    Waits for locator condition inside browser page with MutationObserver.
+    Supports only expected conditions listed in CONDITIONS.
+    """
+    CONDITIONS = {
+        expected_conditions.presence_of_element_located: 'present',
+        expected_conditions.visibility_of_element_located: 'visible',
+        expected_conditions.element_to_be_clickable: 'clickable',
+        expected_conditions.invisibility_of_element_located: 'gone',
+    }
+    SCRIPT_TIMEOUT_MARGIN = 5  # seconds driver waits for script result after page-side timeout
+    DEFAULT_SCRIPT_TIMEOUT = 0  # script timeout of new session in selenium 2 drivers
+
+    _session_timeouts = weakref.WeakKeyDictionary()  # browser -> script timeout restored after wait
+    _unsupported = weakref.WeakKeyDictionary()  # browsers which can not run async script -> True
+
+    def __init__(self, browser, timeout):
+        """
+        :type browser: selenium.webdriver.*
+        :param timeout: int - seconds to wait
+        """
+        self.browser = browser
+        self.timeout = timeout
+
+    @classmethod
+    def supports(cls, expected_condition):
+        """
+        :type expected_condition: selenium.webdriver.support.expected_conditions.*
+        :return: boolean - True if condition can be checked inside page
+        """
+        return expected_condition in cls.CONDITIONS
+
+    @classmethod
+    def available(cls, browser):
+        """
+        :type browser: selenium.webdriver.*
+        :return: boolean - False if async script already failed in browser
+        """
+        return browser not in cls._unsupported
+
+    @classmethod
+    def disable(cls, browser):
+        """
+        Use polling instead of mutation waits for browser from now on.
+        :type browser: selenium.webdriver.*
+        """
+        cls._unsupported[browser] = True
+
+    @classmethod
+    def set_session_script_timeout(cls, browser, seconds):
+        """
+        Set script timeout of browser which is kept after mutation waits.
+        :type browser: selenium.webdriver.*
+        :param seconds: int - script timeout
+        """
+        browser.set_script_timeout(seconds)
+        cls._session_timeouts[browser] = seconds
+
+    def until(self, locator, expected_condition):
+        """
+        Wait for condition of element found by locator.
+        :type locator: utilities.locator.Locator
+        :type expected_condition: selenium.webdriver.support.expected_conditions.*
+        :return: selenium.webdriver.remote.webelement.WebElement or True for invisibility
+        :raise TimeoutException: if condition is not met in time
+        """
+        self.browser.set_script_timeout(self.timeout + self.SCRIPT_TIMEOUT_MARGIN)
+        try:
+            result = self.browser.execute_async_script(scripts.WAIT_FOR, locator.by, locator.value,
+                                                       self.CONDITIONS[expected_condition], int(self.timeout * 1000))
+        finally:
+            self.browser.set_script_timeout(self._session_timeouts.get(self.browser, self.DEFAULT_SCRIPT_TIMEOUT))
+        if not result or result.get('timeout'):
+            raise TimeoutException('Condition {} of {} was not met in {} seconds'
+                                   .format(self.CONDITIONS[expected_condition], locator, self.timeout))
+        return result.get('element') or result.get('gone')
+
+
+def wait_for(browser, locator, expected_condition, timeout, engine=WEBDRIVER):
+    """
+    Wait for condition of element found by locator with given engine.
+    :type browser: selenium.webdriver.*
+    :type locator: utilities.locator.Locator
+    :type expected_condition: selenium.webdriver.support.expected_conditions.*
+    :param timeout: int - seconds to wait
+    :param engine: str - one of ENGINES
+    :return: result of expected condition
+    """
+    if engine not in ENGINES:
+        raise ValueError('Unknown wait engine: {}'.format(engine))
+
+    if engine == MUTATION and MutationWait.supports(expected_condition) and MutationWait.available(browser):
+        started = time.time()
+        try:
+            return MutationWait(browser, timeout).until(locator, expected_condition)
+        except TimeoutException:
+            raise
+        except WebDriverException as e:  # no async script support, page reloaded while waiting, etc.
+            if 'unload' in str(e).lower():  # page was left while waiting, the next wait can use mutations
+                logger.debug('Mutation wait failed (%s), falling back to polling', str(e).strip())
+            else:
+                logger.info('Async script failed (%s), waits of browser fall back to polling', str(e).strip())
+                MutationWait.disable(browser)
+            timeout = max(timeout - (time.time() - started), 0)
+            engine = POLL
+
+    if engine == POLL or engine == MUTATION:
+        return AdaptivePoll(browser, timeout).until(expected_condition(locator))
+    return WebDriverWait(browser, timeout).until(expected_condition(locator))
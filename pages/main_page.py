@@ -3,10 +3,8 @@ Created on September 18, 2015
 
 @author: oleg-toporkov
 """
-import os
-
 from core.base_page import BasePage
-from utilities.csv_reader import CSVReader
+from utilities.locator_registry import LocatorRegistry
 
 
 class MainPage(BasePage):
@@ -19,7 +17,7 @@ class MainPage(BasePage):
         :type locators_path: str - path to *.def.csv file with locators for this page
         :type browser: selenium.webdriver.*
         """
-        self.locators = CSVReader.read_all(os.path.abspath(locators_path))
+        self.locators = LocatorRegistry.get(locators_path)
         super(MainPage, self).__init__(browser)
 
     def submit_search(self, text):
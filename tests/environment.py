@@ -1,17 +1,26 @@
 """
 Behave search automatically for module named environment.py to load hooks.
-Here we use hooks from base_test (or similar test module) and perform init of all pages for current application.
+Here we use hooks from base_test (or similar test module) and register all pages of current application.
+Pages from pages package are available as context.<snake_case_class_name>, for example context.main_page,
+and are created on first use with locators from <ClassName>.def.csv (see core.page_registry).
+Step definitions are matched by literal prefix index installed before behave loads step modules
+(see core.step_index).
 
 Created on September 18, 2015
 
 @author: oleg-toporkov
 """
 from core import base_test
-from pages import main_page, search_page
+from core.page_registry import PageRegistry
+from core.step_index import StepIndex
+from utilities.config import Config
+
+StepIndex(Config.STEP_CACHE_SIZE).install()
 
 
 def before_all(context):
     base_test.before_all(context)
+    PageRegistry('pages').discover().bind(context)
 
 
 def before_feature(context, feature):
@@ -21,15 +30,6 @@ def before_feature(context, feature):
 def before_scenario(context, scenario):
     base_test.before_scenario(context, scenario)
 
-    # place here pages init
-    context.main_page = main_page.MainPage(
-        'tests/resources/definitions/MainPage.def.csv',
-        context.browser)
-
-    context.search_page = search_page.SearchPage(
-        'tests/resources/definitions/SearchPage.def.csv',
-        context.browser)
-
 
 def before_step(context, step):
     base_test.before_step(context, step)
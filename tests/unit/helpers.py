@@ -0,0 +1,71 @@
+"""
+Helpers of unit tests.
+Tests are run from project root (Config reads config.ini from current folder):
+    python -m pytest tests/unit
+Tests which run behave work on a copy of project in temporary folder, so logs/ of project is not touched.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PROJECT_PARTS = ('core', 'pages', 'utilities', 'log.ini')
+TESTS_PARTS = ('environment.py', 'features', 'resources', 'steps')
+
+
+def copy_project():
+    """
+    Copy framework, features and config to new temporary folder.
+    config.example.ini is used when project has no config.ini.
+    :return: str - path to copy, remove it with shutil.rmtree
+    """
+    target = tempfile.mkdtemp(prefix='bdd_test_')
+    ignore = shutil.ignore_patterns('*.pyc', 'logs')
+    for name in PROJECT_PARTS:
+        source = os.path.join(PROJECT_DIR, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(target, name), ignore=ignore)
+        else:
+            shutil.copy2(source, target)
+    os.makedirs(os.path.join(target, 'tests'))
+    for name in TESTS_PARTS:
+        source = os.path.join(PROJECT_DIR, 'tests', name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(target, 'tests', name), ignore=ignore)
+        else:
+            shutil.copy2(source, os.path.join(target, 'tests'))
+
+    config = os.path.join(PROJECT_DIR, 'config.ini')
+    if not os.path.exists(config):
+        config = os.path.join(PROJECT_DIR, 'config.example.ini')
+    shutil.copy2(config, os.path.join(target, 'config.ini'))
+    return target
+
+
+def run_module(module, args, cwd):
+    """
+    Run python module in separate process.
+    :param module: str - module name for python -m
+    :param args: list of arguments
+    :param cwd: str - working folder
+    :return: tuple (exit code, output)
+    """
+    process = subprocess.Popen([sys.executable, '-m', module] + list(args), cwd=cwd,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    return process.returncode, output
+
+
+class Records(logging.Handler):
+    """
+    Log handler keeping records in memory.
+    """
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+from allure.constants import Status
+from lxml import etree
+
+from core.allure_report import AllureReport
+
+
+class AllureReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logs = tempfile.mkdtemp(prefix='bdd_test_')
+        self.report = AllureReport(self.logs)
+        self.report.start_suite(u'Search ä', labels=[])
+
+    def tearDown(self):
+        shutil.rmtree(self.logs)
+
+    def suite(self):
+        paths = glob.glob(os.path.join(self.logs, '*-testsuite.xml'))
+        self.assertEqual(len(paths), 1)
+        return etree.parse(paths[0]).getroot()
+
+    def run_case(self, name, status):
+        self.report.start_case(name)
+        self.report.stop_case(status)
+
+    def test_suite_is_valid_after_every_case(self):
+        self.assertEqual(self.suite().find('name').text, u'Search ä')
+        for number in range(3):
+            self.run_case(u'case {}'.format(number), Status.PASSED)
+            self.assertEqual([case.find('name').text for case in self.suite().iter('test-case')],
+                             [u'case {}'.format(written) for written in range(number + 1)])
+            self.assertEqual(self.report.testsuite.tests, [])
+
+    def test_stopped_suite(self):
+        self.run_case(u'passed', Status.PASSED)
+        self.run_case(u'failed', Status.FAILED)
+        self.report.stop_suite()
+
+        suite = self.suite()
+        self.assertNotEqual(suite.get('stop'), 'None')
+        self.assertEqual([case.get('status') for case in suite.iter('test-case')], ['passed', 'failed'])
+        self.assertEqual(os.listdir(self.logs), [os.path.basename(path) for path in glob.glob(
+            os.path.join(self.logs, '*-testsuite.xml'))])
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from allure.constants import AttachmentType
+
+from core.allure_report import AllureReport
+from core.artifact_store import ArtifactStore, Manifest
+
+
+class Target(object):
+
+    def __init__(self):
+        self.attachments = []
+
+
+class ArtifactStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logs = tempfile.mkdtemp(prefix='bdd_test_')
+        self.store = ArtifactStore(os.path.join(self.logs, 'artifacts'), max_age_days=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.logs)
+
+    def scenario(self, name, *artifacts):
+        """
+        :param artifacts: tuple (name, object path)
+        :return: str - scenario folder with written manifest
+        """
+        folder = os.path.join(self.logs, name)
+        os.mkdir(folder)
+        manifest = Manifest(folder, name)
+        for artifact, path in artifacts:
+            manifest.add(artifact, path)
+        manifest.write()
+        return folder
+
+    def age(self, path, days):
+        modified = time.time() - days * 24 * 60 * 60
+        os.utime(path, (modified, modified))
+
+    def artifacts(self, folder):
+        with open(os.path.join(folder, Manifest.FILE_NAME)) as _file:
+            return [entry['name'] for entry in json.load(_file)['artifacts']]
+
+    def test_identical_artifacts_are_stored_once(self):
+        self.assertEqual(self.store.put('frame', 'png'), self.store.put('frame', 'png'))
+
+    def test_prune_rewrites_manifests(self):
+        old = self.store.put('old frame', 'png')
+        new = self.store.put('new frame', 'png')
+        self.age(old, 2)
+        mixed = self.scenario('mixed', ('1.png', old), ('2.png', new))
+        expired = self.scenario('expired', ('1.png', old))
+
+        self.assertEqual(self.store.prune(self.logs), 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(self.artifacts(mixed), ['2.png'])
+        self.assertFalse(os.path.exists(expired))
+
+    def test_scenario_folder_with_other_files_is_kept(self):
+        old = self.store.put('old frame', 'png')
+        self.age(old, 2)
+        folder = self.scenario('logged', ('1.png', old))
+        open(os.path.join(folder, 'scenario.log'), 'w').close()
+
+        self.store.prune(self.logs)
+        self.assertEqual(os.listdir(folder), ['scenario.log'])
+
+    def test_report_attachment_is_a_copy(self):
+        report = AllureReport(os.path.join(self.logs, 'allure_report'))
+        path = self.store.put('frame', 'png')
+        target = Target()
+        report.attach_file('frame', path, AttachmentType.PNG, target)
+
+        self.assertEqual(os.stat(path).st_nlink, 1)
+        attached = os.path.join(report.logdir, target.attachments[0].source)
+        with open(attached) as _file:
+            self.assertEqual(_file.read(), 'frame')
@@ -0,0 +1,90 @@
+import unittest
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions
+
+from core import scripts
+from core.base_page import BasePage
+from core.decorators import NO_LOCATOR
+from core.fake_driver import FakeDriver
+from core.locator_stats import LocatorStats
+from tests.unit.test_fake_driver import SITE_DIR
+from utilities.config import Config
+
+LINK = '//nav/a'
+SEARCH_FIELD = '//input[@name="q"]'
+
+
+class ElementCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver(SITE_DIR)
+        self.driver.get('https://github.com/')
+        self.page = BasePage(self.driver)
+        self.page.cache_elements = True
+        self.highlighted = []
+        self.driver._scripts[scripts.HIGHLIGHT] = lambda element, duration: self.highlighted.append(element)
+        self.highlight = Config.HIGHLIGHT
+
+    def tearDown(self):
+        Config.HIGHLIGHT = self.highlight
+
+    def test_cached_element_is_reused(self):
+        element = self.page._get_element(LINK)
+        calls = self.driver.calls
+        self.assertEqual(self.page._get_element(LINK), element)
+        self.assertEqual(self.driver.calls - calls, 0)
+
+    def test_cached_visible_element_is_checked(self):
+        element = self.page._get_element(LINK, expected_conditions.visibility_of_element_located)
+        calls = self.driver.calls
+        self.assertEqual(self.page._get_element(LINK, expected_conditions.visibility_of_element_located), element)
+        self.assertEqual(self.driver.calls - calls, 1)  # check of cached element only
+
+    def test_stale_present_element_is_found_again(self):
+        text = self.page.get_text(LINK)
+        element = self.page._get_element(LINK)
+        self.driver.get('https://github.com/')  # new document, like after click
+        self.assertEqual(self.page.get_text(LINK), text)
+        self.assertNotEqual(self.page._get_element(LINK), element)
+
+    def test_element_of_previous_document_is_not_reused(self):
+        self.assertTrue(self.page.is_present(LINK))
+        self.page.send_enter(SEARCH_FIELD)
+        self.assertIn('/search?', self.driver.current_url)
+        self.assertRaises(TimeoutException, self.page.is_present, LINK, wait=0)
+        self.assertNotIn(LINK, [locator.value for locator, _ in self.page._elements])
+
+    def test_element_not_meeting_condition_is_found_again(self):
+        element = self.page._get_element(LINK, expected_conditions.visibility_of_element_located)
+        element.node.set('style', 'display:none')
+        self.assertTrue(self.page.is_present(LINK))
+        self.assertRaises(TimeoutException, self.page._get_element, LINK,
+                          expected_conditions.visibility_of_element_located, 0)
+        self.assertEqual(len(self.page._elements), 1)  # presence one
+
+    def test_not_element_conditions_are_not_cached(self):
+        self.assertTrue(self.page._get_element('//missing', expected_conditions.invisibility_of_element_located, 0))
+        self.assertEqual(self.page._elements, {})
+
+    def test_cached_element_is_highlighted(self):
+        Config.HIGHLIGHT = True
+        element = self.page._get_element(LINK)
+        self.page._get_element(LINK)
+        self.assertEqual(self.highlighted, [element, element])
+
+
+class ActionStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        driver = FakeDriver(SITE_DIR)
+        driver.get('https://github.com/')
+        self.page = BasePage(driver)
+        self.page.stats = LocatorStats()
+
+    def test_actions_without_single_locator_are_recorded(self):
+        self.page.get_states([LINK, 'css=nav > a'])
+        self.page.switch_to_default_frame()
+        self.assertEqual(sorted((item['locator'], item['actions']) for item in self.page.stats.run.slowest()),
+                         [(NO_LOCATOR, ['switch_to_default_frame']),
+                          ('xpath=//nav/a | css=nav > a', ['get_states'])])
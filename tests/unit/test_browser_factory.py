@@ -0,0 +1,21 @@
+import logging
+import unittest
+
+from core.browser_factory import _firefox, BrowserFactory, BrowserProfile
+from tests.unit.helpers import Records
+
+
+class FirefoxOptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = Records()
+        self.logger = logging.getLogger(BrowserFactory.__name__)
+        self.logger.addHandler(self.records)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.records)
+
+    def test_headless_is_ignored_with_warning(self):
+        profile = BrowserProfile.load('default')._replace(headless=True)
+        self.assertIsNone(_firefox(profile)['firefox_binary'])
+        self.assertEqual([record.levelno for record in self.records.records], [logging.WARNING])
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import unittest
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
+
+from core.base_page import BasePage
+from core.fake_driver import FakeDriver
+from tests.unit.helpers import copy_project, PROJECT_DIR, run_module
+
+SITE_DIR = os.path.join(PROJECT_DIR, 'tests', 'resources', 'fake_site')
+
+
+class FakeDriverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver(SITE_DIR)
+        self.driver.get('https://github.com/')
+
+    def test_page_from_fixture(self):
+        self.assertIn('GitHub', self.driver.title)
+        self.assertEqual(len(self.driver.find_elements(By.CSS_SELECTOR, 'nav a')), 3)
+        self.assertRaises(NoSuchElementException, self.driver.find_element, By.ID, 'missing')
+
+    def test_elements_are_web_elements(self):
+        element = self.driver.find_element(By.NAME, 'q')
+        self.assertIsInstance(element, WebElement)
+        self.assertEqual(element.parent, self.driver)
+        self.assertEqual(element, self.driver.find_element(By.XPATH, '//input[@name="q"]'))
+
+    def test_form_is_submitted_by_enter(self):
+        field = self.driver.find_element(By.NAME, 'q')
+        field.send_keys('user:oleg-toporkov', Keys.ENTER)
+        self.assertIn('/search?', self.driver.current_url)
+        self.assertEqual(len(self.driver.find_elements(By.CSS_SELECTOR, '.repo-list-name a')), 3)
+        self.assertRaises(StaleElementReferenceException, field.is_enabled)
+
+    def test_driver_time_is_counted(self):
+        calls = self.driver.calls
+        self.driver.find_element(By.NAME, 'q').get_attribute('name')
+        self.assertEqual(self.driver.calls, calls + 2)
+        self.assertGreater(self.driver.busy_time, 0)
+
+    def test_page_caches_fake_elements(self):
+        page = BasePage(self.driver)
+        page.cache_elements = True
+        page.is_present('//nav/a')
+        self.assertEqual(len(page._elements), 1)
+
+
+class BenchmarkTest(unittest.TestCase):
+    """
+    Benchmark end to end on fake browser, with element cache on.
+    """
+    def setUp(self):
+        self.project = copy_project()
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+
+    def test_report_is_written(self):
+        code, output = run_module('core.benchmark', ['--runs', '2', '-D', 'element_cache=true', 'tests/features'],
+                                  self.project)
+        self.assertEqual(code, 0, output)
+        with open(os.path.join(self.project, 'logs', 'benchmark.json')) as _file:
+            report = json.load(_file)
+        self.assertEqual(report['runs'], 2)
+        self.assertIn('hook.before_scenario', report['overhead'])
+        self.assertTrue([name for name in report['overhead'] if name.startswith('action.')], report['overhead'])
+
+        baseline = os.path.join(self.project, 'baseline.json')
+        shutil.copy(os.path.join(self.project, 'logs', 'benchmark.json'), baseline)
+        code, output = run_module('core.benchmark', ['--runs', '1', '--baseline', baseline, '--max-regression', '100',
+                                                     'tests/features'], self.project)
+        self.assertEqual(code, 0, output)
@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from utilities.locator_registry import LocatorRegistry
+
+
+class LocatorRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='bdd_test_')
+
+    def tearDown(self):
+        LocatorRegistry.clear()
+        shutil.rmtree(self.folder)
+
+    def definitions(self, *rows):
+        path = os.path.join(self.folder, 'Page.def.csv')
+        with open(path, 'w') as _file:
+            _file.write('\n'.join(('Name,Value',) + rows) + '\n')
+        return path
+
+    def test_valid_locators(self):
+        for locator in ('//nav/a[1]', 'css=nav > a.selected', 'id=search', 'name=q'):
+            LocatorRegistry.validate(locator)
+
+    def test_invalid_xpath(self):
+        self.assertRaises(ValueError, LocatorRegistry.validate, '//nav/a[')
+
+    def test_invalid_css(self):
+        self.assertRaises(ValueError, LocatorRegistry.validate, 'css=nav > a[')
+
+    def test_empty_value(self):
+        self.assertRaises(ValueError, LocatorRegistry.validate, 'id=')
+
+    def test_invalid_locator_fails_at_load(self):
+        path = self.definitions('Link,//nav/a', 'Broken,//nav/a[')
+        self.assertRaises(ValueError, LocatorRegistry.get, path)
+        self.assertEqual(list(LocatorRegistry.get(self.definitions('Link,//nav/a'))), ['Link'])
@@ -0,0 +1,45 @@
+import os
+import shutil
+import unittest
+
+from core.parallel_runner import collect_scenarios, partition
+from tests.unit.helpers import copy_project, PROJECT_DIR, run_module
+
+
+class CollectScenariosTest(unittest.TestCase):
+
+    def test_locations_are_absolute(self):  # behave resolves @file paths relative to the file folder
+        locations = collect_scenarios([os.path.relpath(os.path.join(PROJECT_DIR, 'tests', 'features'))])
+        self.assertTrue(locations)
+        for location in locations:
+            path, _, line = location.rpartition(':')
+            self.assertTrue(os.path.isabs(path), location)
+            self.assertTrue(os.path.isfile(path), location)
+            self.assertTrue(line.isdigit(), location)
+
+    def test_partition_skips_empty_chunks(self):
+        self.assertEqual(partition(['a', 'b', 'c'], 2), [['a', 'c'], ['b']])
+        self.assertEqual(partition(['a'], 3), [['a']])
+
+
+class ParallelRunTest(unittest.TestCase):
+    """
+    Documented usage end to end with fake browser.
+    """
+    def setUp(self):
+        self.project = copy_project()
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+
+    def test_workers_pass_and_results_are_merged(self):
+        code, output = run_module('core.parallel_runner', ['-D', 'browser=fake', '-D', 'workers=2', 'tests/features'],
+                                  self.project)
+        self.assertEqual(code, 0, output)
+
+        worker_dir = os.path.join(self.project, 'logs', 'worker_0')
+        with open(os.path.join(worker_dir, 'behave_output.txt')) as _file:
+            self.assertIn('1 scenario passed', _file.read())
+
+        report = os.listdir(os.path.join(self.project, 'logs', 'allure_report'))
+        self.assertTrue([name for name in report if name.endswith('-testsuite.xml')], report)
@@ -0,0 +1,173 @@
+import BaseHTTPServer
+import errno
+import httplib
+import json
+import logging
+import socket
+import SocketServer
+import threading
+import time
+import unittest
+
+from selenium.common.exceptions import WebDriverException
+
+from core.remote_driver import PooledConnection, RemoteBrowser
+from tests.unit.helpers import Records
+from utilities.config import Config
+
+
+def reply(status=200, value=None, error=0, delay=0, close=None, page=None):
+    """
+    :return: dict - response of stand-in hub: http status, json wire protocol error code and value,
+    seconds before response, close - close connection 'before' or 'after' response, page - html instead of json
+    """
+    return {'status': status, 'value': value, 'error': error, 'delay': delay, 'close': close, 'page': page}
+
+
+class HubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.requests.append((self.client_address, self.command, self.path))
+        queued = self.server.replies.get(self.path)
+        response = queued.pop(0) if queued else reply()
+        time.sleep(response['delay'])
+        if response['close']:
+            self.close_connection = 1
+            if response['close'] == 'before':
+                return
+        data = response['page'] or json.dumps({'status': response['error'], 'sessionId': 'session-1',
+                                               'value': response['value']})
+        self.send_response(response['status'])
+        self.send_header('Content-Type', 'text/html' if response['page'] else 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_POST = do_DELETE = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class Hub(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Stand-in Selenium Grid hub. replies: path -> list of replies for next requests, default is success.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), HubHandler)
+        self.requests = []  # (client address, method, path)
+        self.replies = {}
+        self.url = 'http://127.0.0.1:{}/wd/hub'.format(self.server_port)
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def paths(self):
+        return [path for _, _, path in self.requests]
+
+    def connections(self):
+        return set(address for address, _, _ in self.requests)
+
+
+class HubTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.timeout = Config.REMOTE_TIMEOUT
+        Config.REMOTE_TIMEOUT = 0.5
+        PooledConnection.close_all()
+        self.hub = Hub()
+
+    def tearDown(self):
+        PooledConnection.close_all()
+        Config.REMOTE_TIMEOUT = self.timeout
+        self.hub.stop()
+
+
+class PooledConnectionTest(HubTestCase):
+
+    def setUp(self):
+        HubTestCase.setUp(self)
+        self.connection = PooledConnection(self.hub.url)
+        self.url = self.hub.url + '/session/session-1/'
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.connection._request('GET', self.url + 'title')['status'], 0)
+        self.assertEqual(len(self.hub.connections()), 1)
+
+    def test_connection_closed_by_hub_while_idle_is_not_used(self):
+        self.hub.replies['/wd/hub/session/session-1/url'] = [reply(close='after')]
+        self.connection._request('POST', self.url + 'url', '{}')
+        time.sleep(0.1)
+        self.connection._request('GET', self.url + 'title')
+        self.assertEqual(self.hub.paths().count('/wd/hub/session/session-1/title'), 1)
+        self.assertEqual(len(self.hub.connections()), 2)
+
+    def test_reused_connection_closed_without_response_is_replaced(self):
+        self.connection._request('GET', self.url + 'title')
+        self.hub.replies['/wd/hub/session/session-1/url'] = [reply(close='before')]
+        self.assertEqual(self.connection._request('POST', self.url + 'url', '{}')['status'], 0)
+        self.assertEqual(self.hub.paths().count('/wd/hub/session/session-1/url'), 2)
+
+    def test_new_connection_failure_is_not_retried(self):
+        self.hub.replies['/wd/hub/session/session-1/title'] = [reply(close='before')]
+        self.assertRaises(httplib.BadStatusLine, self.connection._request, 'GET', self.url + 'title')
+        self.assertEqual(len(self.hub.requests), 1)
+
+    def test_timed_out_command_is_not_sent_again(self):
+        self.connection._request('GET', self.url + 'title')
+        self.hub.replies['/wd/hub/session/session-1/element/1/click'] = [reply(delay=1)]
+        self.assertRaises(socket.timeout, self.connection._request, 'POST', self.url + 'element/1/click', '{}')
+        self.assertEqual(self.hub.paths().count('/wd/hub/session/session-1/element/1/click'), 1)
+
+
+class StartSessionTest(HubTestCase):
+    NEW_SESSION = '/wd/hub/session'
+    BUSY = 'Error forwarding the new session Request timed out waiting for a node to become available.'
+
+    def start(self, hub_url=None):
+        return RemoteBrowser({'browserName': 'chrome'}, hub_url=hub_url or self.hub.url, retries=2, retry_delay=0.01)
+
+    def test_session_is_started_when_node_is_free(self):
+        self.hub.replies[self.NEW_SESSION] = [reply(500, {'message': self.BUSY}, 13)] * 2
+        browser = self.start()
+        self.assertEqual(browser.session_id, 'session-1')
+        self.assertEqual(self.hub.paths().count(self.NEW_SESSION), 3)
+        self.assertEqual(len(self.hub.connections()), 1)
+
+    def test_session_is_retried_after_error_page(self):
+        self.hub.replies[self.NEW_SESSION] = [reply(503, page='<html>Service Unavailable</html>')]
+        self.assertEqual(self.start().session_id, 'session-1')
+        self.assertEqual(self.hub.paths().count(self.NEW_SESSION), 2)
+
+    def test_permanent_error_is_not_retried(self):
+        message = 'Error forwarding the new session cannot find : Capabilities [{browserName=chrome}]'
+        self.hub.replies[self.NEW_SESSION] = [reply(500, {'message': message}, 33)]
+        self.assertRaises(WebDriverException, self.start)
+        self.assertEqual(self.hub.paths().count(self.NEW_SESSION), 1)
+
+    def test_timed_out_session_is_not_retried(self):
+        self.hub.replies[self.NEW_SESSION] = [reply(delay=1)]
+        self.assertRaises(socket.timeout, self.start)
+        self.assertEqual(self.hub.paths().count(self.NEW_SESSION), 1)
+
+    def test_refused_connection_is_retried(self):
+        url = self.hub.url
+        self.hub.stop()
+        records = Records()
+        logging.getLogger('RemoteBrowser').addHandler(records)
+        try:
+            with self.assertRaises(socket.error) as raised:
+                self.start(url)
+        finally:
+            logging.getLogger('RemoteBrowser').removeHandler(records)
+        self.assertEqual(raised.exception.errno, errno.ECONNREFUSED)
+        self.assertEqual(len(records.records), 2)  # warning per retry
@@ -0,0 +1,74 @@
+import threading
+import unittest
+
+from core.screenshot_writer import ScreenshotWriter
+
+
+class Allure(object):
+
+    def current(self):
+        return None
+
+    def attach_file(self, title, path, attachment_type, target):
+        pass
+
+
+class Store(object):
+    """
+    Artifact store which writes only when released.
+    """
+    def __init__(self):
+        self.writing = threading.Event()
+        self.released = threading.Event()
+
+    def put(self, data, extension):
+        self.writing.set()
+        self.released.wait(5)
+        return '{}.{}'.format(data, extension)
+
+
+class Manifest(object):
+
+    def __init__(self):
+        self.names = []
+
+    def add(self, name, path, title):
+        self.names.append(name)
+
+
+class ScreenshotWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = Store()
+        self.manifest = Manifest()
+        self.writer = ScreenshotWriter(Allure(), self.store, max_size=1, backpressure=ScreenshotWriter.DROP)
+
+    def tearDown(self):
+        self.store.released.set()
+        self.writer.close()
+
+    def fill_queue(self):
+        self.writer.submit(self.manifest, 'first', 'png', 'first')
+        self.store.writing.wait(5)  # taken by writer thread
+        self.assertTrue(self.writer.submit(self.manifest, 'second', 'png', 'second'))
+
+    def test_screenshot_is_dropped_when_queue_is_full(self):
+        self.fill_queue()
+        self.assertFalse(self.writer.submit(self.manifest, 'third', 'png', 'third'))
+        self.store.released.set()
+        self.writer.flush()
+        self.assertEqual(self.manifest.names, ['first', 'second'])
+        self.assertEqual(self.writer.dropped, 1)
+
+    def test_blocking_screenshot_is_not_dropped(self):
+        self.fill_queue()
+        submit = threading.Thread(target=self.writer.submit, args=(self.manifest, '__Fail.png', 'png', 'fail'),
+                                  kwargs={'block': True})
+        submit.start()
+        submit.join(0.2)
+        self.assertTrue(submit.is_alive())  # waits for place in queue
+        self.store.released.set()
+        submit.join(5)
+        self.writer.flush()
+        self.assertEqual(self.manifest.names, ['first', 'second', '__Fail.png'])
+        self.assertEqual(self.writer.dropped, 0)
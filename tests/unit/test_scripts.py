@@ -0,0 +1,66 @@
+import json
+import subprocess
+import unittest
+
+from core import scripts
+
+try:
+    NODE = subprocess.check_output(['node', '--version']) and 'node'
+except (OSError, subprocess.CalledProcessError):
+    NODE = None
+
+# Minimal DOM element and manual timers for running framework scripts in node
+HARNESS = """
+var timers = [], nextTimer = 1;
+function setTimeout(callback, delay) { timers.push({id: nextTimer, callback: callback}); return nextTimer++; }
+function clearTimeout(id) { timers = timers.filter(function (timer) { return timer.id !== id; }); }
+function runTimers() { var due = timers; timers = []; due.forEach(function (timer) { timer.callback(); }); }
+function Element(style) { this.attributes = style === null ? {} : {style: style}; }
+Element.prototype.getAttribute = function (name) {
+    return this.attributes.hasOwnProperty(name) ? this.attributes[name] : null;
+};
+Element.prototype.setAttribute = function (name, value) { this.attributes[name] = value; };
+Element.prototype.removeAttribute = function (name) { delete this.attributes[name]; };
+Element.prototype.scrollIntoView = function () {};
+function run(script, args) { return new Function(script).apply(null, args); }
+"""
+
+
+@unittest.skipUnless(NODE, 'node is not installed')
+class HighlightTest(unittest.TestCase):
+
+    def run_node(self, code):
+        source = HARNESS + 'var HIGHLIGHT = {};\n{}'.format(json.dumps(scripts.HIGHLIGHT), code)
+        return json.loads(subprocess.check_output([NODE, '-e', source]))
+
+    def test_style_is_restored(self):
+        result = self.run_node("""
+            var element = new Element('width: 10px');
+            run(HIGHLIGHT, [element, 1000]);
+            var highlighted = element.getAttribute('style');
+            runTimers();
+            console.log(JSON.stringify([highlighted, element.getAttribute('style')]));
+        """)
+        self.assertIn('border: 5px solid red', result[0])
+        self.assertEqual(result[1], 'width: 10px')
+
+    def test_missing_style_is_removed(self):
+        result = self.run_node("""
+            var element = new Element(null);
+            run(HIGHLIGHT, [element, 1000]);
+            runTimers();
+            console.log(JSON.stringify(element.getAttribute('style')));
+        """)
+        self.assertIsNone(result)
+
+    def test_repeated_highlight_restores_original_style(self):
+        result = self.run_node("""
+            var element = new Element('width: 10px');
+            run(HIGHLIGHT, [element, 1000]);
+            run(HIGHLIGHT, [element, 1000]);
+            var pending = timers.length;
+            runTimers();
+            runTimers();
+            console.log(JSON.stringify([pending, element.getAttribute('style')]));
+        """)
+        self.assertEqual(result, [1, 'width: 10px'])
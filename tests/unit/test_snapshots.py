@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from behave.parser import parse_feature
+from selenium.common.exceptions import WebDriverException
+
+from core import scripts, snapshots
+from core.fake_driver import FakeDriver
+from core.snapshots import SnapshotStore
+from tests.unit.test_fake_driver import SITE_DIR
+
+FEATURE = u"""
+Feature: Search
+
+  Background:
+    Given I open Github URL in browser
+
+  Scenario: Search by user name
+    Given I log in as "{user}"
+    When I search "user"
+    Then I see results
+"""
+
+URL = 'https://github.com/'
+COOKIE = {'name': 'session', 'value': '42', 'path': '/'}
+
+
+class BrokenBrowser(FakeDriver):
+    """
+    Browser which fails every navigation and cleanup.
+    """
+    def get(self, url):
+        raise WebDriverException('browser is gone')
+
+    def delete_all_cookies(self):
+        raise WebDriverException('browser is gone')
+
+
+def scenario(user='admin'):
+    return parse_feature(FEATURE.format(user=user)).scenarios[0]
+
+
+def key(item):
+    background, steps = snapshots.setup_steps(item)
+    return snapshots.snapshot_key(background + steps, 'fake', URL)
+
+
+class SnapshotStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='bdd_test_')
+        self.store = SnapshotStore(self.folder, ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def save(self, item):
+        browser = FakeDriver(SITE_DIR)
+        browser.get(URL)
+        browser.add_cookie(COOKIE)
+        browser.execute_script(scripts.SET_STORAGE, {'token': 'a'}, {'tab': 'b'})
+        self.store.put(key(item), snapshots.capture(browser))
+
+    def test_setup_is_restored(self):
+        self.save(scenario())
+        item = scenario()
+        browser = FakeDriver(SITE_DIR)
+        self.assertTrue(self.store.fast_forward(browser, item, key(item)))
+
+        self.assertEqual(browser.current_url, URL)
+        self.assertEqual(browser.get_cookies(), [COOKIE])
+        self.assertEqual(browser.execute_script(scripts.GET_STORAGE),
+                         {'local': {'token': 'a'}, 'session': {'tab': 'b'}})
+        self.assertEqual(item.background_steps, [])
+        self.assertEqual([step.step_type for step in item.steps], ['when', 'then'])
+
+    def test_expired_snapshot_is_not_used(self):
+        item = scenario()
+        self.save(item)
+        expired = time.time() - 61
+        os.utime(os.path.join(self.folder, key(item) + '.json'), (expired, expired))
+
+        self.assertFalse(self.store.fast_forward(FakeDriver(SITE_DIR), item, key(item)))
+        self.assertEqual(len(item.steps), 3)
+
+    def test_edited_step_text_changes_key(self):
+        self.save(scenario())
+        self.assertEqual(key(scenario()), key(scenario()))
+        edited = scenario(user='guest')
+        self.assertNotEqual(key(edited), key(scenario()))
+        self.assertFalse(self.store.fast_forward(FakeDriver(SITE_DIR), edited, key(edited)))
+
+    def test_failed_restore_runs_setup(self):
+        item = scenario()
+        self.save(item)
+        self.assertFalse(self.store.fast_forward(BrokenBrowser(SITE_DIR), item, key(item)))
+        self.assertEqual(len(item.steps), 3)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import itertools
+import unittest
+
+from behave import matchers
+from behave.model import Step
+from behave.step_registry import AmbiguousStep, StepRegistry
+
+from core.step_index import literal_affixes, sample_text, StepIndex
+from tests.unit.helpers import Records
+
+DEFINITIONS = [
+    ('given', 're', u"(?i)I click Button"),
+    ('when', 're', u"I press (?i)enter key"),
+    ('then', 're', u"(?x)I type \\ spaced"),
+    ('step', 're', u"(?s)I see (.*) lines"),
+    ('given', 're', u"(?iu)I see Ä text"),
+    ('when', 're', u"I pay \\$(\\d+)\\.(\\d\\d)"),
+    ('then', 're', u"I select [A-C]lass item"),
+    ('step', 're', u"I choose [\\]x] bracket"),
+    ('given', 're', u"I (?:open|close) the door"),
+    ('when', 're', u"the (user|admin) logs in"),
+    ('then', 're', u"logs out|signs out"),
+    ('step', 're', u"I wait (\\d+) seconds?"),
+    ('given', 're', u"(?P<name>\\w+) is shown"),
+    ('when', 're', u"I search '(.*)' text"),
+    ('when', 're', u"I search 'GitHub' text"),  # already defined by previous one
+    ('step', 'parse', u"I have {count:d} Apples"),
+    ('given', 'parse', u"{user} opens {page} page"),
+    ('when', 'parse', u"I see {{braces}} {value}"),
+    ('when', 'parse', u"I see {{braces}} twice"),
+]
+
+TEXTS = [
+    u"I click Button", u"i click button", u"I CLICK BUTTON", u"I click buttons", u"I press ENTER KEY",
+    u"i press enter key", u"Itype spaced", u"I type spaced", u"I see a\nb lines", u"I see Ä text", u"i see ä text",
+    u"I pay $12.50", u"I pay $12x50", u"I select Blass item", u"I select Dlass item", u"I choose ] bracket",
+    u"I choose x bracket", u"I close the door", u"the admin logs in", u"signs out", u"logs out", u"I wait 1 second",
+    u"I wait 10 seconds", u"Menu is shown", u"I search 'GitHub' text", u"i have 3 apples", u"Bob opens main page",
+    u"I see {braces} 1", u"I see {braces} twice", u"nothing",
+]
+
+STEP_TYPES = ('given', 'when', 'then', 'step')
+
+
+def definitions(items):
+    """
+    :param items: list of (step type, matcher kind, pattern)
+    :return: list of (step type, matcher kind, pattern, function), every function has its own location
+    """
+    source = '\n'.join('def step_{}(context, *args, **kwargs): pass'.format(number)
+                       for number in range(len(items)))
+    namespace = {}
+    exec compile(source, 'steps.py', 'exec') in namespace
+    return [(step_type, kind, pattern, namespace['step_{}'.format(number)])
+            for number, (step_type, kind, pattern) in enumerate(items)]
+
+
+def fill(registry, items=DEFINITIONS):
+    """
+    :return: list of patterns rejected as already defined
+    """
+    rejected = []
+    try:
+        for step_type, kind, pattern, func in definitions(items):
+            matchers.use_step_matcher(kind)
+            try:
+                registry.add_step_definition(step_type, pattern, func)
+            except AmbiguousStep:
+                rejected.append(pattern)
+    finally:
+        matchers.use_step_matcher('parse')
+    return rejected
+
+
+def describe(match):
+    if match is None:
+        return None
+    return match.func.__name__, [(argument.name, argument.value) for argument in match.arguments]
+
+
+class LiteralAffixesTest(unittest.TestCase):
+
+    def affixes(self, pattern, matcher=matchers.RegexMatcher):
+        return literal_affixes(matcher(lambda context: None, pattern))
+
+    def test_regex(self):
+        self.assertEqual(self.affixes(u"I search '(.*)' text"), (u"I search '", u"' text", False))
+        self.assertEqual(self.affixes(u"I (a|b) x[)|]{2}")[:2], (u"I ", u""))
+        self.assertEqual(self.affixes(u"\\$ costs \\d+ ab{}")[:2], (u"$ costs ", u" ab{}"))
+        self.assertEqual(self.affixes(u"a|b")[:2], (u"", u""))
+
+    def test_inline_flags(self):
+        self.assertEqual(self.affixes(u"(?i)I click Button"), (u"i click button", u"i click button", True))
+        self.assertEqual(self.affixes(u"I press (?im)Enter"), (u"i press enter", u"i press enter", True))
+        self.assertEqual(self.affixes(u"(?s)I see (.*)"), (u"I see ", u"", False))
+        self.assertEqual(self.affixes(u"(?x)I type"), (u"", u"", False))
+
+    def test_parse(self):
+        self.assertEqual(self.affixes(u"I have {{x}} {n:d} Items", matchers.ParseMatcher),
+                         (u"i have {x} ", u" items", True))
+
+    def test_sample_text(self):
+        for step_type, kind, pattern, func in definitions(DEFINITIONS):
+            matcher = (matchers.RegexMatcher if kind == 're' else matchers.ParseMatcher)(func, pattern)
+            self.assertIsNotNone(matcher.match(sample_text(matcher)), pattern)
+
+
+class StepIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = StepRegistry()
+        self.registry_rejected = fill(self.registry)
+        self.indexed = StepRegistry()
+        self.index = StepIndex(cache_size=256).install(self.indexed)
+        self.indexed_rejected = fill(self.indexed)
+
+    def test_same_definitions_are_rejected(self):
+        self.assertEqual(self.indexed_rejected, self.registry_rejected)
+        self.assertEqual(self.indexed_rejected, [u"I search 'GitHub' text"])
+        for step_type in STEP_TYPES:
+            self.assertEqual([matcher.string for matcher in self.indexed.steps[step_type]],
+                             [matcher.string for matcher in self.registry.steps[step_type]])
+
+    def test_same_matches_as_registry(self):
+        for _ in range(2):  # the second time from cache
+            for step_type, text in itertools.product(STEP_TYPES, TEXTS):
+                step = Step('test.feature', 1, unicode(step_type.title()), step_type, text)
+                self.assertEqual(describe(self.index.find_match(step)), describe(self.registry.find_match(step)),
+                                 u'{} {}'.format(step_type, text))
+        self.assertGreater(self.index.hits, 0)
+
+    def test_flagged_pattern_is_found(self):
+        step = Step('test.feature', 1, u'Given', 'given', u"i click button")
+        self.assertEqual(describe(self.index.find_match(step)), ('step_0', []))
+
+    def test_uninstall(self):
+        self.index.uninstall()
+        self.assertNotIn('find_match', self.indexed.__dict__)
+
+    def test_overlapping_definitions(self):
+        self.assertEqual([(first.string, second.string) for first, second in self.index.check_overlaps()],
+                         [(u"I see {{braces}} {value}", u"I see {{braces}} twice")])
+        self.assertEqual(self.index.check_overlaps(), [])  # reported once
+
+    def test_overlap_with_generic_step_is_reported_before_first_step(self):
+        registry = StepRegistry()
+        index = StepIndex().install(registry)
+        fill(registry, [('step', 're', u"I click button"), ('given', 're', u"I click (.*)"),
+                        ('when', 're', u"I click (\\d+) times")])
+        records = Records()
+        index.logger.addHandler(records)
+        try:
+            for _ in range(2):
+                index.find_match(Step('test.feature', 1, u'Given', 'given', u"I click button"))
+        finally:
+            index.logger.removeHandler(records)
+        self.assertEqual(len(records.records), 1)
+        self.assertIn(u"@given('I click (.*)') at steps.py:2 and @step('I click button') at steps.py:1",
+                      records.records[0].getMessage())
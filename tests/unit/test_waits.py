@@ -0,0 +1,64 @@
+import unittest
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support import expected_conditions
+
+from core import waits
+from core.fake_driver import FakeDriver
+from tests.unit.test_fake_driver import SITE_DIR
+from utilities.locator import Locator
+
+LINK = Locator.parse('//nav/a')
+
+
+class Browser(FakeDriver):
+    """
+    Fake browser which records script timeouts and runs async script with given result or error.
+    """
+    def __init__(self, result=None, error=None):
+        FakeDriver.__init__(self, SITE_DIR)
+        self.result = result
+        self.error = error
+        self.script_timeouts = []
+        self.async_scripts = 0
+
+    def set_script_timeout(self, time_to_wait):
+        self.script_timeouts.append(time_to_wait)
+
+    def execute_async_script(self, script, *args):
+        self.async_scripts += 1
+        if self.error is not None:
+            raise WebDriverException(self.error)
+        return self.result
+
+
+class MutationWaitTest(unittest.TestCase):
+
+    def wait(self, browser):
+        return waits.wait_for(browser, LINK, expected_conditions.presence_of_element_located, 1, waits.MUTATION)
+
+    def test_script_timeout_is_restored(self):
+        browser = Browser(result={'element': 'link'})
+        self.assertEqual(self.wait(browser), 'link')
+        self.assertEqual(browser.script_timeouts, [6, waits.MutationWait.DEFAULT_SCRIPT_TIMEOUT])
+
+    def test_session_script_timeout_is_restored(self):
+        browser = Browser(result={'element': 'link'})
+        waits.MutationWait.set_session_script_timeout(browser, 30)
+        self.wait(browser)
+        self.assertEqual(browser.script_timeouts, [30, 6, 30])
+
+    def test_browser_without_async_scripts_is_remembered(self):
+        browser = Browser(error='Async scripts are not supported')
+        browser.get('https://github.com/')
+        for _ in range(3):
+            self.assertEqual(self.wait(browser).tag_name, 'a')  # found by polling
+        self.assertEqual(browser.async_scripts, 1)
+        self.assertEqual(browser.script_timeouts, [6, waits.MutationWait.DEFAULT_SCRIPT_TIMEOUT])
+
+    def test_page_unload_does_not_disable_mutation_wait(self):
+        browser = Browser(error='javascript error: document unloaded while waiting for result')
+        browser.get('https://github.com/')
+        self.wait(browser)
+        self.wait(browser)
+        self.assertEqual(browser.async_scripts, 2)
@@ -8,6 +8,20 @@ import os
 import selenium.webdriver as webdriver
 
 
+def _option(config, section, option, default, getter=ConfigParser.ConfigParser.get):
+    """
+    Read optional value from config.ini.
+    :param config: ConfigParser.ConfigParser
+    :param section: str - section name
+    :param option: str - option name
+    :param default: value returned if option is missing
+    :param getter: ConfigParser method used for reading (get, getint, getfloat, getboolean)
+    """
+    if config.has_option(section, option):
+        return getter(config, section, option)
+    return default
+
+
 class Config(object):
     """
     Config class for storing values from config.ini and browser types.
@@ -16,11 +30,64 @@ class Config(object):
         dict(chrome=webdriver.Chrome, firefox=webdriver.Firefox, ie=webdriver.Ie, phantomjs=webdriver.PhantomJS)
     config = ConfigParser.ConfigParser()
     config.read('config.ini')
-    
+
     BROWSER = config.get('SELENIUM', 'Browser').lower()
+    BROWSER_PROFILE = _option(config, 'SELENIUM', 'Profile', 'default')
     HIGHLIGHT = config.getboolean('SELENIUM', 'Highlight')
+    HIGHLIGHT_DURATION = _option(config, 'SELENIUM', 'HighlightDuration', 1000, ConfigParser.ConfigParser.getint)
     REUSE = config.getboolean('SELENIUM', 'Reuse')
+    ELEMENT_CACHE = _option(config, 'SELENIUM', 'ElementCache', False, ConfigParser.ConfigParser.getboolean)
+    WAIT_ENGINE = _option(config, 'SELENIUM', 'WaitEngine', 'webdriver').lower()
+    LOCATOR_STATS = _option(config, 'SELENIUM', 'LocatorStats', True, ConfigParser.ConfigParser.getboolean)
+    TRACE_COMMANDS = _option(config, 'SELENIUM', 'TraceCommands', False, ConfigParser.ConfigParser.getboolean)
 
     APP_URL = config.get('APPLICATION', 'URL')
+    DEFINITIONS_DIR = _option(config, 'APPLICATION', 'Definitions', 'tests/resources/definitions')
+    STEP_CACHE_SIZE = _option(config, 'APPLICATION', 'StepCacheSize', 1024, ConfigParser.ConfigParser.getint)
+
+    POOL_SIZE = _option(config, 'POOL', 'Size', 0, ConfigParser.ConfigParser.getint)
+    POOL_PREWARM = _option(config, 'POOL', 'Prewarm', 0, ConfigParser.ConfigParser.getint)
+    POOL_TIMEOUT = _option(config, 'POOL', 'Timeout', 120, ConfigParser.ConfigParser.getint)
+
+    SCREENSHOT_QUEUE_SIZE = _option(config, 'SCREENSHOTS', 'QueueSize', 16, ConfigParser.ConfigParser.getint)
+    SCREENSHOT_BACKPRESSURE = _option(config, 'SCREENSHOTS', 'Backpressure', 'block').lower()
+    SCREENSHOT_POLICY = _option(config, 'SCREENSHOTS', 'Policy', 'always').lower()
+    SCREENSHOT_EVERY_N_STEPS = _option(config, 'SCREENSHOTS', 'EveryNSteps', 5, ConfigParser.ConfigParser.getint)
+
+    ARTIFACTS_DIR = os.path.abspath(_option(config, 'ARTIFACTS', 'Dir', 'logs/artifacts'))
+    ARTIFACT_COMPRESSION = _option(config, 'ARTIFACTS', 'Compression', 'none').lower()
+    ARTIFACT_MAX_AGE_DAYS = _option(config, 'ARTIFACTS', 'MaxAgeDays', 0, ConfigParser.ConfigParser.getint)
+    ARTIFACT_MAX_SIZE_MB = _option(config, 'ARTIFACTS', 'MaxSizeMB', 0, ConfigParser.ConfigParser.getint)
+
+    DURATION_HISTORY = os.path.abspath(_option(config, 'SHARDING', 'History', 'logs/scenario_durations.json'))
+
+    RESULTS_DB = os.path.abspath(_option(config, 'RESULTS', 'Database', 'logs/results.db'))
+    RUN_MODE = _option(config, 'RESULTS', 'RunMode', 'all').lower()
+
+    PROXY_MODE = _option(config, 'PROXY', 'Mode', 'off').lower()
+    PROXY_ARCHIVE = os.path.abspath(_option(config, 'PROXY', 'Archive', 'tests/resources/http_archive'))
+    PROXY_PORT = _option(config, 'PROXY', 'Port', 0, ConfigParser.ConfigParser.getint)
+    PROXY_MATCH_BODY = _option(config, 'PROXY', 'MatchBody', False, ConfigParser.ConfigParser.getboolean)
+    PROXY_IGNORE_PARAMS = _option(config, 'PROXY', 'IgnoreParams', '')
+    PROXY_STRIP_HEADERS = _option(config, 'PROXY', 'StripHeaders', 'Date, Age, Expires')
+    PROXY_CERT_FILE = _option(config, 'PROXY', 'CertFile', '')
+    PROXY_KEY_FILE = _option(config, 'PROXY', 'KeyFile', '')
+    PROXY_ADDRESS = None  # host:port of running proxy, set by before_all
+
+    REMOTE_HUB_URL = _option(config, 'REMOTE', 'HubUrl', 'http://127.0.0.1:4444/wd/hub')
+    REMOTE_BROWSER = _option(config, 'REMOTE', 'Browser', 'chrome').lower()
+    REMOTE_CAPABILITIES = _option(config, 'REMOTE', 'Capabilities', '')
+    REMOTE_POOL_SIZE = _option(config, 'REMOTE', 'PoolSize', 8, ConfigParser.ConfigParser.getint)
+    REMOTE_TIMEOUT = _option(config, 'REMOTE', 'Timeout', 120, ConfigParser.ConfigParser.getint)
+    REMOTE_RETRIES = _option(config, 'REMOTE', 'Retries', 3, ConfigParser.ConfigParser.getint)
+    REMOTE_RETRY_DELAY = _option(config, 'REMOTE', 'RetryDelay', 5.0, ConfigParser.ConfigParser.getfloat)
+
+    SNAPSHOT_DIR = os.path.abspath(_option(config, 'SNAPSHOTS', 'Dir', 'logs/snapshots'))
+    SNAPSHOT_TTL = _option(config, 'SNAPSHOTS', 'TTL', 900, ConfigParser.ConfigParser.getint)
+
+    FAKE_SITE_DIR = os.path.abspath(_option(config, 'FAKE', 'Site', 'tests/resources/fake_site'))
+
+    PROFILE = _option(config, 'PROFILING', 'Mode', 'off').lower()
 
+    LOG_LEVELS = _option(config, 'LOGGING', 'Levels', '')
     LOG_DIR = os.path.abspath('logs')
@@ -28,3 +28,17 @@ class CSVReader(object):
                 for row in reader:
                     values[row['Name']] = row['Value']
         return values
+
+    @staticmethod
+    def read_rows(path):
+        """
+        Parse CSV file and return all rows as dicts with header row values as keys.
+        Quote character - ". Delimiter - ,
+        :param path: full path to CSV file
+        :return: list of dicts, empty if file does not exist.
+        """
+        if not os.path.exists(path):
+            return []
+
+        with open(path) as csv_file:
+            return list(csv.DictReader(csv_file, delimiter=',', quotechar='"'))
@@ -0,0 +1,55 @@
+"""
+Locator with search strategy.
+"""
+from collections import namedtuple
+
+from selenium.webdriver.common.by import By
+
+
+class Locator(namedtuple('Locator', 'by value')):
+    """
+    Pair of selenium strategy and value, can be passed to expected_conditions and find_element(s) as is.
+    Text form is strategy=value, for example css=input.search or id=login. Text without known prefix is xpath.
+    """
+    __slots__ = ()
+
+    STRATEGIES = {
+        'xpath': By.XPATH,
+        'css': By.CSS_SELECTOR,
+        'id': By.ID,
+        'name': By.NAME,
+    }
+    NAMES = dict((by, name) for name, by in STRATEGIES.items())
+
+    @classmethod
+    def parse(cls, text, strategy=None):
+        """
+        Make locator from text.
+        :param text: str - locator in strategy=value form or xpath. Locator is returned as is
+        :param strategy: str - one of STRATEGIES keys, if given text is taken as value without prefix
+        :return: Locator
+        """
+        if isinstance(text, Locator):
+            return text
+
+        if strategy:
+            try:
+                return cls(cls.STRATEGIES[strategy.strip().lower()], text)
+            except KeyError:
+                raise ValueError('Unknown locator strategy "{}" for: {}'.format(strategy, text))
+
+        prefix, separator, value = text.partition('=')
+        by = cls.STRATEGIES.get(prefix.strip().lower())
+        if separator and by is not None:
+            return cls(by, value)
+        return cls(By.XPATH, text)
+
+    @property
+    def strategy(self):
+        """
+        :return: str - short strategy name: xpath, css, id or name
+        """
+        return self.NAMES.get(self.by, self.by)
+
+    def __str__(self):
+        return '{}={}'.format(self.strategy, self.value)
@@ -0,0 +1,151 @@
+"""
+Report of xpath locators which can be replaced with equivalent (and faster) css or id locators.
+Only simple xpath is converted: element steps separated by / or //, with attribute predicates
+@attr='value', @attr, contains(@attr, 'value'), starts-with(@attr, 'value') joined by "and".
+Positional predicates, text(), axes and functions are reported as not convertible.
+
+Usage (from project root):
+    python -m utilities.locator_advisor [folder with *.def.csv files]
+"""
+import os
+import re
+import sys
+
+from selenium.webdriver.common.by import By
+
+from utilities.config import Config
+from utilities.locator import Locator
+from utilities.locator_registry import LocatorRegistry
+
+STEP = re.compile(r'(//|/)([A-Za-z][\w-]*|\*)((?:\[[^\]]*\])*)')
+PREDICATE = re.compile(r'\[([^\]]*)\]')
+AND = re.compile(r'\s+and\s+')
+QUOTED = r'''(?:'([^']*)'|"([^"]*)")'''
+
+CONDITIONS = (
+    (re.compile(r'^@([\w-]+)\s*=\s*' + QUOTED + r'$'), '='),
+    (re.compile(r'^contains\(\s*@([\w-]+)\s*,\s*' + QUOTED + r'\s*\)$'), '*='),
+    (re.compile(r'^starts-with\(\s*@([\w-]+)\s*,\s*' + QUOTED + r'\s*\)$'), '^='),
+)
+HAS_ATTRIBUTE = re.compile(r'^@([\w-]+)$')
+ID_ONLY = re.compile(r'^//(?:[A-Za-z][\w-]*|\*)\[@id\s*=\s*' + QUOTED + r'\]$')
+
+
+def _css_value(value):
+    """
+    Quote attribute value for css.
+    :return: str or None if value contains both quote types
+    """
+    if "'" not in value:
+        return "'{}'".format(value)
+    if '"' not in value:
+        return '"{}"'.format(value)
+    return None
+
+
+def _css_condition(condition):
+    """
+    Convert one xpath predicate condition to css attribute selector.
+    :return: str or None if not convertible
+    """
+    match = HAS_ATTRIBUTE.match(condition)
+    if match:
+        return '[{}]'.format(match.group(1))
+
+    for pattern, operator in CONDITIONS:
+        match = pattern.match(condition)
+        if match:
+            value = _css_value(match.group(2) if match.group(2) is not None else match.group(3))
+            if value is None:
+                return None
+            return '[{}{}{}]'.format(match.group(1), operator, value)
+    return None
+
+
+def to_css(xpath):
+    """
+    Convert simple xpath to equivalent css selector.
+    :param xpath: str
+    :return: str - css selector or None if xpath is not convertible
+    """
+    xpath = xpath.strip()
+    parts = []
+    position = 0
+
+    while position < len(xpath):
+        match = STEP.match(xpath, position)
+        if match is None:
+            return None
+        axis, tag, predicates = match.groups()
+
+        selector = '' if tag == '*' else tag
+        for predicate in PREDICATE.findall(predicates):
+            for condition in AND.split(predicate.strip()):
+                css = _css_condition(condition.strip())
+                if css is None:
+                    return None
+                selector += css
+
+        if parts:
+            parts.append(' > ' if axis == '/' else ' ')
+        parts.append(selector or '*')
+        position = match.end()
+
+    return ''.join(parts) or None
+
+
+def suggest(locator):
+    """
+    Suggest faster locator for given one.
+    :param locator: utilities.locator.Locator or str
+    :return: utilities.locator.Locator or None if locator is not xpath or not convertible
+    """
+    locator = Locator.parse(locator)
+    if locator.by != By.XPATH:
+        return None
+
+    match = ID_ONLY.match(locator.value.strip())
+    if match:  # element id is unique, tag is not needed
+        return Locator(By.ID, match.group(1) if match.group(1) is not None else match.group(2))
+
+    css = to_css(locator.value)
+    if css is None:
+        return None
+    return Locator(By.CSS_SELECTOR, css)
+
+
+def report(directory):
+    """
+    Find convertible xpath locators in all definition files of folder.
+    :param directory: str - folder with *.def.csv files
+    :return: list of tuples (file, name, xpath locator, suggested locator or None)
+    """
+    rows = []
+    for root, _, files in os.walk(directory):
+        for file_name in sorted(files):
+            if not file_name.endswith('.def.csv'):
+                continue
+            path = os.path.join(root, file_name)
+            locators = LocatorRegistry.get(path)
+            for name in sorted(locators):
+                if locators[name].by == By.XPATH:
+                    rows.append((path, name, locators[name], suggest(locators[name])))
+    return rows
+
+
+def main(args):
+    directory = args[0] if args else Config.DEFINITIONS_DIR
+    rows = report(directory)
+
+    convertible = 0
+    for path, name, locator, suggestion in rows:
+        if suggestion is None:
+            print('{}: "{}" {} - no equivalent'.format(path, name, locator))
+        else:
+            convertible += 1
+            print('{}: "{}" {} -> {}'.format(path, name, locator, suggestion))
+    print('Convertible xpath locators: {} of {}'.format(convertible, len(rows)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+"""
+Process wide cache of page locators from *.def.csv files.
+"""
+import collections
+import logging
+import os
+import threading
+
+import cssselect
+from lxml import etree
+from selenium.webdriver.common.by import By
+
+from utilities.csv_reader import CSVReader
+from utilities.locator import Locator
+
+
+class Locators(collections.Mapping):
+    """
+    Read-only name -> utilities.locator.Locator mapping shared by all instances of a page.
+    """
+    def __init__(self, values):
+        self._values = dict(values)
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._values)
+
+
+class LocatorRegistry(object):
+    """
+    Loads every definition file once per process and reloads it only when file modification time changes.
+    Locators are validated while loading, so broken one fails at start instead of in the middle of scenario.
+    Definition file header is Name,Value or Name,Value,Strategy. Strategy is xpath, css, id or name.
+    Without Strategy column (or with empty one) value can have prefix: css=..., id=..., name=..., xpath=...
+    Value without prefix is xpath.
+    """
+    _cache = {}  # absolute path -> (mtime, Locators)
+    _lock = threading.Lock()
+    logger = logging.getLogger('LocatorRegistry')
+
+    @classmethod
+    def get(cls, path):
+        """
+        Get locators of definition file.
+        :param path: str - path to *.def.csv file
+        :return: Locators
+        """
+        path = os.path.abspath(path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            cls.logger.warning('Definition file not found: %s', path)
+            return Locators({})
+
+        cached = cls._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with cls._lock:
+            cached = cls._cache.get(path)
+            if cached is None or cached[0] != mtime:
+                cls.logger.debug('Loading locators from: %s', path)
+                cached = (mtime, cls._load(path))
+                cls._cache[path] = cached
+        return cached[1]
+
+    @classmethod
+    def preload(cls, directory):
+        """
+        Load and validate all *.def.csv files in given folder and its subfolders.
+        :param directory: str - folder with definition files
+        :return: int - number of loaded files
+        """
+        loaded = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.def.csv'):
+                    cls.get(os.path.join(root, name))
+                    loaded += 1
+        cls.logger.info('Loaded %s definition files from: %s', loaded, directory)
+        return loaded
+
+    @classmethod
+    def clear(cls):
+        """
+        Forget all loaded files.
+        """
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def _load(cls, path):
+        values = {}
+        for row in CSVReader.read_rows(path):
+            locator = Locator.parse(row['Value'], row.get('Strategy'))
+            cls.validate(locator, row['Name'], path)
+            values[row['Name']] = locator
+        return Locators(values)
+
+    @classmethod
+    def validate(cls, locator, name='', path=''):
+        """
+        Check locator syntax.
+        :param locator: utilities.locator.Locator or str
+        :param name: str - locator name, used in error message
+        :param path: str - definition file, used in error message
+        :raise ValueError: if locator is invalid
+        """
+        locator = Locator.parse(locator)
+        try:
+            if locator.by == By.XPATH:
+                etree.XPath(locator.value)
+            elif locator.by == By.CSS_SELECTOR:
+                cssselect.parse(locator.value)
+            elif not locator.value:
+                raise ValueError('Empty value')
+        except Exception as e:
+            cls.logger.error('Invalid locator "%s" of "%s" in %s', locator, name, path)
+            raise ValueError('Invalid locator "{}" of "{}" in {}: {}'.format(locator, name, path, e))
@@ -6,27 +6,157 @@ Created on September 18, 2015
 from datetime import datetime
 import logging.config
 import os
+import Queue
+import re
+import threading
 
 from utilities.config import Config
 
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:  # python 2 has no queue handlers, minimal backport of python 3 ones
+    class QueueHandler(logging.Handler):
+        """
+        Puts log records to queue instead of handling them.
+        """
+
+        def __init__(self, queue):
+            logging.Handler.__init__(self)
+            self.queue = queue
+
+        def prepare(self, record):
+            return record
+
+        def emit(self, record):
+            try:
+                self.queue.put_nowait(self.prepare(record))
+            except Exception:
+                self.handleError(record)
+
+    class QueueListener(object):
+        """
+        Takes log records from queue in background thread and passes them to handlers.
+        Handler levels are respected.
+        """
+        _sentinel = None
+
+        def __init__(self, queue, *handlers):
+            self.queue = queue
+            self.handlers = handlers
+            self._thread = None
+
+        def start(self):
+            self._thread = threading.Thread(target=self._monitor, name='QueueListener')
+            self._thread.daemon = True
+            self._thread.start()
+
+        def stop(self):
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+        def handle(self, record):
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+        def _monitor(self):
+            while True:
+                record = self.queue.get()
+                if record is self._sentinel:
+                    break
+                self.handle(record)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Queue handler which only merges message with its arguments in calling thread,
+    formatting (time, traceback, layout) and writing are done by QueueListener thread.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 class Logger(object):
+    _listener = None
+    _test_folders = set()
 
     @staticmethod
     def configure_logging():
         """
         Perform logging configuration from file named log.ini in root folder.
+        Handlers from log.ini are moved to background thread, root logger only puts records to queue.
+        Per-module levels are taken from Config.LOG_LEVELS.
         """
         if not os.path.exists(Config.LOG_DIR):
-            os.mkdir(Config.LOG_DIR)
-            
+            os.makedirs(Config.LOG_DIR)
+
         logging.config.fileConfig('log.ini', defaults={'logdir': Config.LOG_DIR,
                                                        'datetime': str(datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f'))})
 
+        root = logging.getLogger()
+        handlers = root.handlers[:]
+        for handler in handlers:
+            root.removeHandler(handler)
+
+        queue = Queue.Queue()
+        root.addHandler(LazyQueueHandler(queue))
+        Logger._listener = QueueListener(queue, *handlers)
+        Logger._listener.start()
+
+        Logger.set_levels(Config.LOG_LEVELS)
+
+    @staticmethod
+    def stop_logging():
+        """
+        Write remaining log records and move handlers back to root logger.
+        """
+        if Logger._listener is None:
+            return
+
+        Logger._listener.stop()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            if isinstance(handler, LazyQueueHandler):
+                root.removeHandler(handler)
+        for handler in Logger._listener.handlers:
+            root.addHandler(handler)
+        Logger._listener = None
+
+    @staticmethod
+    def set_levels(levels):
+        """
+        Set levels of loggers.
+        :param levels: str - comma separated logger:LEVEL pairs, for example: selenium:WARNING, MainPage:INFO
+        """
+        for item in levels.split(','):
+            if not item.strip():
+                continue
+            name, separator, level = item.rpartition(':')
+            if not separator or not name.strip():
+                raise ValueError('Log level should be in logger:LEVEL form: {}'.format(item.strip()))
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
     @staticmethod
     def create_test_folder(test_id):
-        test_id = test_id.replace(' ', '_')
+        """
+        Create folder for manifest and other files of test.
+        Tests with the same name get folders with number suffix, so they do not overwrite each other.
+        :param test_id: str - test name
+        :return: str - folder path
+        """
+        test_id = re.sub('[^A-Za-z0-9_.-]+', '_', test_id)
         report_dir = '{}/{}'.format(Config.LOG_DIR, test_id)
 
+        number = 1
+        while report_dir in Logger._test_folders:
+            number += 1
+            report_dir = '{}/{}_{}'.format(Config.LOG_DIR, test_id, number)
+        Logger._test_folders.add(report_dir)
+
         if not os.path.exists(report_dir):
             os.mkdir(report_dir)
+        return report_dir